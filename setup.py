@@ -3,7 +3,8 @@ from setuptools import setup
 setup(
     name='slidingpuzzle',
     version='0.0.1',
-    packages=['slidingpuzzle', 'slidingpuzzle.tests'],
+    packages=['slidingpuzzle', 'slidingpuzzle.benchmark', 'slidingpuzzle.tests'],
+    package_data={'slidingpuzzle.benchmark': ['data/*.txt']},
     url='https://slidingpuzzle.readthedocs.io/en/latest/?',
     license='MIT',
     author='jmbhughes',
@@ -0,0 +1,179 @@
+from __future__ import annotations
+import os
+import time
+from array import array
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from .cache import SolutionCache
+from .distance_table import MAX_TABLE_WIDTH, DistanceTableHeuristic, DistanceTableNPuzzleSolver, get_distance_table
+from .puzzle import NPuzzle, PackedNPuzzle, SlideDirection
+from .registry import needs_heuristic, resolve_solver
+from .solver import NPuzzleSolver, NPuzzleHeuristic, ManhattanHeuristic, SearchBudget
+from .walking_distance import DEFAULT_CACHE_DIR
+
+SolveResult = namedtuple("SolveResult", "index puzzle solution status nodes seconds")
+
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+OUT_OF_BUDGET = "out_of_budget"
+
+_DIRECTIONS = list(SlideDirection)
+
+# set once in every worker process by _initialize_worker
+_worker_solver = None
+_worker_heuristic = None
+
+
+def _encode(puzzle: NPuzzle | PackedNPuzzle) -> Tuple[int, bytes, bytes]:
+    # two bytes per tile, since boards from 16x16 up have tiles past 255
+    return puzzle.n_cols, array("H", puzzle.placements).tobytes(), array("H", puzzle.solution).tobytes()
+
+
+def _decode_tiles(tiles: bytes) -> List[int]:
+    decoded = array("H")
+    decoded.frombytes(tiles)
+    return decoded.tolist()
+
+
+def _initialize_worker(solver: str | Type[NPuzzleSolver], heuristic: Optional[NPuzzleHeuristic]):
+    global _worker_solver, _worker_heuristic
+    _worker_solver = resolve_solver(solver)
+    _worker_heuristic = heuristic
+
+
+def _solve_encoded(index: int, width: int, placements: bytes, solution: bytes,
+                   time_limit: Optional[float],
+                   max_nodes: Optional[int]) -> Tuple[int, Optional[bytes], str, int, float, bool]:
+    """
+    Runs in a worker: solve one compactly encoded puzzle and return the moves as direction indices, along with
+    whether the solution is known to be optimal
+    """
+    puzzle = PackedNPuzzle.from_placements(width, _decode_tiles(placements), _decode_tiles(solution))
+    budget = SearchBudget(max_nodes, time_limit) if time_limit is not None or max_nodes is not None else None
+    if needs_heuristic(_worker_solver):
+        solver = _worker_solver(puzzle, _worker_heuristic, budget=budget)
+    else:
+        solver = _worker_solver(puzzle, budget=budget)
+    start_time = time.perf_counter()
+    moves = solver.solve()
+    seconds = time.perf_counter() - start_time
+    if moves is False:
+        return (index, None, OUT_OF_BUDGET if solver.budget_exhausted else UNSOLVABLE, solver.num_nodes_explored,
+                seconds, False)
+    return (index, bytes(_DIRECTIONS.index(move) for move in moves), SOLVED, solver.num_nodes_explored, seconds,
+            solver.solution_is_optimal())
+
+
+def _prepare_tables(solver_class: Type[NPuzzleSolver], heuristic: Optional[NPuzzleHeuristic],
+                    puzzle: NPuzzle | PackedNPuzzle):
+    """Build or load the distance table the puzzle needs in this process, so the workers only memory-map it"""
+    if issubclass(solver_class, DistanceTableNPuzzleSolver):
+        cache_dir = DEFAULT_CACHE_DIR
+    elif isinstance(heuristic, DistanceTableHeuristic):
+        cache_dir = heuristic.cache_dir
+    else:
+        return
+    if cache_dir and puzzle.n_cols <= MAX_TABLE_WIDTH:
+        get_distance_table(puzzle.n_cols, list(puzzle.solution).index(0), cache_dir)
+
+
+def _decode_result(puzzles: Dict[int, NPuzzle | PackedNPuzzle], result) -> SolveResult:
+    index, moves, status, nodes, seconds, _ = result
+    solution = [_DIRECTIONS[move] for move in moves] if moves is not None else False
+    return SolveResult(index, puzzles.pop(index), solution, status, nodes, seconds)
+
+
+def solve_many(puzzles: Iterable[NPuzzle | PackedNPuzzle],
+               solver: str | Type[NPuzzleSolver] = "astar",
+               heuristic: Optional[NPuzzleHeuristic] = None,
+               workers: Optional[int] = None,
+               ordered: bool = False,
+               time_limit: Optional[float] = None,
+               max_nodes: Optional[int] = None,
+               max_pending: Optional[int] = None,
+               cache: Optional[SolutionCache] = None) -> Iterator[SolveResult]:
+    """
+    Solve many puzzles on a pool of worker processes and yield a SolveResult for each as soon as it is ready,
+    in completion order or, when ordered is set, in input order.
+
+    Puzzles are sent to workers as two bytes per tile and solutions come back as bytes. The solver is a class or a
+    name in registry.SOLVERS, such as "astar", "idastar" or "table". The heuristic, ManhattanHeuristic by default, is
+    pickled once per worker, so memory-mapped tables are opened once in each process. time_limit (seconds) and
+    max_nodes apply to every puzzle separately, and puzzles that exceed them are reported as out of budget.
+    Distance tables the solver or heuristic needs are built or loaded here before a worker uses them.
+    With workers=0 everything runs in the calling process.
+    With a SolutionCache, puzzles it holds are answered in the calling process with 0 nodes and never reach a
+    worker, and solutions the worker's solver knows to be optimal are added to it.
+    """
+    solver_class = resolve_solver(solver)
+    if heuristic is None and needs_heuristic(solver_class):
+        heuristic = ManhattanHeuristic()
+    workers = os.cpu_count() if workers is None else workers
+
+    def cached(index: int, puzzle: NPuzzle | PackedNPuzzle) -> Optional[SolveResult]:
+        if cache is None:
+            return None
+        start_time = time.perf_counter()
+        solution = cache.get(puzzle)
+        if solution is None:
+            return None
+        return SolveResult(index, puzzle, solution, SOLVED, 0, time.perf_counter() - start_time)
+
+    def decode(result) -> SolveResult:
+        optimal = result[-1]
+        result = _decode_result(pending_puzzles, result)
+        if cache is not None and result.status == SOLVED and optimal:
+            cache.put(result.puzzle, result.solution)
+        return result
+
+    pending_puzzles: Dict[int, NPuzzle | PackedNPuzzle] = {}
+    if workers == 0:
+        _initialize_worker(solver_class, heuristic)
+        for index, puzzle in enumerate(puzzles):
+            hit = cached(index, puzzle)
+            if hit is not None:
+                yield hit
+                continue
+            pending_puzzles[index] = puzzle
+            yield decode(_solve_encoded(index, *_encode(puzzle), time_limit, max_nodes))
+        return
+
+    # bound the number of submitted puzzles so huge or lazy inputs are not read all at once
+    max_pending = max_pending or 4 * workers
+    with ProcessPoolExecutor(workers, initializer=_initialize_worker, initargs=(solver_class, heuristic)) as pool:
+        iterator = enumerate(puzzles)
+        running = set()
+        finished = {}
+        next_index = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(running) + len(finished) < max_pending:
+                try:
+                    index, puzzle = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                hit = cached(index, puzzle)
+                if hit is not None:
+                    if ordered:
+                        finished[index] = hit
+                    else:
+                        yield hit
+                    continue
+                _prepare_tables(solver_class, heuristic, puzzle)
+                pending_puzzles[index] = puzzle
+                running.add(pool.submit(_solve_encoded, index, *_encode(puzzle), time_limit, max_nodes))
+            if not running and not finished:
+                break
+            if running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = decode(future.result())
+                    if ordered:
+                        finished[result.index] = result
+                    else:
+                        yield result
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
@@ -0,0 +1,9 @@
+"""
+Benchmarks for the N-puzzle solvers: standard instance sets, a runner that records wall time, nodes, nodes per
+second, peak memory and solution length as JSON, and a comparison of two result files to catch regressions.
+
+Run ``python -m slidingpuzzle.benchmark run --help`` for the command line.
+"""
+from .instances import Instance, INSTANCE_SETS, load_instances, get_instance_set
+from .runner import (BenchmarkResult, Configuration, Regression, SOLVERS, HEURISTICS, parse_configuration,
+                     all_configurations, run_one, run_benchmark, save_results, load_results, compare_results)
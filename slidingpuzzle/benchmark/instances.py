@@ -0,0 +1,44 @@
+from __future__ import annotations
+import os
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..puzzle import NPuzzle
+
+Instance = namedtuple("Instance", "name width placements solution optimal_length")
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+#: name -> (file in DATA_DIR, width, solution)
+INSTANCE_SETS: Dict[str, Tuple[str, int, Tuple[int, ...]]] = {
+    "korf100": ("korf100.txt", 4, tuple(range(16))),
+    "eight-graded": ("eight_graded.txt", 3, (1, 2, 3, 4, 5, 6, 7, 8, 0)),
+}
+
+
+def load_instances(path: str, width: int, solution: Optional[Sequence[int]] = None) -> List[Instance]:
+    """
+    Read instances from a text file with one per line: a name, the optimal solution length (or - when unknown)
+    and the placements in reading order. Lines starting with # are comments.
+    """
+    solution = tuple(solution) if solution is not None else tuple(range(width * width))
+    instances = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            name, optimal_length, placements = fields[0], fields[1], tuple(int(tile) for tile in fields[2:])
+            assert sorted(placements) == list(range(width * width)), f"{name} is not a {width}x{width} board"
+            instances.append(Instance(name, width, placements, solution,
+                                      None if optimal_length == "-" else int(optimal_length)))
+    return instances
+
+
+def get_instance_set(name: str) -> List[Instance]:
+    """One of the instance sets shipped with the package, see INSTANCE_SETS"""
+    filename, width, solution = INSTANCE_SETS[name]
+    return load_instances(os.path.join(DATA_DIR, filename), width, solution)
+
+
+def to_puzzle(instance: Instance) -> NPuzzle:
+    return NPuzzle(instance.width, list(instance.placements), list(instance.solution))
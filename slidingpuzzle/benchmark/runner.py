@@ -0,0 +1,197 @@
+from __future__ import annotations
+import argparse
+import datetime
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from collections import namedtuple
+from typing import Iterable, Iterator, List, Optional, Sequence
+from ..registry import HEURISTICS, MAX_WIDTH, SOLVERS, needs_heuristic
+from ..solver import SearchBudget
+from .instances import INSTANCE_SETS, Instance, get_instance_set, to_puzzle
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+Configuration = namedtuple("Configuration", "solver heuristic")
+BenchmarkResult = namedtuple("BenchmarkResult", "instance_set instance solver heuristic status seconds nodes "
+                                                "nodes_per_second peak_rss_kb solution_length optimal_length")
+Regression = namedtuple("Regression", "instance_set instance solver heuristic metric baseline current")
+
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+OUT_OF_BUDGET = "out_of_budget"
+
+
+def parse_configuration(text: str) -> Configuration:
+    """Turn "astar:manhattan" or "bfs" into a Configuration"""
+    solver, _, heuristic = text.partition(":")
+    assert solver in SOLVERS, f"unknown solver {solver}, expected one of {', '.join(SOLVERS)}"
+    if needs_heuristic(solver):
+        heuristic = heuristic or "manhattan"
+        assert heuristic in HEURISTICS, f"unknown heuristic {heuristic}, expected one of {', '.join(HEURISTICS)}"
+        return Configuration(solver, heuristic)
+    assert not heuristic, f"{solver} does not take a heuristic"
+    return Configuration(solver, None)
+
+
+def all_configurations() -> List[Configuration]:
+    """Every solver, paired with every heuristic when it takes one"""
+    return [Configuration(solver, heuristic) for solver in SOLVERS
+            for heuristic in (HEURISTICS if needs_heuristic(solver) else [None])]
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_one(instance: Instance, configuration: Configuration, instance_set: str = "custom",
+            time_limit: Optional[float] = None, max_nodes: Optional[int] = None) -> BenchmarkResult:
+    """Solve one instance with one configuration; building the heuristic is not timed"""
+    solver_class = SOLVERS[configuration.solver]
+    budget = SearchBudget(max_nodes, time_limit) if time_limit is not None or max_nodes is not None else None
+    if configuration.heuristic is not None:
+        solver = solver_class(to_puzzle(instance), HEURISTICS[configuration.heuristic](), budget=budget)
+    else:
+        solver = solver_class(to_puzzle(instance), budget=budget)
+    start_time = time.perf_counter()
+    solution = solver.solve()
+    seconds = time.perf_counter() - start_time
+    if solution is False:
+        status = OUT_OF_BUDGET if solver.budget_exhausted else UNSOLVABLE
+    else:
+        status = SOLVED
+    return BenchmarkResult(instance_set, instance.name, configuration.solver, configuration.heuristic, status,
+                           seconds, solver.num_nodes_explored,
+                           solver.num_nodes_explored / seconds if seconds > 0 else 0.0, _peak_rss_kb(),
+                           len(solution) if solution is not False else None, instance.optimal_length)
+
+
+def _run_one_packed(args) -> BenchmarkResult:
+    return run_one(*args)
+
+
+def run_benchmark(instances: Iterable[Instance], configurations: Sequence[Configuration],
+                  instance_set: str = "custom", time_limit: Optional[float] = 60.0, max_nodes: Optional[int] = None,
+                  isolate: bool = True) -> Iterator[BenchmarkResult]:
+    """
+    Run every configuration on every instance, one at a time, and yield a BenchmarkResult for each.
+    With isolate set every run gets a fresh process, so its peak RSS is its own; otherwise runs share the
+    calling process and peak_rss_kb only ever grows. Configurations that cannot handle an instance's width
+    are skipped.
+    """
+    runs = [(instance, configuration, instance_set, time_limit, max_nodes)
+            for instance in instances for configuration in configurations
+            if instance.width <= MAX_WIDTH.get(configuration.solver, instance.width)]
+    if not isolate:
+        for run in runs:
+            yield run_one(*run)
+        return
+    with multiprocessing.get_context().Pool(1, maxtasksperchild=1) as pool:
+        yield from pool.imap(_run_one_packed, runs)
+
+
+def metadata() -> dict:
+    return {"python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()}
+
+
+def save_results(path: str, results: Iterable[BenchmarkResult]):
+    with open(path, "w") as f:
+        json.dump({"metadata": metadata(), "results": [result._asdict() for result in results]}, f, indent=1)
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    with open(path) as f:
+        return [BenchmarkResult(**result) for result in json.load(f)["results"]]
+
+
+def compare_results(baseline: Iterable[BenchmarkResult], current: Iterable[BenchmarkResult],
+                    tolerance: float = 0.1, min_seconds: float = 0.01) -> List[Regression]:
+    """
+    Regressions of current against baseline for the runs both contain: a solve that no longer succeeds or
+    returns a longer solution, more than tolerance (as a fraction) more nodes, or more than tolerance more
+    time when the difference is also over min_seconds, which keeps timer noise on tiny runs out.
+    """
+    def key(result):
+        return result.instance_set, result.instance, result.solver, result.heuristic
+
+    baseline = {key(result): result for result in baseline}
+    regressions = []
+    for result in current:
+        before = baseline.get(key(result))
+        if before is None:
+            continue
+        if before.status == SOLVED and result.status != SOLVED:
+            regressions.append(Regression(*key(result), "status", before.status, result.status))
+            continue
+        if result.status != SOLVED:
+            continue
+        if result.solution_length > before.solution_length:
+            regressions.append(Regression(*key(result), "solution_length", before.solution_length,
+                                          result.solution_length))
+        if result.nodes > before.nodes * (1 + tolerance):
+            regressions.append(Regression(*key(result), "nodes", before.nodes, result.nodes))
+        if result.seconds > before.seconds * (1 + tolerance) and result.seconds - before.seconds > min_seconds:
+            regressions.append(Regression(*key(result), "seconds", before.seconds, result.seconds))
+    return regressions
+
+
+def _format(result: BenchmarkResult) -> str:
+    heuristic = f":{result.heuristic}" if result.heuristic else ""
+    length = result.solution_length if result.solution_length is not None else "-"
+    return (f"{result.instance:<10} {result.solver + heuristic:<40} {result.status:<13} {result.seconds:9.3f}s "
+            f"{result.nodes:>10} nodes {result.nodes_per_second:>10.0f}/s {result.peak_rss_kb or 0:>8} KB "
+            f"length {length} (optimal {result.optimal_length})")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the N-puzzle solvers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run solvers on an instance set and write the results as JSON")
+    run.add_argument("--set", default="eight-graded", choices=sorted(INSTANCE_SETS))
+    run.add_argument("--configuration", "-c", action="append",
+                     help="solver or solver:heuristic, such as idastar:linear-conflict; defaults to all of them")
+    run.add_argument("--limit", type=int, help="only run the first instances of the set")
+    run.add_argument("--time-limit", type=float, default=60.0, help="seconds per solve")
+    run.add_argument("--max-nodes", type=int)
+    run.add_argument("--no-isolate", action="store_true", help="run in this process instead of one per solve")
+    run.add_argument("--output", "-o", help="JSON file for the results")
+    compare = commands.add_parser("compare", help="list regressions of one results file against another")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=0.1)
+    compare.add_argument("--min-seconds", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare_results(load_results(args.baseline), load_results(args.current),
+                                      args.tolerance, args.min_seconds)
+        for regression in regressions:
+            print(f"{regression.instance_set}/{regression.instance} {regression.solver}:{regression.heuristic} "
+                  f"{regression.metric}: {regression.baseline} -> {regression.current}")
+        print(f"{len(regressions)} regressions")
+        return 1 if regressions else 0
+
+    configurations = ([parse_configuration(text) for text in args.configuration] if args.configuration
+                      else all_configurations())
+    instances = get_instance_set(args.set)[:args.limit]
+    results = []
+    for result in run_benchmark(instances, configurations, args.set, args.time_limit, args.max_nodes,
+                                isolate=not args.no_isolate):
+        print(_format(result), flush=True)
+        results.append(result)
+    if args.output:
+        save_results(args.output, results)
+    return 0
@@ -0,0 +1,242 @@
+"""
+A cache of solutions in front of any solver. Boards are folded under the symmetries of the square that keep the
+goal in place, so a board and its mirror image share one entry, and each cached path is translated back through
+the symmetry on the way out. Entries live in an in-memory LRU tier and, optionally, in a SQLite file shared by
+every process that opens it.
+"""
+from __future__ import annotations
+import sqlite3
+import time
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+from .puzzle import NPuzzle, PackedNPuzzle, SlideDirection
+from .solver import NPuzzleSolver
+
+_DIRECTIONS = list(SlideDirection)
+
+#: the eight symmetries of the square as (row, col) -> (row, col) on a width x width board
+_CELL_MAPS = (lambda width, row, col: (row, col),
+              lambda width, row, col: (col, row),
+              lambda width, row, col: (row, width - 1 - col),
+              lambda width, row, col: (width - 1 - row, col),
+              lambda width, row, col: (width - 1 - row, width - 1 - col),
+              lambda width, row, col: (col, width - 1 - row),
+              lambda width, row, col: (width - 1 - col, row),
+              lambda width, row, col: (width - 1 - col, width - 1 - row))
+
+# cells: the cell each cell moves to, tiles: the tile each tile becomes, directions: the index of the direction
+# each direction becomes, and inverse_directions the way back
+Symmetry = namedtuple("Symmetry", "cells tiles directions inverse_directions")
+
+
+@lru_cache(maxsize=None)
+def board_symmetries(width: int, solution: Tuple[int, ...]) -> Tuple[Symmetry, ...]:
+    """
+    The symmetries of the square that map the solved board onto itself once tiles are renamed after the goal
+    cells they land on; they preserve distances to the goal. Only those that keep the goal's blank cell in place
+    qualify, so for the usual goals, with the blank in a corner, there are two: the identity and the reflection
+    in the diagonal through the blank.
+    """
+    goal_cell = {tile: cell for cell, tile in enumerate(solution)}
+    blank_row, blank_col = divmod(goal_cell[0], width)
+    symmetries = []
+    for cell_map in _CELL_MAPS:
+        if cell_map(width, blank_row, blank_col) != (blank_row, blank_col):
+            continue
+        cells = tuple(row * width + col for row, col in (cell_map(width, *divmod(cell, width))
+                                                         for cell in range(width * width)))
+        tiles = tuple(solution[cells[goal_cell[tile]]] for tile in range(width * width))
+        # a slide moves the tile at blank + direction.value, and a symmetry acts on that offset linearly
+        origin_row, origin_col = cell_map(width, 0, 0)
+        directions = []
+        for direction in _DIRECTIONS:
+            row, col = cell_map(width, *direction.value)
+            directions.append(_DIRECTIONS.index(SlideDirection((row - origin_row, col - origin_col))))
+        inverse_directions = [0] * len(directions)
+        for index, image in enumerate(directions):
+            inverse_directions[image] = index
+        symmetries.append(Symmetry(cells, tiles, tuple(directions), tuple(inverse_directions)))
+    return tuple(symmetries)
+
+
+def apply_symmetry(symmetry: Symmetry, placements: Sequence[int]) -> List[int]:
+    transformed = [0] * len(placements)
+    for cell, tile in enumerate(placements):
+        transformed[symmetry.cells[cell]] = symmetry.tiles[tile]
+    return transformed
+
+
+def canonical_form(width: int, placements: Sequence[int],
+                   solution: Sequence[int]) -> Tuple[Tuple[int, ...], Symmetry]:
+    """The smallest image of the board under board_symmetries, and the symmetry that produces it"""
+    return min(((tuple(apply_symmetry(symmetry, placements)), symmetry)
+                for symmetry in board_symmetries(width, tuple(solution))), key=lambda image: image[0])
+
+
+class CacheStats:
+    """Lookups served by each tier, misses, stores and evictions since the cache was opened"""
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self):
+        return (f"CacheStats(memory_hits={self.memory_hits}, disk_hits={self.disk_hits}, misses={self.misses}, "
+                f"stores={self.stores}, evictions={self.evictions}, disk_evictions={self.disk_evictions})")
+
+
+class SolutionCache:
+    """
+    Solutions keyed by the canonical form of a board and its goal. The memory tier keeps the capacity most
+    recently used entries. With a path, entries are also written to a SQLite database there, which is consulted
+    on memory misses and, if disk_capacity is set, trimmed back to it by last use. Set symmetries to False to
+    key boards as they are. A cache is not thread-safe, but any one thread at a time may use it.
+    """
+    def __init__(self, capacity: Optional[int] = 100000, path: Optional[str] = None,
+                 disk_capacity: Optional[int] = None, symmetries: bool = True):
+        assert capacity is None or capacity >= 0, "capacity must be None or non-negative"
+        self.capacity = capacity
+        self.path = path
+        self.disk_capacity = disk_capacity
+        self.symmetries = symmetries
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._connection = None
+        if path is not None:
+            # the solving service calls the cache from a thread of its own
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+                                     "(key TEXT PRIMARY KEY, moves BLOB NOT NULL, last_used REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+            self._connection.commit()
+
+    def _key(self, puzzle: NPuzzle | PackedNPuzzle) -> Tuple[str, Symmetry]:
+        width, placements, solution = puzzle.n_cols, puzzle.placements, tuple(puzzle.solution)
+        if self.symmetries:
+            placements, symmetry = canonical_form(width, placements, solution)
+        else:
+            symmetry = board_symmetries(width, solution)[0]
+        return f"{width}:{','.join(map(str, solution))}:{','.join(map(str, placements))}", symmetry
+
+    def get(self, puzzle: NPuzzle | PackedNPuzzle) -> Optional[List[SlideDirection]]:
+        """The cached solution of the puzzle, or None"""
+        key, symmetry = self._key(puzzle)
+        moves = self._memory.get(key)
+        if moves is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+        elif self._connection is not None:
+            row = self._connection.execute("SELECT moves FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                moves = bytes(row[0])
+                self._connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._connection.commit()
+                self._remember(key, moves)
+                self.stats.disk_hits += 1
+        if moves is None:
+            self.stats.misses += 1
+            return None
+        return [_DIRECTIONS[symmetry.inverse_directions[move]] for move in moves]
+
+    def put(self, puzzle: NPuzzle | PackedNPuzzle, solution: List[SlideDirection]):
+        """Store a solution of the puzzle, which should be optimal, since every image of the board shares it"""
+        key, symmetry = self._key(puzzle)
+        moves = bytes(symmetry.directions[_DIRECTIONS.index(direction)] for direction in solution)
+        self._remember(key, moves)
+        self.stats.stores += 1
+        if self._connection is not None:
+            self._connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)", (key, moves, time.time()))
+            if self.disk_capacity is not None:
+                evicted = self._connection.execute(
+                    "DELETE FROM solutions WHERE key IN (SELECT key FROM solutions ORDER BY last_used DESC "
+                    "LIMIT -1 OFFSET ?)", (self.disk_capacity,)).rowcount
+                self.stats.disk_evictions += max(evicted, 0)
+            self._connection.commit()
+
+    def _remember(self, key: str, moves: bytes):
+        if self.capacity == 0:
+            return
+        self._memory[key] = moves
+        self._memory.move_to_end(key)
+        if self.capacity is not None:
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+                self.stats.evictions += 1
+
+    def __contains__(self, puzzle: NPuzzle | PackedNPuzzle) -> bool:
+        key, _ = self._key(puzzle)
+        if key in self._memory:
+            return True
+        return self._connection is not None and self._connection.execute(
+            "SELECT 1 FROM solutions WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        """Entries in the disk tier if there is one, otherwise in memory"""
+        if self._connection is not None:
+            return self._connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        return len(self._memory)
+
+    def clear(self):
+        self._memory.clear()
+        if self._connection is not None:
+            self._connection.execute("DELETE FROM solutions")
+            self._connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> SolutionCache:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CachedNPuzzleSolver(NPuzzleSolver):
+    """
+    Answers from the cache when it can and otherwise runs the wrapped solver, storing what it returns.
+    Solutions the wrapped solver does not know to be optimal, because it is not an optimal solver, uses a
+    heuristic that is not admissible or ran out of budget, are returned but never stored. hit tells whether the
+    last solve came from the cache.
+    """
+    def __init__(self, solver: NPuzzleSolver, cache: SolutionCache):
+        super().__init__(solver.puzzle, solver.budget)
+        self.solver = solver
+        self.cache = cache
+        self.hit = False
+
+    @property
+    def optimal(self) -> bool:
+        heuristic = getattr(self.solver, "heuristic", None)
+        return self.solver.optimal and (heuristic is None or heuristic.admissible)
+
+    def solution_is_optimal(self) -> bool:
+        return self.hit or self.solver.solution_is_optimal()
+
+    def solve(self) -> List[SlideDirection] | bool:
+        solution = self.cache.get(self.puzzle)
+        self.hit = solution is not None
+        if self.hit:
+            return solution
+        solution = self.solver.solve()
+        self.num_nodes_explored = self.solver.num_nodes_explored
+        self.budget_exhausted = self.solver.budget_exhausted
+        self.stats = self.solver.stats
+        if solution is not False and self.solver.solution_is_optimal():
+            self.cache.put(self.puzzle, solution)
+        return solution
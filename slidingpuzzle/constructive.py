@@ -0,0 +1,290 @@
+"""
+A constructive solver for boards far too large to search. It places tiles one at a time: every row but the
+last two from the top, then the last two rows column by column from the left, each time moving a tile along
+a shortest path of free cells with the blank brought round in front of it, and the last two tiles of a line
+with the usual two-move macro. The final 2x2 block is rotated into place. Moves grow with the cube of the
+width and the work with them, so a 20x20 board takes a fraction of a second, but solutions are several times
+longer than optimal. Post-processing cancels slides that undo each other and can replace short windows of the
+solution with optimal ones found by IDA* on the few cells the window touches.
+"""
+from __future__ import annotations
+import time
+from collections import deque
+from typing import List, Optional, Sequence, Set
+from .general import IDAStarSlidingPuzzleSolver
+from .instrumentation import Instrumentation
+from .puzzle import NPuzzle, PackedNPuzzle, SlideDirection, SlidingPuzzle
+from .solver import ManhattanHeuristic, NPuzzleSolver, SearchBudget, instrumented
+
+
+class _Board:
+    """
+    Tiles labeled by their target cell, with the blank's target the bottom-right corner, and the slides made
+    so far as the offsets the blank moved by
+    """
+    def __init__(self, width: int, labels: List[int]):
+        self.width = width
+        self.cells = labels
+        self.where = [0] * len(labels)
+        for cell, label in enumerate(labels):
+            self.where[label] = cell
+        self.blank_label = len(labels) - 1
+        self.locked = bytearray(len(labels))
+        self.offsets: List[int] = []
+        self.neighbors = []
+        for cell in range(len(labels)):
+            row, col = divmod(cell, width)
+            self.neighbors.append([cell + delta for delta, inside in ((-width, row > 0), (width, row < width - 1),
+                                                                      (-1, col > 0), (1, col < width - 1)) if inside])
+
+    @property
+    def blank(self) -> int:
+        return self.where[self.blank_label]
+
+    def step(self, cell: int):
+        """Slide the tile in cell, a neighbor of the blank, into the blank"""
+        blank = self.where[self.blank_label]
+        label = self.cells[cell]
+        self.cells[blank], self.where[label] = label, blank
+        self.cells[cell], self.where[self.blank_label] = self.blank_label, cell
+        self.offsets.append(cell - blank)
+
+    def path(self, source: int, target: int | Set[int], avoid: int = -1) -> List[int]:
+        """Cells of a shortest path through unlocked cells other than avoid to target, or the nearest of a set"""
+        targets = target if isinstance(target, set) else {target}
+        if source in targets:
+            return []
+        came_from = {source: source}
+        frontier = deque([source])
+        locked, neighbors = self.locked, self.neighbors
+        while frontier:
+            cell = frontier.popleft()
+            for neighbor in neighbors[cell]:
+                if neighbor in came_from or locked[neighbor] or neighbor == avoid:
+                    continue
+                came_from[neighbor] = cell
+                if neighbor in targets:
+                    path = [neighbor]
+                    while came_from[path[-1]] != source:
+                        path.append(came_from[path[-1]])
+                    path.reverse()
+                    return path
+                frontier.append(neighbor)
+        raise RuntimeError(f"no free path from cell {source} to cell {target}")
+
+    def move_blank(self, target: int | Set[int], avoid: int = -1):
+        for cell in self.path(self.blank, target, avoid):
+            self.step(cell)
+
+    def move_tile(self, label: int, target: int):
+        """Bring a tile to target along a shortest free path, leaving the blank where the tile last was"""
+        for cell in self.path(self.where[label], target):
+            tile_cell = self.where[label]
+            self.move_blank(cell, avoid=tile_cell)
+            self.step(tile_cell)
+
+    def place_line_end(self, first: int, second: int, outside: int):
+        """
+        Place the tiles of the last two cells of a row or column, first and second, where outside is the free
+        neighbor of second beyond the line: first goes to second, second to outside, then the blank comes in
+        at first and two slides bring both home.
+        """
+        if self.cells[first] == first and self.cells[second] == second:
+            self.locked[first] = self.locked[second] = 1
+            return
+        across = outside - second
+        block = [first, second, first + across, second + across, first + 2 * across, second + 2 * across]
+        self.move_tile(first, second)
+        if self.where[second] in block:
+            # the second tile may be caught in first, which has become a dead end, so the two tiles are
+            # placed together once the blank has joined them in the block
+            self.locked[second] = self.locked[self.where[second]] = 1
+            self.move_blank({cell for cell in block if not self.locked[cell]})
+            self.locked[second] = self.locked[self.where[second]] = 0
+            self._place_pair(block)
+        else:
+            self.locked[second] = 1
+            self.move_tile(second, outside)
+            self.locked[outside] = 1
+            self.move_blank(first)
+            self.step(second)
+            self.step(outside)
+            self.locked[outside] = 0
+        self.locked[first] = self.locked[second] = 1
+
+    def _place_pair(self, block: List[int]):
+        """
+        Bring the tiles of the first two cells of block, a 3x2 block holding both and the blank, home by a
+        breadth-first search over the positions of the two tiles and the blank within the block
+        """
+        first, second = block[:2]
+        inside = set(block)
+        start = (self.where[first], self.where[second], self.blank)
+        came_from = {start: None}
+        frontier = deque([start])
+        while frontier:
+            state = frontier.popleft()
+            if state[0] == first and state[1] == second:
+                break
+            tile_a, tile_b, blank = state
+            for cell in self.neighbors[blank]:
+                if cell not in inside:
+                    continue
+                child = (blank if tile_a == cell else tile_a, blank if tile_b == cell else tile_b, cell)
+                if child not in came_from:
+                    came_from[child] = state
+                    frontier.append(child)
+        path = []
+        while came_from[state] is not None:
+            path.append(state[2])
+            state = came_from[state]
+        for cell in reversed(path):
+            self.step(cell)
+
+    def solve(self):
+        width = self.width
+        for row in range(width - 2):
+            for col in range(width - 2):
+                cell = row * width + col
+                self.move_tile(cell, cell)
+                self.locked[cell] = 1
+            end = row * width + width - 1
+            self.place_line_end(end - 1, end, end + width)
+        for col in range(width - 2):
+            top = (width - 2) * width + col
+            # the column's two cells are placed like a row end, with the roles of rows and columns swapped
+            self.place_line_end(top + width, top, top + 1)
+        corner = width * width - 1
+        self.move_blank(corner)
+        # rotating the blank around the last 2x2 block cycles its three tiles
+        cycle = (corner - width, corner - width - 1, corner - 1, corner)
+        for _ in range(3):
+            if all(self.cells[cell] == cell for cell in cycle):
+                break
+            for cell in cycle:
+                self.step(cell)
+        assert all(self.cells[cell] == cell for cell in cycle), "the board cannot reach the solution"
+
+
+def cancel_inverses(directions: Sequence[SlideDirection]) -> List[SlideDirection]:
+    """Remove every slide that is immediately undone, repeatedly"""
+    kept: List[SlideDirection] = []
+    for direction in directions:
+        if kept and kept[-1] == direction.inverse:
+            kept.pop()
+        else:
+            kept.append(direction)
+    return kept
+
+
+class ConstructiveNPuzzleSolver(NPuzzleSolver):
+    """
+    Solves NPuzzles of any width in polynomial time, for boards too large for search. window is the number
+    of slides in each stretch of the solution that IDA* tries to shorten, 0 to skip that step; a stretch is
+    only re-solved when the blank stays within window_cells cells, and each try expands at most window_nodes
+    nodes. A budget's time limit ends the re-solving early.
+    """
+    optimal = False
+
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, cancel_inverses: bool = True, window: int = 0,
+                 window_cells: int = 12, window_nodes: int = 20000, budget: Optional[SearchBudget] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        self.cancel_inverses = cancel_inverses
+        self.window = window
+        self.window_cells = window_cells
+        self.window_nodes = window_nodes
+        self.constructed_length = 0
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        puzzle = self.puzzle.to_npuzzle() if isinstance(self.puzzle, PackedNPuzzle) else self.puzzle
+        if not puzzle.is_solvable():
+            return False
+        self._start_budget()
+        width = puzzle.n_cols
+        if puzzle.is_solved():
+            return []
+        directions = {1: SlideDirection.LEFT, -1: SlideDirection.RIGHT,
+                      width: SlideDirection.UP, -width: SlideDirection.DOWN}
+
+        # solve towards the goal with the blank walked to the bottom-right corner, then walk it back
+        target = list(puzzle.solution)
+        walk = [target.index(0)]
+        while walk[-1] // width < width - 1:
+            walk.append(walk[-1] + width)
+        while walk[-1] % width < width - 1:
+            walk.append(walk[-1] + 1)
+        for cell, next_cell in zip(walk, walk[1:]):
+            target[cell], target[next_cell] = target[next_cell], target[cell]
+        goal_cell = [0] * len(target)
+        for cell, tile in enumerate(target):
+            goal_cell[tile] = cell
+
+        board = _Board(width, [goal_cell[tile] for tile in puzzle.placements])
+        board.solve()
+        offsets = board.offsets + [cell - next_cell for cell, next_cell in zip(walk[-2::-1], walk[:0:-1])]
+        solution = [directions[offset] for offset in offsets]
+        self.num_nodes_explored = len(solution)
+        self.constructed_length = len(solution)
+        if self.cancel_inverses:
+            solution = cancel_inverses(solution)
+        if self.window:
+            for start in (0, self.window // 2):
+                solution = self._shorten_windows(puzzle, solution, start)
+                if self.cancel_inverses:
+                    solution = cancel_inverses(solution)
+        return solution
+
+    def _shorten_windows(self, puzzle: NPuzzle, solution: List[SlideDirection], start: int) -> List[SlideDirection]:
+        """Try to shorten every window of the solution after its first start slides"""
+        width = puzzle.n_cols
+        placements = list(puzzle.placements)
+        blank = placements.index(0)
+        shortened = []
+        windows = [solution[:start]] + [solution[begin:begin + self.window]
+                                       for begin in range(start, len(solution), self.window)]
+        for index, window in enumerate(windows):
+            if index and (self._deadline is None or time.monotonic() < self._deadline):
+                window = self._shorten(placements, blank, width, window)
+            for direction in window:
+                delta_row, delta_col = direction.value
+                cell = blank + delta_row * width + delta_col
+                placements[blank], placements[cell] = placements[cell], 0
+                blank = cell
+            shortened.extend(window)
+        return shortened
+
+    def _shorten(self, placements: List[int], blank: int, width: int,
+                 window: List[SlideDirection]) -> List[SlideDirection]:
+        """An optimal replacement for the window within the cells its blank visits, if that is shorter"""
+        rows, cols = [blank // width], [blank % width]
+        for direction in window:
+            rows.append(rows[-1] + direction.value[0])
+            cols.append(cols[-1] + direction.value[1])
+        top, left = min(rows), min(cols)
+        n_rows, n_cols = max(rows) - top + 1, max(cols) - left + 1
+        if len(window) < 4 or n_rows < 2 or n_cols < 2 or n_rows * n_cols > self.window_cells:
+            return window
+        cells = [(top + row) * width + left + col for row in range(n_rows) for col in range(n_cols)]
+        before = [placements[cell] for cell in cells]
+        after = list(before)
+        local = (rows[0] - top) * n_cols + cols[0] - left
+        for direction in window:
+            cell = local + direction.value[0] * n_cols + direction.value[1]
+            after[local], after[cell] = after[cell], 0
+            local = cell
+        if before == after:
+            return []
+        # relabel the tiles by their place at the end of the window, keeping 0 for the blank
+        labels = {0: 0}
+        for tile in after:
+            labels.setdefault(tile, len(labels))
+        box = SlidingPuzzle(n_rows, n_cols, [labels[tile] for tile in before], [labels[tile] for tile in after])
+        solver = IDAStarSlidingPuzzleSolver(box, ManhattanHeuristic(), SearchBudget(max_nodes=self.window_nodes))
+        actions = solver.solve()
+        self.num_nodes_explored += solver.num_nodes_explored
+        if actions is False or len(actions) >= len(window):
+            return window
+        return [SlideDirection((action.start_row - action.end_row, action.start_col - action.end_col))
+                for action in actions]
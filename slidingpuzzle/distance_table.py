@@ -0,0 +1,236 @@
+from __future__ import annotations
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from .puzzle import NPuzzle, PackedNPuzzle, SlideDirection, blank_move_table
+from .ranking import lehmer_rank_and_parity, lehmer_unrank
+from .instrumentation import Instrumentation
+from .solver import NPuzzleHeuristic, NPuzzleSolver, PuzzleNode, SearchBudget, instrumented
+from .walking_distance import DEFAULT_CACHE_DIR
+
+MAGIC = b"SPDT"
+UNREACHED = 255
+
+#: widest board a complete table is built for; 4x4 would need 16!/2 bytes, about 10 TB
+MAX_TABLE_WIDTH = 3
+
+_tables: Dict[Tuple[int, int], "DistanceTable"] = {}
+
+
+class DistanceTable:
+    """
+    Optimal distance of every solvable board of a small N-puzzle (181,440 boards for 3x3), one byte per board.
+
+    Boards are relabelled by the goal cell of each tile, so one table serves every solution that puts the blank
+    in the same cell. A board's index is its blank cell times m!/2 plus half the Lehmer rank of its m tile labels:
+    the two boards whose ranks differ only in the last bit have opposite parity, and exactly one is solvable.
+    """
+    def __init__(self, width: int, blank_goal: int, table, build_seconds: float = 0.0, path: Optional[str] = None):
+        self.width = width
+        self.blank_goal = blank_goal
+        self.table = table
+        self.build_seconds = build_seconds
+        self.path = path
+        self.half_size = math.factorial(width * width - 1) // 2
+        self._labels: Dict[Tuple[int, ...], List[int]] = {}
+
+    @classmethod
+    def build(cls, width: int = 3, blank_goal: int = 0) -> DistanceTable:
+        """Retrograde breadth-first search from the goal over every reachable board"""
+        assert width <= MAX_TABLE_WIDTH, f"distance tables only cover boards up to {MAX_TABLE_WIDTH}x{MAX_TABLE_WIDTH}"
+        start_time = time.perf_counter()
+        n = width * width
+        neighbors = [[targets[blank] for targets in blank_move_table(width).values() if targets[blank] >= 0]
+                     for blank in range(n)]
+        # in label space the goal holds label i in cell i, and the blank is labelled -1
+        goal = tuple(-1 if index == blank_goal else index for index in range(n))
+        distances = {goal: 0}
+        frontier = [(goal, blank_goal)]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for board, blank in frontier:
+                for cell in neighbors[blank]:
+                    child = list(board)
+                    child[blank], child[cell] = child[cell], -1
+                    child = tuple(child)
+                    if child not in distances:
+                        distances[child] = depth
+                        next_frontier.append((child, cell))
+            frontier = next_frontier
+
+        table = cls(width, blank_goal, None)
+        table.table = bytearray([UNREACHED]) * (n * table.half_size)
+        for board, distance in distances.items():
+            table.table[table._index_labels(board)] = distance
+        table.build_seconds = time.perf_counter() - start_time
+        return table
+
+    def _index_labels(self, labels: Sequence[int]) -> int:
+        blank = labels.index(-1)
+        blank_goal = self.blank_goal
+        rank, parity = lehmer_rank_and_parity([label - (label > blank_goal) for label in labels if label >= 0])
+        # a vertical slide changes the parity of the tiles only when the width is even
+        if parity != (blank // self.width - blank_goal // self.width) * (self.width + 1) % 2:
+            return -1
+        return blank * self.half_size + rank // 2
+
+    def index(self, placements: Sequence[int], solution: Sequence[int]) -> int:
+        """Position of the board in the table, or -1 when it cannot reach the solution"""
+        key = tuple(solution)
+        if key not in self._labels:
+            assert key.index(0) == self.blank_goal, "solution puts the blank in a different cell than this table"
+            labels = [0] * len(key)
+            for cell, tile in enumerate(key):
+                labels[tile] = cell
+            labels[0] = -1
+            self._labels[key] = labels
+        labels = self._labels[key]
+        return self._index_labels([labels[tile] for tile in placements])
+
+    def placements(self, index: int, solution: Sequence[int]) -> List[int]:
+        """The board at a position of the table, the inverse of index"""
+        n = self.width * self.width
+        blank, half_rank = divmod(index, self.half_size)
+        for rank in (2 * half_rank, 2 * half_rank + 1):
+            labels = [label + (label >= self.blank_goal) for label in lehmer_unrank(rank, n - 1)]
+            labels.insert(blank, -1)
+            if self._index_labels(labels) == index:
+                return [0 if label < 0 else solution[label] for label in labels]
+        raise ValueError(f"{index} is not a position of this table")
+
+    def distance(self, puzzle: NPuzzle | PackedNPuzzle) -> int:
+        """Optimal number of slides to solve the puzzle, or UNREACHED if it is unsolvable"""
+        index = self.index(puzzle.placements, puzzle.solution)
+        return self.table[index] if index >= 0 else UNREACHED
+
+    def solve(self, puzzle: NPuzzle | PackedNPuzzle) -> List[SlideDirection] | bool:
+        """An optimal solution found by always sliding to a neighbor one step closer to the goal"""
+        placements = list(puzzle.placements)
+        solution = puzzle.solution
+        distance = self.distance(puzzle)
+        if distance == UNREACHED:
+            return False
+        moves = blank_move_table(self.width)
+        blank = placements.index(0)
+        path = []
+        while distance > 0:
+            for direction, targets in moves.items():
+                start = targets[blank]
+                if start < 0:
+                    continue
+                placements[blank], placements[start] = placements[start], 0
+                if self.table[self.index(placements, solution)] == distance - 1:
+                    path.append(direction)
+                    blank = start
+                    distance -= 1
+                    break
+                placements[start], placements[blank] = placements[blank], 0
+        return path
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.table)
+
+    def save(self, path: str):
+        """Write the table next to path and move it into place, so readers never see a partial file"""
+        partial = f"{path}.{os.getpid()}.partial"
+        with open(partial, "wb") as f:
+            f.write(struct.pack("<4sBB", MAGIC, self.width, self.blank_goal))
+            f.write(self.table)
+        os.replace(partial, path)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str) -> DistanceTable:
+        header = struct.calcsize("<4sBB")
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < header:
+                raise ValueError(f"{path} has a truncated table")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, width, blank_goal = struct.unpack_from("<4sBB", mapped)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a distance table")
+        if width > MAX_TABLE_WIDTH or size != header + width * width * math.factorial(width * width - 1) // 2:
+            raise ValueError(f"{path} has a truncated table")
+        return cls(width, blank_goal, memoryview(mapped)[header:], path=path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["table"] = None if self.path else bytes(self.table)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.table is None:
+            self.table = DistanceTable.load(self.path).table
+
+
+def get_distance_table(width: int, blank_goal: int, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> DistanceTable:
+    """
+    Table for the width and goal cell of the blank, built once and memory-mapped from the cache afterwards.
+
+    Processes that find the cache cold may all build the table at once. Each writes its own file and moves it into
+    place, and a process that finishes after another has already done so uses the file that is there, so a reader
+    only ever maps a complete table. A cached file that is damaged is rebuilt.
+    """
+    assert width <= MAX_TABLE_WIDTH, f"distance tables only cover boards up to {MAX_TABLE_WIDTH}x{MAX_TABLE_WIDTH}"
+    key = (width, blank_goal)
+    if key not in _tables:
+        path = os.path.join(cache_dir, f"distances_{width}_{blank_goal}.bin") if cache_dir else None
+        table = _load_cached(path, width, blank_goal) if path else None
+        if table is None:
+            table = DistanceTable.build(width, blank_goal)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                # another process may have finished the same table while this one was building it
+                cached = _load_cached(path, width, blank_goal)
+                if cached is None:
+                    table.save(path)
+                    cached = DistanceTable.load(path)
+                table = cached
+        _tables[key] = table
+    return _tables[key]
+
+
+def _load_cached(path: str, width: int, blank_goal: int) -> Optional[DistanceTable]:
+    """The table cached at path, or None when there is none or it is damaged or for another board"""
+    if not os.path.exists(path):
+        return None
+    try:
+        table = DistanceTable.load(path)
+    except (OSError, ValueError):
+        return None
+    return table if (table.width, table.blank_goal) == (width, blank_goal) else None
+
+
+class DistanceTableHeuristic(NPuzzleHeuristic):
+    """The exact distance, read from a complete distance table"""
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def h(self, node: PuzzleNode) -> int:
+        puzzle = node.puzzle
+        return get_distance_table(puzzle.n_cols, list(puzzle.solution).index(0), self.cache_dir).distance(puzzle)
+
+
+class DistanceTableNPuzzleSolver(NPuzzleSolver):
+    """Solves small puzzles without search by descending a complete distance table"""
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, table: Optional[DistanceTable] = None,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, budget: Optional[SearchBudget] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        assert table is None or table.width == puzzle.n_cols, "the table is for another width"
+        self.table = table or get_distance_table(puzzle.n_cols, list(puzzle.solution).index(0), cache_dir)
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        solution = self.table.solve(self.puzzle)
+        if solution is not False:
+            self.num_nodes_explored = len(solution) + 1
+        return solution
@@ -0,0 +1,304 @@
+"""
+Breadth-first search of a whole state space layer by layer on disk, for spaces whose reached set does not fit in
+memory. It yields the number of boards at every distance from the solution, the radius profile, and
+distance tables of rectangular boards.
+
+Boards are packed as in PackedSlidingPuzzle into unsigned 64-bit integers, which covers every board up to 4x4,
+and any number of blanks. Each layer is a file of sorted, distinct states. The next one is made by expanding
+the layer in chunks, writing each chunk's children as a sorted run, then merging the runs in one streaming
+pass that removes duplicates and every state of the previous two layers, which hold all the boards a child of
+the layer can have been reached by before. With bitmap set, a 2-bit entry per single-blank board in memory
+(unseen, or the depth modulo 3 plus one) removes the duplicates instead and the merge only unites the runs.
+
+Progress is checkpointed to progress.json after every layer, so an interrupted search resumes after the last
+finished layer.
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import shutil
+from typing import List, Optional, Sequence
+from .moves import legal_moves
+from .puzzle import PackedSlidingPuzzle
+from .ranking import batch_lehmer_rank
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+PROGRESS = "progress.json"
+UNREACHED = 255
+
+
+def layer_filename(depth: int) -> str:
+    return f"layer-{depth:03d}.bin"
+
+
+def _read_states(path: str) -> np.ndarray:
+    """A sorted state file as a read-only memory map, or an empty array"""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint64)
+    return np.memmap(path, dtype=np.uint64, mode="r")
+
+
+def _sorted_unique(states: np.ndarray) -> np.ndarray:
+    # sorting beats np.unique, which hashes large integer arrays first
+    states = np.sort(states)
+    if len(states) > 1:
+        states = states[np.concatenate(([True], states[1:] != states[:-1]))]
+    return states
+
+
+class ExternalBFS:
+    """
+    Layered BFS from solution over every board of n_rows x n_cols with the same tiles, stored in directory.
+    chunk_size bounds the number of states expanded or merged at once, which with the bitmap sets the
+    memory use. keep_layers=False deletes layers once they are no longer needed to remove duplicates;
+    distance tables need them all.
+    """
+    def __init__(self, n_rows: int, n_cols: int, directory: str, solution: Optional[Sequence[int]] = None,
+                 chunk_size: int = 1 << 20, bitmap: bool = False, keep_layers: bool = True):
+        if np is None:
+            raise ImportError("NumPy is required for ExternalBFS")
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.cells = n_rows * n_cols
+        self.solution = list(solution) if solution is not None else list(range(self.cells))
+        assert len(self.solution) == self.cells, "solution must have one entry per cell"
+        self.bits = PackedSlidingPuzzle.bits_per_cell(self.solution)
+        assert self.bits * self.cells <= 64, "boards must pack into 64 bits"
+        assert not bitmap or sorted(self.solution) == list(range(self.cells)), "the bitmap needs a single blank"
+        assert chunk_size > 0, "chunk_size must be positive"
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.bitmap = bitmap
+        self.keep_layers = keep_layers
+        self.counts: List[int] = []
+        self.complete = False
+        self._shifts = [np.uint64(cell * self.bits) for cell in range(self.cells)]
+        self._mask = np.uint64((1 << self.bits) - 1)
+        self._marks = None
+
+    @property
+    def radius(self) -> int:
+        """Largest distance of a board from the solution, once the search is complete"""
+        return len(self.counts) - 1
+
+    @property
+    def num_states(self) -> int:
+        return sum(self.counts)
+
+    def _parameters(self) -> dict:
+        return {"n_rows": self.n_rows, "n_cols": self.n_cols, "solution": self.solution}
+
+    def _save_progress(self):
+        path = os.path.join(self.directory, PROGRESS)
+        with open(path + ".partial", "w") as f:
+            json.dump({**self._parameters(), "counts": self.counts, "complete": self.complete,
+                       "keep_layers": self.keep_layers}, f, indent=1)
+        os.replace(path + ".partial", path)
+
+    def _load_progress(self):
+        path = os.path.join(self.directory, PROGRESS)
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            progress = json.load(f)
+        if any(progress[key] != value for key, value in self._parameters().items()):
+            raise ValueError(f"{self.directory} holds a search of a different board")
+        self.counts = progress["counts"]
+        self.complete = progress["complete"]
+        self.keep_layers = self.keep_layers and progress["keep_layers"]
+
+    def layer(self, depth: int) -> np.ndarray:
+        """The sorted packed states at a distance, memory-mapped"""
+        return _read_states(os.path.join(self.directory, layer_filename(depth)))
+
+    def placements(self, states: np.ndarray) -> np.ndarray:
+        """(m, cells) placements of packed states"""
+        states = np.asarray(states, dtype=np.uint64)
+        return np.stack([(states >> shift) & self._mask for shift in self._shifts], axis=1).astype(np.int64)
+
+    def _expand(self, states: np.ndarray) -> np.ndarray:
+        """Every child of the states, unsorted and with repeats"""
+        shifts, mask = self._shifts, self._mask
+        children = []
+        for blank, moves in enumerate(legal_moves(self.n_rows, self.n_cols)):
+            parents = states[((states >> shifts[blank]) & mask) == 0]
+            if not len(parents):
+                continue
+            for _, start in moves:
+                tiles = (parents >> shifts[start]) & mask
+                # with several blanks, sliding a blank into a blank is not a move
+                moving = tiles != 0
+                children.append(parents[moving] ^ (tiles[moving] << shifts[start]) ^ (tiles[moving] << shifts[blank]))
+        return np.concatenate(children) if children else np.empty(0, dtype=np.uint64)
+
+    def _ranks(self, states: np.ndarray) -> np.ndarray:
+        return batch_lehmer_rank(self.placements(states))
+
+    def _mark(self, states: np.ndarray, depth: int):
+        ranks = self._ranks(states)
+        shifts = ((ranks & 3) * 2).astype(np.uint8)
+        np.bitwise_and.at(self._marks, ranks >> 2, ~(np.uint8(3) << shifts))
+        np.bitwise_or.at(self._marks, ranks >> 2, np.uint8(depth % 3 + 1) << shifts)
+
+    def _unseen(self, states: np.ndarray) -> np.ndarray:
+        ranks = self._ranks(states)
+        return states[(self._marks[ranks >> 2] >> ((ranks & 3) * 2).astype(np.uint8)) & 3 == 0]
+
+    def _write(self, path: str, states: np.ndarray):
+        with open(path, "wb") as f:
+            f.write(states.astype(np.uint64).tobytes())
+
+    def _merge(self, runs: List[str], excluded: List[np.ndarray], path: str) -> int:
+        """Merge sorted runs into path without repeats or states of the excluded layers, returning the count"""
+        sources = [_read_states(run) for run in runs]
+        positions = [0] * len(sources)
+        excluded_positions = [0] * len(excluded)
+        count = 0
+        with open(path, "wb") as f:
+            while True:
+                live = [index for index, source in enumerate(sources) if positions[index] < len(source)]
+                if not live:
+                    break
+                # every state up to the smallest chunk end is known, so it can be written out
+                bound = min(sources[index][min(positions[index] + self.chunk_size, len(sources[index])) - 1]
+                            for index in live)
+                parts = []
+                for index in live:
+                    source, position = sources[index], positions[index]
+                    end = position + int(np.searchsorted(source[position:position + self.chunk_size], bound, "right"))
+                    parts.append(source[position:end])
+                    positions[index] = end
+                merged = _sorted_unique(np.concatenate(parts))
+                for index, layer in enumerate(excluded):
+                    begin = excluded_positions[index]
+                    end = begin + int(np.searchsorted(layer[begin:], bound, "right"))
+                    if end > begin:
+                        merged = self._drop_known(merged, layer, begin, end)
+                    excluded_positions[index] = end
+                f.write(merged.tobytes())
+                count += len(merged)
+        return count
+
+    def _drop_known(self, merged: np.ndarray, layer: np.ndarray, begin: int, end: int) -> np.ndarray:
+        """
+        Sorted states without those in layer[begin:end], which is read chunk_size states at a time, since it
+        can be most of a layer when merged is small
+        """
+        keep = np.ones(len(merged), dtype=bool)
+        for start in range(begin, end, self.chunk_size):
+            known = layer[start:min(start + self.chunk_size, end)]
+            low = int(np.searchsorted(merged, known[0], "left"))
+            high = int(np.searchsorted(merged, known[-1], "right"))
+            if high > low:
+                window = merged[low:high]
+                found = np.minimum(np.searchsorted(known, window), len(known) - 1)
+                keep[low:high] &= known[found] != window
+        return merged[keep]
+
+    def _rebuild_marks(self):
+        self._marks = np.zeros((math.factorial(self.cells) + 3) // 4, dtype=np.uint8)
+        # children of the next layer to expand can only be in it or the one before
+        for depth in range(max(0, len(self.counts) - 2), len(self.counts)):
+            layer = self.layer(depth)
+            for begin in range(0, len(layer), self.chunk_size):
+                self._mark(np.array(layer[begin:begin + self.chunk_size]), depth)
+
+    def run(self, max_depth: Optional[int] = None) -> List[int]:
+        """Search until every board is reached or through max_depth, resuming a checkpoint; returns counts"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_progress()
+        if not self.counts:
+            goal = PackedSlidingPuzzle.from_placements(self.n_rows, self.n_cols, self.solution, self.solution).goal
+            self._write(os.path.join(self.directory, layer_filename(0)), np.array([goal], dtype=np.uint64))
+            self.counts = [1]
+            self._save_progress()
+        if self.bitmap and not self.complete:
+            self._rebuild_marks()
+        runs_directory = os.path.join(self.directory, "runs")
+
+        while not self.complete and (max_depth is None or len(self.counts) <= max_depth):
+            depth = len(self.counts) - 1
+            shutil.rmtree(runs_directory, ignore_errors=True)
+            os.makedirs(runs_directory)
+            runs = []
+            layer = self.layer(depth)
+            for begin in range(0, len(layer), self.chunk_size):
+                children = _sorted_unique(self._expand(np.array(layer[begin:begin + self.chunk_size])))
+                if self.bitmap:
+                    children = self._unseen(children)
+                    self._mark(children, depth + 1)
+                if len(children):
+                    runs.append(os.path.join(runs_directory, f"run-{len(runs):06d}.bin"))
+                    self._write(runs[-1], children)
+
+            path = os.path.join(self.directory, layer_filename(depth + 1))
+            excluded = [] if self.bitmap else [self.layer(previous) for previous in range(max(0, depth - 1), depth + 1)]
+            count = self._merge(runs, excluded, path + ".partial")
+            shutil.rmtree(runs_directory)
+            if count:
+                os.replace(path + ".partial", path)
+                self.counts.append(count)
+            else:
+                os.remove(path + ".partial")
+                self.complete = True
+            if not self.keep_layers and depth >= 1:
+                os.remove(os.path.join(self.directory, layer_filename(depth - 1)))
+            self._save_progress()
+        if self.complete:
+            self._marks = None
+        return self.counts
+
+    def distance_table(self, path: Optional[str] = None) -> np.ndarray:
+        """
+        The distance of every single-blank board indexed by the Lehmer rank of its placements, UNREACHED for
+        boards that cannot reach the solution. It has cells! bytes and is written to path as a memory map if
+        given.
+        """
+        assert self.complete and self.keep_layers, "distance tables need a complete search with every layer kept"
+        assert sorted(self.solution) == list(range(self.cells)), "distance tables need a single blank"
+        size = math.factorial(self.cells)
+        if path is None:
+            table = np.full(size, UNREACHED, dtype=np.uint8)
+        else:
+            table = np.memmap(path, dtype=np.uint8, mode="w+", shape=(size,))
+            table[:] = UNREACHED
+        for depth in range(len(self.counts)):
+            layer = self.layer(depth)
+            for begin in range(0, len(layer), self.chunk_size):
+                table[self._ranks(np.array(layer[begin:begin + self.chunk_size]))] = depth
+        if path is not None:
+            table.flush()
+        return table
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Breadth-first search of a whole sliding puzzle state space on disk")
+    parser.add_argument("directory", help="where to keep the layers and checkpoint")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("--solution", type=int, nargs="*", help="goal placements, defaults to 0 1 2 ...")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20)
+    parser.add_argument("--bitmap", action="store_true", help="remove duplicates with a 2-bit in-memory bitmap")
+    parser.add_argument("--discard-layers", action="store_true", help="delete layers no longer needed")
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--distance-table", help="write the distances, indexed by Lehmer rank, to this file")
+    args = parser.parse_args(argv)
+
+    search = ExternalBFS(args.rows, args.cols, args.directory, args.solution, args.chunk_size, args.bitmap,
+                         not args.discard_layers)
+    for depth, count in enumerate(search.run(args.max_depth)):
+        print(f"{depth} {count}")
+    print(f"{search.num_states} boards, radius {search.radius}" if search.complete
+          else f"{search.num_states} boards through depth {search.radius}")
+    if args.distance_table:
+        search.distance_table(args.distance_table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Solvers for SlidingPuzzle boards of any shape with any number of blanks. They return the slides as Actions,
+since with several blanks a direction alone does not say which tile moves. States are packed integers with the
+blank cells kept as a bit mask, children come from the legal_moves tables, and ManhattanHeuristic and
+LinearConflictHeuristic work unchanged: blanks are never counted, and with k blanks every slide still moves a
+single tile by one cell, so both stay admissible.
+"""
+from __future__ import annotations
+import math
+from typing import List, Optional, Tuple
+from .instrumentation import Instrumentation
+from .moves import DIRECTIONS, MoveAutomaton, legal_moves, move_automaton
+from .puzzle import Action, PackedNPuzzle, PackedSlidingPuzzle, SlidingPuzzle
+from .solver import NPuzzleHeuristic, NPuzzleSolver, PuzzleNode, SearchBudget, _OutOfBudget, instrumented
+from .structures import BucketQueue, NodeStore
+
+
+class SlidingPuzzleSolver(NPuzzleSolver):
+    """
+    Base of the general solvers. Nodes are kept in a NodeStore whose blank entry is the cell the moved tile
+    came from, which is a blank of the child, and whose move is the direction from the old blank to that cell.
+    """
+    puzzle_types = (SlidingPuzzle, PackedSlidingPuzzle, PackedNPuzzle)
+
+    def _root(self) -> PackedSlidingPuzzle:
+        puzzle = self.puzzle
+        if isinstance(puzzle, PackedSlidingPuzzle):
+            return puzzle
+        if isinstance(puzzle, PackedNPuzzle):
+            puzzle = puzzle.to_npuzzle()
+        return PackedSlidingPuzzle.from_sliding_puzzle(puzzle)
+
+    def _store(self, root: PackedSlidingPuzzle) -> NodeStore:
+        self.nodes = NodeStore(PackedSlidingPuzzle.bits_per_cell(root.solution) * len(root))
+        self.nodes.add(root.state, 0, -1, 0, 0)
+        self._n_cols = root.n_cols
+        # the cell the tile moved to is its start cell minus the move's offset
+        self._offsets = [delta_row * root.n_cols + delta_col for delta_row, delta_col in
+                         (direction.value for direction in DIRECTIONS)]
+        return self.nodes
+
+    def _action(self, start: int, move: int) -> Action:
+        start_row, start_col = divmod(start, self._n_cols)
+        delta_row, delta_col = DIRECTIONS[move].value
+        return Action(start_row, start_col, start_row - delta_row, start_col - delta_col)
+
+    def _backtrack_solution_node(self) -> List[Action]:
+        nodes, index = self.nodes, self.solution_node
+        actions = []
+        while nodes.parents[index] >= 0:
+            actions.append(self._action(nodes.blanks[index], nodes.moves[index]))
+            index = nodes.parents[index]
+        actions.reverse()
+        return actions
+
+    def _last_move(self, index: int) -> Tuple[int, int]:
+        """(start, end) cells of the slide that made the node, or (-1, -1) for the root"""
+        nodes = self.nodes
+        if nodes.parents[index] < 0:
+            return -1, -1
+        start = nodes.blanks[index]
+        return start, start - self._offsets[nodes.moves[index]]
+
+
+def _blank_cells(blanks: int) -> List[int]:
+    cells = []
+    while blanks:
+        lowest = blanks & -blanks
+        cells.append(lowest.bit_length() - 1)
+        blanks ^= lowest
+    return cells
+
+
+class BFSSlidingPuzzleSolver(SlidingPuzzleSolver):
+    @instrumented
+    def solve(self) -> List[Action] | bool:
+        root = self._root()
+        nodes = self._store(root)
+        blank_masks = [root.blanks]
+        if root.is_solved():
+            self.solution_node = 0
+            return self._backtrack_solution_node()
+        bits = PackedSlidingPuzzle.bits_per_cell(root.solution)
+        mask = (1 << bits) - 1
+        moves = legal_moves(root.n_rows, root.n_cols)
+        states, g_values = nodes.states, nodes.g_values
+        reached = {root.state}
+        self._containers = [reached, blank_masks]
+        self._start_budget()
+        budgeted = self.budget is not None
+        instrumentation = self.instrumentation
+        instrumented = instrumentation is not None
+        current = 0
+        while current < len(nodes):
+            state, blanks, g = states[current], blank_masks[current], g_values[current]
+            self.num_nodes_explored += 1
+            if budgeted and self._out_of_budget():
+                return False
+            if instrumented:
+                instrumentation.expand(state, g, 0, len(nodes) - current, current)
+            previous_start, previous_end = self._last_move(current)
+            for blank in _blank_cells(blanks):
+                for move, start in moves[blank]:
+                    if blanks >> start & 1 or (start == previous_end and blank == previous_start):
+                        continue
+                    tile = (state >> (start * bits)) & mask
+                    child = state ^ (tile << (start * bits)) ^ (tile << (blank * bits))
+                    if child in reached:
+                        if instrumented:
+                            instrumentation.duplicate(child, g + 1)
+                        continue
+                    reached.add(child)
+                    index = nodes.add(child, start, current, move, g + 1)
+                    blank_masks.append(blanks ^ (1 << blank) ^ (1 << start))
+                    if instrumented:
+                        instrumentation.generate(child, g + 1, 0)
+                    if child == root.goal:
+                        self.solution_node = index
+                        return self._backtrack_solution_node()
+            current += 1
+        return False
+
+
+class AStarSlidingPuzzleSolver(SlidingPuzzleSolver):
+    """A* over a BucketQueue open list, so the heuristic must return non-negative integers"""
+    def __init__(self, puzzle: SlidingPuzzle | PackedSlidingPuzzle, heuristic: NPuzzleHeuristic,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        self.heuristic = heuristic
+
+    @instrumented
+    def solve(self) -> List[Action] | bool:
+        root = self._root()
+        nodes = self._store(root)
+        blank_masks = [root.blanks]
+        n_rows, n_cols, goal, solution = root.n_rows, root.n_cols, root.goal, root.solution
+        bits = PackedSlidingPuzzle.bits_per_cell(solution)
+        mask = (1 << bits) - 1
+        unvisited = BucketQueue()
+        unvisited.push(self.heuristic.h(PuzzleNode(root, [], [], None, None)), 0, 0)
+        g_score = {root.state: 0}
+        visited = set()
+        self._containers = [g_score, visited, unvisited, blank_masks]
+
+        incremental = self.heuristic.incremental
+        moves = legal_moves(n_rows, n_cols)
+        states = nodes.states
+        self._start_budget()
+        budgeted = self.budget is not None
+        instrumentation = self.instrumentation
+        instrumented = instrumentation is not None
+        while unvisited:
+            f, g, current = unvisited.pop()
+            state = states[current]
+            if g > g_score[state] or state in visited:
+                continue
+            h = f - g
+            self.num_nodes_explored += 1
+            if budgeted and self._out_of_budget():
+                return False
+            if state == goal:
+                self.solution_node = current
+                return self._backtrack_solution_node()
+            visited.add(state)
+            if instrumented:
+                instrumentation.expand(state, g, h, len(unvisited), len(visited))
+
+            blanks, child_g = blank_masks[current], g + 1
+            previous_start, previous_end = self._last_move(current)
+            for blank in _blank_cells(blanks):
+                for move, start in moves[blank]:
+                    if blanks >> start & 1 or (start == previous_end and blank == previous_start):
+                        continue
+                    tile = (state >> (start * bits)) & mask
+                    child = state ^ (tile << (start * bits)) ^ (tile << (blank * bits))
+                    if child in visited or child_g >= g_score.get(child, math.inf):
+                        if instrumented:
+                            instrumentation.duplicate(child, child_g)
+                        continue
+                    g_score[child] = child_g
+                    child_blanks = blanks ^ (1 << blank) ^ (1 << start)
+                    index = nodes.add(child, start, current, move, child_g)
+                    blank_masks.append(child_blanks)
+                    child_puzzle = PackedSlidingPuzzle(n_rows, n_cols, child, child_blanks, goal, solution)
+                    if incremental:
+                        child_h = h + self.heuristic.h_delta(child_puzzle, tile, start, blank)
+                    else:
+                        child_h = self.heuristic.h(PuzzleNode(child_puzzle, [], [], None, self._action(start, move)))
+                    unvisited.push(child_g + child_h, child_g, index)
+                    if instrumented:
+                        instrumentation.generate(child, child_g, child_h)
+        return False
+
+
+class IDAStarSlidingPuzzleSolver(SlidingPuzzleSolver):
+    """
+    Iterative-deepening A* on a single mutable board, for boards too large to keep every node in memory.
+    With one blank, children come through a MoveAutomaton of pruning_depth, which is valid on rectangular
+    boards as well. With several, slides that undo the previous one are skipped, and so is the second of two
+    independent slides, which touch different cells, unless it fills a later cell than the first; every
+    sequence of slides has an equivalent one that survives. Unsolvable puzzles are turned away up front by
+    is_solvable, since iterative deepening would never give up on them.
+    """
+    def __init__(self, puzzle: SlidingPuzzle | PackedSlidingPuzzle, heuristic: NPuzzleHeuristic,
+                 budget: Optional[SearchBudget] = None, pruning_depth: int = 8,
+                 instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        self.heuristic = heuristic
+        self.automaton = move_automaton(pruning_depth)
+        self.iterations = 0
+
+    @instrumented
+    def solve(self) -> List[Action] | bool:
+        root = self._root()
+        board = root.to_sliding_puzzle()
+        if not board.is_solvable():
+            return False
+        node = PuzzleNode(board, [], [], None, None)
+        placements = board.placements
+        n_cols = board.n_cols
+        moves = [[(move, start, DIRECTIONS[move].value) for move, start in cells]
+                 for cells in legal_moves(board.n_rows, n_cols)]
+        blank_cells = _blank_cells(root.blanks)
+        single_blank = len(blank_cells) == 1
+        transitions = self.automaton.transitions
+        pruned = MoveAutomaton.PRUNED
+        path: List[Action] = []
+        found = -1
+
+        incremental = self.heuristic.incremental
+        budgeted = self.budget is not None
+        instrumentation = self.instrumentation
+        instrumented = instrumentation is not None
+
+        def search(g: int, h: int, previous_start: int, previous_end: int, automaton_state: int) -> int:
+            self.num_nodes_explored += 1
+            if budgeted and self._out_of_budget():
+                raise _OutOfBudget()
+            f = g + h
+            if f > threshold:
+                return f
+            if placements == board.solution:
+                return found
+            if instrumented:
+                instrumentation.expand(board, g, h, 0, len(path))
+            minimum = math.inf
+            for position in range(len(blank_cells)):
+                blank = blank_cells[position]
+                for move, start, (delta_row, delta_col) in moves[blank]:
+                    tile = placements[start]
+                    if not tile:
+                        continue
+                    if single_blank:
+                        child_state = transitions[automaton_state][move]
+                        if child_state == pruned:
+                            continue
+                    elif (start == previous_end and blank == previous_start) \
+                            or (start != previous_end and blank != previous_start and blank < previous_end):
+                        # skip undoing the previous slide, and take two slides that touch different cells,
+                        # which commute, only in order of the cells they fill
+                        continue
+                    else:
+                        child_state = automaton_state
+                    placements[blank] = tile
+                    placements[start] = 0
+                    blank_cells[position] = start
+                    start_row, start_col = divmod(start, n_cols)
+                    path.append(Action(start_row, start_col, start_row - delta_row, start_col - delta_col))
+                    child_h = (h + self.heuristic.h_delta(board, tile, start, blank) if incremental
+                               else self.heuristic.h(node))
+                    if instrumented:
+                        instrumentation.generate(board, g + 1, child_h)
+                    result = search(g + 1, child_h, start, blank, child_state)
+                    if result == found:
+                        return found
+                    path.pop()
+                    blank_cells[position] = blank
+                    placements[start] = tile
+                    placements[blank] = 0
+                    minimum = min(minimum, result)
+            return minimum
+
+        self._start_budget()
+        root_h = self.heuristic.h(node)
+        threshold = root_h
+        while True:
+            self.iterations += 1
+            try:
+                result = search(0, root_h, -1, -1, MoveAutomaton.START)
+            except _OutOfBudget:
+                result = math.inf
+            if result == found or result == math.inf:
+                break
+            if instrumented:
+                instrumentation.threshold(threshold, result)
+            threshold = result
+        return path if result == found else False
@@ -0,0 +1,207 @@
+"""
+Generators of solvable puzzles for tests, load tests and training data.
+
+Uniform boards are shuffled and, when the shuffle lands on the unsolvable half, two tiles are swapped, which
+maps the unsolvable boards one-to-one onto the solvable ones, so nothing is thrown away. Difficulty is set by
+random walks from the solution, by the exact distance tables of small puzzles, or by filtering on a heuristic.
+Every generator takes a seed and returns the same boards for the same seed.
+"""
+from __future__ import annotations
+import random
+from typing import Iterator, List, Optional, Sequence
+from .distance_table import MAX_TABLE_WIDTH, UNREACHED, get_distance_table
+from .moves import DIRECTIONS, legal_moves
+from .puzzle import NPuzzle, batch_is_solvable
+from .ranking import inversion_parity
+from .solver import ManhattanHeuristic, NPuzzleHeuristic, PuzzleNode
+from .walking_distance import DEFAULT_CACHE_DIR
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def _solution(n_rows: int, n_cols: int, solution: Optional[Sequence[int]]) -> List[int]:
+    solution = list(solution) if solution is not None else list(range(n_rows * n_cols))
+    assert len(solution) == n_rows * n_cols, "solution must have one entry per cell"
+    return solution
+
+
+def _is_solvable(placements: Sequence[int], n_cols: int, goal_index: Sequence[int]) -> bool:
+    # every slide swaps two cells and moves the blank by one, see puzzle.batch_is_solvable
+    parity = inversion_parity([goal_index[tile] for tile in placements])
+    blank, goal_blank = placements.index(0), goal_index[0]
+    distance = abs(blank // n_cols - goal_blank // n_cols) + abs(blank % n_cols - goal_blank % n_cols)
+    return parity == distance % 2
+
+
+def random_solvable_placements(n_rows: int, n_cols: Optional[int] = None, solution: Optional[Sequence[int]] = None,
+                               rng: random.Random = random) -> List[int]:
+    """A board drawn uniformly from those that can reach the solution"""
+    n_cols = n_cols or n_rows
+    solution = _solution(n_rows, n_cols, solution)
+    assert len(solution) >= 3, "boards with fewer than two tiles have no parity to fix"
+    goal_index = [0] * len(solution)
+    for index, tile in enumerate(solution):
+        goal_index[tile] = index
+    placements = list(solution)
+    rng.shuffle(placements)
+    if not _is_solvable(placements, n_cols, goal_index):
+        first, second = [index for index, tile in enumerate(placements[:3]) if tile][:2]
+        placements[first], placements[second] = placements[second], placements[first]
+    return placements
+
+
+def random_walk_placements(n_rows: int, steps: int, n_cols: Optional[int] = None,
+                           solution: Optional[Sequence[int]] = None, rng: random.Random = random) -> List[int]:
+    """The board after a random walk of steps slides from the solution that never undoes the previous slide"""
+    n_cols = n_cols or n_rows
+    assert n_rows > 1 and n_cols > 1, "random walks need at least two rows and columns"
+    placements = _solution(n_rows, n_cols, solution)
+    moves = legal_moves(n_rows, n_cols)
+    blank, previous_blank = placements.index(0), -1
+    for _ in range(steps):
+        start = rng.choice([start for _, start in moves[blank] if start != previous_blank])
+        placements[blank], placements[start] = placements[start], 0
+        blank, previous_blank = start, blank
+    return placements
+
+
+def iter_solvable_puzzles(width: int, count: Optional[int] = None, solution: Optional[Sequence[int]] = None,
+                          seed: Optional[int] = None) -> Iterator[NPuzzle]:
+    """Uniformly random solvable puzzles, forever unless a count is given"""
+    rng = random.Random(seed)
+    solution = _solution(width, width, solution)
+    generated = 0
+    while count is None or generated < count:
+        yield NPuzzle(width, random_solvable_placements(width, width, solution, rng), list(solution))
+        generated += 1
+
+
+def iter_random_walk_puzzles(width: int, steps: int, count: Optional[int] = None,
+                             solution: Optional[Sequence[int]] = None, seed: Optional[int] = None) -> Iterator[NPuzzle]:
+    """Puzzles at most steps slides from the solution, forever unless a count is given"""
+    rng = random.Random(seed)
+    solution = _solution(width, width, solution)
+    generated = 0
+    while count is None or generated < count:
+        yield NPuzzle(width, random_walk_placements(width, steps, width, solution, rng), list(solution))
+        generated += 1
+
+
+def iter_puzzles_at_distance(width: int, distance: int, count: Optional[int] = None,
+                             solution: Optional[Sequence[int]] = None, seed: Optional[int] = None,
+                             cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> Iterator[NPuzzle]:
+    """
+    Puzzles whose optimal solution is exactly distance slides, drawn uniformly from all such boards with the
+    complete distance table of a small puzzle. Widths of 2 and 3 are supported.
+    """
+    assert width <= MAX_TABLE_WIDTH, "exact distances are only tabulated for boards up to 3x3"
+    rng = random.Random(seed)
+    solution = _solution(width, width, solution)
+    table = get_distance_table(width, solution.index(0), cache_dir)
+    if np is not None:
+        indices = np.flatnonzero(np.frombuffer(table.table, dtype=np.uint8) == distance).tolist()
+    else:
+        indices = [index for index, value in enumerate(table.table) if value == distance]
+    assert distance != UNREACHED and indices, f"no {width}x{width} board is {distance} slides from the solution"
+    generated = 0
+    while count is None or generated < count:
+        yield NPuzzle(width, table.placements(rng.choice(indices), solution), list(solution))
+        generated += 1
+
+
+def iter_puzzles_by_heuristic(width: int, low: int, high: int, heuristic: Optional[NPuzzleHeuristic] = None,
+                              count: Optional[int] = None, solution: Optional[Sequence[int]] = None,
+                              seed: Optional[int] = None, walk_steps: Optional[int] = None) -> Iterator[NPuzzle]:
+    """
+    Puzzles of approximate difficulty: solvable boards, uniform or after walk_steps random slides, whose
+    heuristic estimate (Manhattan distance by default) lies between low and high inclusive.
+    Ranges far from the typical estimate for the board size are slow to fill.
+    """
+    rng = random.Random(seed)
+    heuristic = heuristic or ManhattanHeuristic()
+    solution = _solution(width, width, solution)
+    generated = 0
+    while count is None or generated < count:
+        if walk_steps is None:
+            placements = random_solvable_placements(width, width, solution, rng)
+        else:
+            placements = random_walk_placements(width, walk_steps, width, solution, rng)
+        puzzle = NPuzzle(width, placements, list(solution))
+        if low <= heuristic.h(PuzzleNode(puzzle, [], [], None, None)) <= high:
+            yield puzzle
+            generated += 1
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for batch generators")
+
+
+#: boards walked together by batch_random_walks
+_WALK_CHUNK = 1 << 14
+
+
+def _batch_dtype(cells: int):
+    return np.uint8 if cells <= 256 else np.uint16
+
+
+def batch_solvable_placements(count: int, n_rows: int, n_cols: Optional[int] = None,
+                              solution: Optional[Sequence[int]] = None, seed: Optional[int] = None) -> np.ndarray:
+    """A (count, n_rows * n_cols) array of boards drawn uniformly from those that can reach the solution"""
+    _require_numpy()
+    n_cols = n_cols or n_rows
+    solution = _solution(n_rows, n_cols, solution)
+    assert len(solution) >= 3, "boards with fewer than two tiles have no parity to fix"
+    rng = np.random.default_rng(seed)
+    boards = rng.permuted(np.tile(np.array(solution, dtype=_batch_dtype(len(solution))), (count, 1)), axis=1)
+    rows = np.flatnonzero(~batch_is_solvable(boards, n_rows, n_cols, solution))
+    # swap the first two cells that hold tiles
+    blank = np.argmin(boards[rows], axis=1)
+    first = (blank == 0).astype(np.int64)
+    second = np.where(blank <= 1, 2, 1)
+    first_tiles = boards[rows, first]
+    boards[rows, first] = boards[rows, second]
+    boards[rows, second] = first_tiles
+    return boards
+
+
+def batch_random_walks(count: int, n_rows: int, steps: int, n_cols: Optional[int] = None,
+                       solution: Optional[Sequence[int]] = None, seed: Optional[int] = None) -> np.ndarray:
+    """A (count, n_rows * n_cols) array of boards after random walks of steps slides, all taken in lockstep"""
+    _require_numpy()
+    n_cols = n_cols or n_rows
+    assert n_rows > 1 and n_cols > 1, "random walks need at least two rows and columns"
+    solution = _solution(n_rows, n_cols, solution)
+    rng = np.random.default_rng(seed)
+    # start cell of every move from every blank cell, or -1 when it is not legal
+    starts = np.full((len(solution), len(DIRECTIONS)), -1, dtype=np.int64)
+    for blank, moves in enumerate(legal_moves(n_rows, n_cols)):
+        for move, start in moves:
+            starts[blank, move] = start
+    inverse = np.array([DIRECTIONS.index(direction.inverse) for direction in DIRECTIONS])
+
+    boards = np.tile(np.array(solution, dtype=_batch_dtype(len(solution))), (count, 1))
+    # walk a chunk of boards at a time so the working arrays stay in cache
+    for chunk_start in range(0, count, _WALK_CHUNK):
+        chunk = boards[chunk_start:chunk_start + _WALK_CHUNK]
+        size = len(chunk)
+        cells = chunk.reshape(-1)
+        rows = np.arange(size)
+        offsets = rows * len(solution)
+        blank = np.full(size, solution.index(0), dtype=np.int64)
+        undo = np.full(size, -1, dtype=np.int64)
+        for _ in range(steps):
+            candidates = starts[blank]
+            allowed = (candidates >= 0) & (np.arange(len(DIRECTIONS)) != undo[:, None])
+            # the largest random weight among the allowed moves picks one of them uniformly; disallowed moves
+            # get -1 rather than 0, since a draw can be exactly 0
+            move = np.argmax(np.where(allowed, rng.random(candidates.shape, dtype=np.float32), -1), axis=1)
+            start = candidates[rows, move]
+            cells[offsets + blank] = cells[offsets + start]
+            cells[offsets + start] = 0
+            blank = start
+            undo = inverse[move]
+    return boards
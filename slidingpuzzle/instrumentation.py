@@ -0,0 +1,131 @@
+"""
+Optional instrumentation for the solvers. Pass an Instrumentation to a solver to get callbacks on search events,
+samples of the open and closed list sizes, time per phase and tracemalloc measurements, all gathered into a
+SearchStats that can be exported as JSON. Solvers without one only pay for a test of a local flag per node.
+"""
+from __future__ import annotations
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+#: phases timed when time_phases is set
+PHASES = ("move_generation", "heuristic", "queue")
+
+
+class SearchStats:
+    """What one instrumented solve did"""
+    def __init__(self):
+        self.solver = None
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.seconds = 0.0
+        self.solved = None
+        self.solution_length = None
+        # (nodes expanded so far, open list size, closed list size), every sample_interval expansions
+        self.list_sizes: List[Tuple[int, int, int]] = []
+        # (old threshold, new threshold, nodes expanded so far) for iterative-deepening solvers
+        self.thresholds: List[Tuple[int, int, int]] = []
+        self.phase_seconds: Dict[str, float] = {}
+        # (nodes expanded so far, traced bytes, peak traced bytes)
+        self.memory: List[Tuple[int, int, int]] = []
+        # (source line, bytes, allocations) of the largest allocation sites at the end of the solve
+        self.top_allocations: List[Tuple[str, int, int]] = []
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def __repr__(self):
+        return f"SearchStats(expanded={self.expanded}, generated={self.generated}, duplicates={self.duplicates})"
+
+
+class Instrumentation:
+    """
+    Hooks a solver calls while it searches. Callbacks get the packed state (or, in IDA*, the mutable board), its
+    g and its h; on_threshold gets the old and new threshold. Sizes are sampled every sample_interval expansions,
+    and tracemalloc, when trace_memory is set, every memory_interval expansions and at the end.
+    Phase timing reads the clock around every move generation, heuristic call and queue operation, so it
+    slows the search down noticeably and is off by default.
+    """
+    def __init__(self, on_expand: Optional[Callable] = None, on_generate: Optional[Callable] = None,
+                 on_duplicate: Optional[Callable] = None, on_threshold: Optional[Callable] = None,
+                 sample_interval: int = 1024, time_phases: bool = False, trace_memory: bool = False,
+                 memory_interval: Optional[int] = None, top_allocations: int = 10):
+        self.on_expand = on_expand
+        self.on_generate = on_generate
+        self.on_duplicate = on_duplicate
+        self.on_threshold = on_threshold
+        self.sample_interval = sample_interval
+        self.time_phases = time_phases
+        self.trace_memory = trace_memory
+        self.memory_interval = memory_interval
+        self.top_allocations = top_allocations
+        self.stats = SearchStats()
+        self._start_time = 0.0
+        self._started_tracing = False
+
+    def start(self, solver):
+        self.stats = SearchStats()
+        self.stats.solver = type(solver).__name__
+        if self.time_phases:
+            self.stats.phase_seconds = {phase: 0.0 for phase in PHASES}
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start_time = time.perf_counter()
+
+    def expand(self, state, g: int, h: int, open_size: int = 0, closed_size: int = 0):
+        stats = self.stats
+        stats.expanded += 1
+        if self.on_expand is not None:
+            self.on_expand(state, g, h)
+        if stats.expanded % self.sample_interval == 0:
+            stats.list_sizes.append((stats.expanded, open_size, closed_size))
+        if self.trace_memory and self.memory_interval and stats.expanded % self.memory_interval == 0:
+            self._measure_memory()
+
+    def generate(self, state, g: int, h: int):
+        self.stats.generated += 1
+        if self.on_generate is not None:
+            self.on_generate(state, g, h)
+
+    def duplicate(self, state, g: int):
+        self.stats.duplicates += 1
+        if self.on_duplicate is not None:
+            self.on_duplicate(state, g, None)
+
+    def threshold(self, old: int, new: int):
+        self.stats.thresholds.append((old, new, self.stats.expanded))
+        if self.on_threshold is not None:
+            self.on_threshold(old, new)
+
+    def lap(self, phase: str, since: float) -> float:
+        """Charge the time since a perf_counter reading to a phase and return the new reading"""
+        now = time.perf_counter()
+        self.stats.phase_seconds[phase] += now - since
+        return now
+
+    def _measure_memory(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.stats.memory.append((self.stats.expanded, current, peak))
+
+    def finish(self, solver, solution) -> SearchStats:
+        stats = self.stats
+        stats.seconds = time.perf_counter() - self._start_time
+        # solvers without per-node hooks still report how many nodes they expanded
+        stats.expanded = stats.expanded or solver.num_nodes_explored
+        stats.solved = solution is not False
+        stats.solution_length = len(solution) if solution is not False else None
+        if self.trace_memory:
+            self._measure_memory()
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:self.top_allocations]
+            stats.top_allocations = [(str(statistic.traceback), statistic.size, statistic.count)
+                                     for statistic in statistics]
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        return stats
@@ -0,0 +1,124 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
+from .puzzle import SlideDirection
+
+DIRECTIONS = list(SlideDirection)
+
+
+@lru_cache(maxsize=None)
+def legal_moves(n_rows: int, n_cols: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """For every blank cell, a (move, start cell) pair per legal slide, where move indexes DIRECTIONS"""
+    table = []
+    for blank in range(n_rows * n_cols):
+        row, col = divmod(blank, n_cols)
+        moves = []
+        for move, direction in enumerate(DIRECTIONS):
+            start_row, start_col = row + direction.value[0], col + direction.value[1]
+            if 0 <= start_row < n_rows and 0 <= start_col < n_cols:
+                moves.append((move, start_row * n_cols + start_col))
+        table.append(tuple(moves))
+    return tuple(table)
+
+
+def _find_redundant_strings(depth: int) -> List[Tuple[int, ...]]:
+    """
+    Move strings of at most depth slides that have an equivalent string which is shorter, or as long and
+    lexicographically smaller, and whose blank stays inside the first string's bounding box, so it is legal
+    wherever the first one is. They are found by sliding on an unbounded board (Taylor and Korf, 1993).
+    """
+    Key = FrozenSet[Tuple[Tuple[int, int], Tuple[int, int]]]
+    first_seen: Dict[Key, Tuple[int, int, int, int]] = {}
+    forbidden: List[Tuple[int, ...]] = []
+    forbidden_set = set()
+    # each entry: (moves, cell -> original cell for moved cells, blank, bounding box of the blank's path)
+    layer = [((), {}, (0, 0), (0, 0, 0, 0))]
+    first_seen[frozenset()] = (0, 0, 0, 0)
+    for _ in range(depth):
+        next_layer = []
+        for moves, contents, blank, box in layer:
+            for move, direction in enumerate(DIRECTIONS):
+                string = moves + (move,)
+                if any(string[i:] in forbidden_set for i in range(len(string))):
+                    continue
+                start = (blank[0] + direction.value[0], blank[1] + direction.value[1])
+                child = dict(contents)
+                child[blank] = contents.get(start, start)
+                child[start] = contents.get(blank, blank)
+                key = frozenset((cell, label) for cell, label in child.items() if cell != label)
+                child_box = (min(box[0], start[0]), max(box[1], start[0]), min(box[2], start[1]), max(box[3], start[1]))
+                if key in first_seen:
+                    seen = first_seen[key]
+                    if seen[0] >= child_box[0] and seen[1] <= child_box[1] \
+                            and seen[2] >= child_box[2] and seen[3] <= child_box[3]:
+                        forbidden.append(string)
+                        forbidden_set.add(string)
+                        continue
+                else:
+                    first_seen[key] = child_box
+                next_layer.append((string, child, start, child_box))
+        layer = next_layer
+    return forbidden
+
+
+class MoveAutomaton:
+    """
+    A finite-state machine over slides that rejects any move completing a known redundant move string
+    (an Aho-Corasick automaton of those strings). Depth 2 prunes exactly the moves that undo the previous
+    one; deeper automata also prune longer redundant sequences. Because only strings with a no longer,
+    legal alternative are pruned, a shortest solution always survives in a tree search.
+
+    Use it by starting at state START and replacing the state with transitions[state][move] after every
+    move, skipping moves for which that is PRUNED.
+    """
+    START = 0
+    PRUNED = -1
+
+    def __init__(self, depth: int = 2):
+        self.depth = depth
+        self.forbidden = _find_redundant_strings(depth)
+        self.transitions = self._build(self.forbidden)
+
+    @staticmethod
+    def _build(forbidden: List[Tuple[int, ...]]) -> List[List[int]]:
+        children: List[Dict[int, int]] = [{}]
+        terminal = [False]
+        for string in forbidden:
+            node = 0
+            for move in string:
+                if move not in children[node]:
+                    children[node][move] = len(children)
+                    children.append({})
+                    terminal.append(False)
+                node = children[node][move]
+            terminal[node] = True
+
+        # breadth-first over the trie, filling in failure transitions
+        transitions = [[0] * len(DIRECTIONS) for _ in children]
+        failure = [0] * len(children)
+        order = []
+        for move in range(len(DIRECTIONS)):
+            child = children[0].get(move)
+            if child is not None:
+                transitions[0][move] = child
+                order.append(child)
+        for node in order:
+            terminal[node] = terminal[node] or terminal[failure[node]]
+            for move in range(len(DIRECTIONS)):
+                child = children[node].get(move)
+                if child is None:
+                    transitions[node][move] = transitions[failure[node]][move]
+                else:
+                    failure[child] = transitions[failure[node]][move]
+                    transitions[node][move] = child
+                    order.append(child)
+        return [[MoveAutomaton.PRUNED if terminal[target] else target for target in row] for row in transitions]
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+
+@lru_cache(maxsize=None)
+def move_automaton(depth: int = 2) -> MoveAutomaton:
+    """Shared automaton for each depth, since building deep ones takes a while"""
+    return MoveAutomaton(depth)
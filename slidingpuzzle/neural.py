@@ -0,0 +1,135 @@
+"""
+A neural heuristic that runs on the CPU with nothing but NumPy. The network is a multilayer perceptron: the input
+is a one-hot encoding of the goal cell of the tile in every cell, hidden layers use ReLU and a single linear
+output estimates the distance to the goal, rounded to a non-negative integer. Weights are kept in .npz files,
+so a network trained elsewhere can be exported to the same arrays.
+
+Learned estimates can overestimate, so the heuristic is not admissible and the solvers' solutions are not
+guaranteed to be shortest. Its cost is in the matrix products, which is why it is best used with
+BatchAStarNPuzzleSolver, scoring a whole batch of children in one call.
+"""
+from __future__ import annotations
+import math
+from typing import List, Optional, Sequence, Tuple
+from .solver import NPuzzleHeuristic, PuzzleNode
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+class MLPHeuristic(NPuzzleHeuristic):
+    """
+    weights[i] has shape (inputs, outputs) and biases[i] shape (outputs,); the first layer takes
+    cells * cells inputs and the last has one output. The network is trained for a single board shape,
+    width x width, but boards with any solution are encoded relative to it.
+    """
+    admissible = False
+
+    def __init__(self, width: int, weights: Sequence[np.ndarray], biases: Sequence[np.ndarray]):
+        if np is None:
+            raise ImportError("NumPy is required for MLPHeuristic")
+        assert len(weights) == len(biases) and weights, "every layer needs weights and biases"
+        cells = width * width
+        assert weights[0].shape[0] == cells * cells, f"the first layer must take {cells * cells} inputs"
+        assert weights[-1].shape[1] == 1, "the last layer must have a single output"
+        self.width = width
+        self.weights = [np.asarray(weight, dtype=np.float32) for weight in weights]
+        self.biases = [np.asarray(bias, dtype=np.float32) for bias in biases]
+        self._identity = np.eye(cells, dtype=np.float32)
+
+    @classmethod
+    def initialize(cls, width: int, hidden: Sequence[int] = (256, 64),
+                   rng: Optional[np.random.Generator] = None) -> MLPHeuristic:
+        """An untrained network with He-initialized weights, to be trained with fit"""
+        rng = rng if rng is not None else np.random.default_rng()
+        sizes = [width ** 4, *hidden, 1]
+        weights = [rng.normal(0, math.sqrt(2 / inputs), (inputs, outputs)).astype(np.float32)
+                   for inputs, outputs in zip(sizes, sizes[1:])]
+        return cls(width, weights, [np.zeros(outputs, dtype=np.float32) for outputs in sizes[1:]])
+
+    @classmethod
+    def load(cls, path: str) -> MLPHeuristic:
+        with np.load(path) as arrays:
+            layers = int(arrays["layers"])
+            return cls(int(arrays["width"]), [arrays[f"weight_{layer}"] for layer in range(layers)],
+                       [arrays[f"bias_{layer}"] for layer in range(layers)])
+
+    def save(self, path: str):
+        arrays = {"width": np.array(self.width), "layers": np.array(len(self.weights))}
+        for layer, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"weight_{layer}"] = weight
+            arrays[f"bias_{layer}"] = bias
+        np.savez(path, **arrays)
+
+    def encode(self, placements, solution: Sequence[int]) -> np.ndarray:
+        """(m, cells * cells) inputs: for every cell, a one-hot vector of the goal cell of the tile in it"""
+        placements = np.asarray(placements, dtype=np.intp)
+        assert placements.shape[1] == self.width * self.width, f"the network is for {self.width}x{self.width} boards"
+        goal_cell = np.empty(len(solution), dtype=np.intp)
+        goal_cell[np.asarray(solution, dtype=np.intp)] = np.arange(len(solution))
+        return self._identity[goal_cell[placements]].reshape(len(placements), -1)
+
+    def _forward(self, inputs: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """The output and the activations of every layer, inputs first"""
+        activations = [inputs]
+        for layer, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            outputs = activations[-1] @ weight + bias
+            if layer < len(self.weights) - 1:
+                np.maximum(outputs, 0, out=outputs)
+            activations.append(outputs)
+        return activations[-1][:, 0], activations
+
+    def predict(self, placements, solution: Sequence[int]) -> np.ndarray:
+        """The raw estimates, as floats"""
+        return self._forward(self.encode(placements, solution))[0]
+
+    def h_batch(self, placements, solution: Sequence[int], n_cols: Optional[int] = None) -> np.ndarray:
+        return np.maximum(np.rint(self.predict(placements, solution)), 0).astype(np.int64)
+
+    def h(self, node: PuzzleNode) -> int:
+        return int(self.h_batch([node.puzzle.placements], node.puzzle.solution)[0])
+
+    def fit(self, placements, distances, solution: Optional[Sequence[int]] = None, epochs: int = 10,
+            batch_size: int = 256, learning_rate: float = 1e-3, rng: Optional[np.random.Generator] = None) -> List[float]:
+        """
+        Train on boards and their distances with minibatch Adam on the mean squared error, returning the
+        mean loss of every epoch.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        solution = list(solution) if solution is not None else list(range(self.width * self.width))
+        placements = np.asarray(placements)
+        distances = np.asarray(distances, dtype=np.float32)
+        parameters = self.weights + self.biases
+        first = [np.zeros_like(parameter) for parameter in parameters]
+        second = [np.zeros_like(parameter) for parameter in parameters]
+        beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+        step = 0
+        losses = []
+        for _ in range(epochs):
+            order = rng.permutation(len(placements))
+            total = 0.0
+            for begin in range(0, len(order), batch_size):
+                rows = order[begin:begin + batch_size]
+                outputs, activations = self._forward(self.encode(placements[rows], solution))
+                error = outputs - distances[rows]
+                total += float(error @ error)
+                # backpropagate the gradient of the mean squared error
+                delta = (2 / len(rows)) * error[:, None]
+                weight_gradients, bias_gradients = [], []
+                for layer in range(len(self.weights) - 1, -1, -1):
+                    weight_gradients.append(activations[layer].T @ delta)
+                    bias_gradients.append(delta.sum(axis=0))
+                    if layer:
+                        delta = (delta @ self.weights[layer].T) * (activations[layer] > 0)
+                gradients = weight_gradients[::-1] + bias_gradients[::-1]
+                step += 1
+                for parameter, gradient, m, v in zip(parameters, gradients, first, second):
+                    m *= beta1
+                    m += (1 - beta1) * gradient
+                    v *= beta2
+                    v += (1 - beta2) * gradient * gradient
+                    parameter -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + epsilon)
+            losses.append(total / len(order))
+        return losses
@@ -0,0 +1,254 @@
+from __future__ import annotations
+import heapq
+import math
+import multiprocessing
+import queue
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from .puzzle import NPuzzle, PackedNPuzzle, SlideDirection
+from .instrumentation import Instrumentation
+from .solver import _ENTRY_BYTES, NPuzzleHeuristic, NPuzzleSolver, PuzzleNode, SearchBudget, instrumented
+
+_DIRECTIONS = list(SlideDirection)
+
+# messages between processes are tuples whose first item is one of these
+_NODES, _INCUMBENT, _PROBE, _STATUS, _GOAL, _PARENT, _STOP = range(7)
+
+
+def owner_of(state: int, workers: int) -> int:
+    """Worker that owns a packed state; the multiplication spreads neighboring states across workers"""
+    return ((hash(state) * 0x9E3779B97F4A7C15) >> 29) % workers
+
+
+class _HDAWorker:
+    """
+    One process of HDA*. It owns the open list and the best-g table for its share of the states, expands its
+    best node, and batches each child off to the worker that owns it.
+    """
+    def __init__(self, index: int, workers: int, width: int, goal: int, solution: Tuple[int, ...],
+                 heuristic: NPuzzleHeuristic, inboxes, coordinator, batch_size: int):
+        self.index = index
+        self.workers = workers
+        self.width = width
+        self.goal = goal
+        self.solution = solution
+        self.heuristic = heuristic
+        self.inboxes = inboxes
+        self.coordinator = coordinator
+        self.batch_size = batch_size
+        self.open: List[Tuple[int, int, int, int, int]] = []
+        self.best_g: Dict[int, int] = {}
+        self.parents: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        self.outboxes: List[list] = [[] for _ in range(workers)]
+        self.incumbent = math.inf
+        self.sent = 0
+        self.received = 0
+        self.expanded = 0
+
+    def run(self):
+        inbox = self.inboxes[self.index]
+        while True:
+            idle = not self.open or self.open[0][0] >= self.incumbent
+            if idle:
+                self._flush(force=True)
+            try:
+                message = inbox.get(timeout=0.05) if idle else inbox.get_nowait()
+            except queue.Empty:
+                message = None
+            while message is not None:
+                if message[0] == _STOP:
+                    return
+                self._handle(message)
+                try:
+                    message = inbox.get_nowait()
+                except queue.Empty:
+                    message = None
+            for _ in range(self.batch_size):
+                if not self.open or self.open[0][0] >= self.incumbent:
+                    break
+                self._expand()
+            self._flush(force=False)
+
+    def _handle(self, message):
+        kind = message[0]
+        if kind == _NODES:
+            self.received += 1
+            for entry in message[1]:
+                self._add(*entry)
+        elif kind == _INCUMBENT:
+            self.received += 1
+            self.incumbent = min(self.incumbent, message[1])
+        elif kind == _PROBE:
+            self._flush(force=True)
+            idle = not self.open or self.open[0][0] >= self.incumbent
+            self.coordinator.put((_STATUS, message[1], self.index, idle, self.sent, self.received, self.expanded,
+                                  self._memory_in_use()))
+        elif kind == _PARENT:
+            parent, move = self.parents[message[1]]
+            self.coordinator.put((_PARENT, message[1], parent, move))
+
+    def _memory_in_use(self) -> int:
+        """Rough bytes held by this worker's open list and hash tables, as NPuzzleSolver estimates them"""
+        return sum(sys.getsizeof(container) + len(container) * _ENTRY_BYTES
+                   for container in (self.open, self.best_g, self.parents))
+
+    def _add(self, state: int, blank: int, g: int, h: int, parent: Optional[int], move: Optional[int]):
+        if g < self.best_g.get(state, math.inf):
+            self.best_g[state] = g
+            self.parents[state] = (parent, move)
+            # ties are broken towards deeper nodes
+            heapq.heappush(self.open, (g + h, -g, h, state, blank))
+
+    def _expand(self):
+        f, negative_g, h, state, blank = heapq.heappop(self.open)
+        g = -negative_g
+        if g > self.best_g[state]:
+            return
+        self.expanded += 1
+        if state == self.goal:
+            self.incumbent = g
+            for worker in range(self.workers):
+                if worker != self.index:
+                    self.inboxes[worker].put((_INCUMBENT, g))
+                    self.sent += 1
+            self.coordinator.put((_GOAL, g, state))
+            return
+        puzzle = PackedNPuzzle(self.width, state, blank, self.goal, self.solution)
+        incremental = self.heuristic.incremental
+        for move, direction in enumerate(_DIRECTIONS):
+            child = puzzle.slide(direction)
+            if child is puzzle:
+                continue
+            if incremental:
+                child_h = h + self.heuristic.h_delta(child, child.placements[blank], child.blank, blank)
+            else:
+                child_h = self.heuristic.h(PuzzleNode(child, [], [], None, direction))
+            entry = (child.state, child.blank, g + 1, child_h, state, move)
+            owner = owner_of(child.state, self.workers)
+            if owner == self.index:
+                self._add(*entry)
+            else:
+                self.outboxes[owner].append(entry)
+
+    def _flush(self, force: bool):
+        for worker, outbox in enumerate(self.outboxes):
+            if outbox and (force or len(outbox) >= self.batch_size):
+                self.inboxes[worker].put((_NODES, outbox))
+                self.sent += 1
+                self.outboxes[worker] = []
+
+
+def _run_worker(*args):
+    _HDAWorker(*args).run()
+
+
+class HDAStarNPuzzleSolver(NPuzzleSolver):
+    """
+    Hash-distributed A* (Kishimoto, Fukunaga and Botea, 2009). States are split across worker processes by
+    hash; each worker runs A* on its own states and sends generated children to their owners in batches.
+
+    Once a goal is expanded its cost is broadcast, and the search ends when every worker only holds nodes
+    with f at least that cost and no messages are in flight, which two identical rounds of message counts
+    confirm. The returned solution is therefore optimal for an admissible heuristic.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic, workers: Optional[int] = None,
+                 batch_size: int = 64, budget: Optional[SearchBudget] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        self.heuristic = heuristic
+        self.workers = workers or multiprocessing.cpu_count()
+        self.batch_size = batch_size
+        self.nodes_per_worker: List[int] = []
+        self.memory_per_worker: List[int] = []
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        packed = self.puzzle if isinstance(self.puzzle, PackedNPuzzle) else self.puzzle.pack()
+        if packed.is_solved():
+            return []
+        context = multiprocessing.get_context()
+        inboxes = [context.Queue() for _ in range(self.workers)]
+        coordinator = context.Queue()
+        processes = [context.Process(target=_run_worker, daemon=True,
+                                     args=(index, self.workers, packed.width, packed.goal, packed.solution,
+                                           self.heuristic, inboxes, coordinator, self.batch_size))
+                     for index in range(self.workers)]
+        for process in processes:
+            process.start()
+        try:
+            return self._coordinate(packed, inboxes, coordinator)
+        finally:
+            for inbox in inboxes:
+                inbox.put((_STOP,))
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def _coordinate(self, packed: PackedNPuzzle, inboxes, coordinator) -> List[SlideDirection] | bool:
+        root_h = self.heuristic.h(PuzzleNode(packed, [], [], None, None))
+        inboxes[owner_of(packed.state, self.workers)].put(
+            (_NODES, [(packed.state, packed.blank, 0, root_h, None, None)]))
+        self._start_budget()
+        best_cost, best_state = math.inf, None
+        wave, previous_totals = 0, None
+        statuses = {}
+        for inbox in inboxes:
+            inbox.put((_PROBE, wave))
+        while True:
+            message = coordinator.get()
+            if message[0] == _GOAL:
+                if message[1] < best_cost:
+                    best_cost, best_state = message[1], message[2]
+                continue
+            _, message_wave, worker, idle, sent, received, expanded, memory = message
+            if message_wave != wave:
+                continue
+            statuses[worker] = (idle, sent, received, expanded, memory)
+            if len(statuses) < self.workers:
+                continue
+
+            self.nodes_per_worker = [statuses[worker][3] for worker in range(self.workers)]
+            self.num_nodes_explored = sum(self.nodes_per_worker)
+            self.memory_per_worker = [statuses[worker][4] for worker in range(self.workers)]
+            # the coordinator sent the root, which every other message count includes
+            totals = (sum(status[1] for status in statuses.values()) + 1,
+                      sum(status[2] for status in statuses.values()))
+            if all(status[0] for status in statuses.values()) and totals[0] == totals[1] \
+                    and totals == previous_totals:
+                break
+            previous_totals = totals if all(status[0] for status in statuses.values()) else None
+            # the summed node count rarely lands on a multiple of check_interval, so every wave checks all limits
+            if self.budget is not None and (self.budget.max_nodes is not None
+                                            and self.num_nodes_explored >= self.budget.max_nodes
+                                            or self._check_limits()):
+                self.budget_exhausted = True
+                return False
+            wave += 1
+            statuses = {}
+            time.sleep(0.001)
+            for inbox in inboxes:
+                inbox.put((_PROBE, wave))
+
+        if best_state is None:
+            return False
+        return self._trace(best_state, inboxes, coordinator)
+
+    def _memory_in_use(self) -> int:
+        """The workers' estimates from the last probe wave"""
+        return sum(self.memory_per_worker)
+
+    def _trace(self, state: int, inboxes, coordinator) -> List[SlideDirection]:
+        """Follow parent pointers back to the root, asking whichever worker owns each state"""
+        moves = []
+        while True:
+            inboxes[owner_of(state, self.workers)].put((_PARENT, state))
+            message = coordinator.get()
+            while message[0] != _PARENT:
+                message = coordinator.get()
+            _, _, parent, move = message
+            if parent is None:
+                return [_DIRECTIONS[move] for move in reversed(moves)]
+            moves.append(move)
+            state = parent
@@ -1,9 +1,16 @@
 from __future__ import annotations
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Sequence
 from enum import Enum
 import random
 from collections import namedtuple
+from functools import lru_cache
 import copy
+from .ranking import batch_permutation_parity, inversion_count, inversion_parity
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
 
 
 Action = namedtuple("Action", "start_row start_col end_row end_col")
@@ -21,6 +28,12 @@ class SlideDirection(Enum):
     def __str__(self):
         return f"{self.name}"
 
+    @property
+    def inverse(self) -> SlideDirection:
+        """The direction that undoes this slide"""
+        delta_row, delta_col = self.value
+        return SlideDirection((-delta_row, -delta_col))
+
 
 def generate_random_puzzle_placements(n_rows: int, n_cols: int):
     """ a docstring """
@@ -100,7 +113,9 @@ class SlidingPuzzle:
         assert self.is_empty(action.end_row, action.end_col)
         assert self.is_full(action.start_row, action.start_col)
 
-        output = copy.deepcopy(self)
+        # only the placements change, so the copy shares everything else
+        output = copy.copy(self)
+        output.placements = list(self.placements)
         index = output._get_internal_coordinate(action.start_row, action.start_col)
         number = output.get(action.start_row, action.start_col)
         output.placements[index] = 0
@@ -112,6 +127,29 @@ class SlidingPuzzle:
     def is_solved(self) -> bool:
         return self.placements == self.solution
 
+    def is_solvable(self) -> bool:
+        """
+        Whether the solution can be reached. Tiles in a single row or column never pass each other. With one
+        blank, the parity of the tiles' permutation must match the parity of the blank's taxicab distance to its
+        goal cell, and with two or more every arrangement of the same tiles can be reached.
+        """
+        if sorted(self.placements) != sorted(self.solution):
+            return False
+        if self.n_rows == 1 or self.n_cols == 1:
+            return [tile for tile in self.placements if tile] == [tile for tile in self.solution if tile]
+        blanks = self.placements.count(0)
+        if blanks != 1:
+            return blanks > 1 or self.placements == self.solution
+        goal_index = {tile: index for index, tile in enumerate(self.solution)}
+        parity = inversion_parity([goal_index[tile] for tile in self.placements])
+        blank_row, blank_col = divmod(self.placements.index(0), self.n_cols)
+        goal_row, goal_col = divmod(goal_index[0], self.n_cols)
+        return parity == (abs(blank_row - goal_row) + abs(blank_col - goal_col)) % 2
+
+    def pack(self) -> PackedSlidingPuzzle:
+        """Convert to the packed-integer representation"""
+        return PackedSlidingPuzzle.from_sliding_puzzle(self)
+
     def __len__(self) -> int:
         return self.n_rows * self.n_cols
 
@@ -132,7 +170,7 @@ class SlidingPuzzle:
         return f"SlidingPuzzle({self.n_rows}, {self.n_cols}, {self.placements}, solution={self.solution})"
 
     def __hash__(self) -> int:
-        return hash(self.__repr__())
+        return hash(tuple(self.placements))
 
     def __copy__(self) -> SlidingPuzzle:
         return SlidingPuzzle(self.n_rows, self.n_cols, self.placements, self.solution)
@@ -150,43 +188,35 @@ class NPuzzle(SlidingPuzzle):
         self.n = width**2 - 1
 
     @classmethod
-    def random_puzzle(cls, width: int):
+    def random_puzzle(cls, width: int, solvable: bool = True):
+        """A random board, drawn from the solvable ones unless solvable is False"""
+        if solvable:
+            from .generators import random_solvable_placements
+            return cls(width, random_solvable_placements(width))
         placements = generate_random_puzzle_placements(width, width)
         return cls(width, placements)
 
     def _get_inv_count(self) -> int:
-        inv_count = 0
-        for i in range(self.n):
-            for j in range(i + 1, self.n+1):
-                # count pairs(arr[i], arr[j]) such that
-                # i < j and arr[i] > arr[j]
-                if self.placements[j] and self.placements[i] and self.placements[i] > self.placements[j]:
-                    inv_count += 1
-        return inv_count
+        # count pairs(arr[i], arr[j]) of tiles such that i < j and arr[i] > arr[j]
+        return inversion_count([tile for tile in self.placements if tile])
 
     # find Position of blank from bottom
     def _find_blank_row_from_bottom(self) -> int:
-        # start from bottom-right corner of matrix
-        for i in range(self.n_rows - 1, -1, -1):
-            for j in range(self.n_rows - 1, -1, -1):
-                if self.is_empty(i, j):
-                    return self.n_rows - i
+        return self.n_rows - self.placements.index(0) // self.n_cols
 
     # This function returns true if given
     # instance of N*N - 1 puzzle is solvable
     def is_solvable(self) -> bool:
-        # Count inversions in given puzzle
-        inv_count = self._get_inv_count()
-
-        # If grid is odd, return true if inversion count is even.
-        if self.n_rows % 2 == 1:
-            return inv_count % 2 == 0
-        else:  # grid is even
-            pos = self._find_blank_row_from_bottom()
-            if pos % 2 == 0:
-                return inv_count % 2 == 1
-            else:
-                return inv_count % 2 == 0
+        # only the parity of the tile order, taken relative to the solution, matters
+        goal_index = {tile: index for index, tile in enumerate(self.solution)}
+        parity = inversion_parity([goal_index[tile] for tile in self.placements if tile])
+
+        # If grid is odd, a vertical slide moves a tile past an even number of others
+        if self.n_cols % 2 == 1:
+            return parity == 0
+        else:  # grid is even, and every vertical slide also flips the parity
+            blank_rows = abs(self.placements.index(0) // self.n_cols - self.solution.index(0) // self.n_cols)
+            return parity == blank_rows % 2
 
     def slide(self, direction: SlideDirection) -> NPuzzle:
         assert isinstance(direction, SlideDirection), "direction must be a SlideDirection type"
@@ -212,3 +242,271 @@ class NPuzzle(SlidingPuzzle):
         return NPuzzle(copy.deepcopy(self.n_cols, memodict),
                        copy.deepcopy(self.placements, memodict),
                        copy.deepcopy(self.solution, memodict))
+
+    def pack(self) -> PackedNPuzzle:
+        """Convert to the packed-integer representation"""
+        return PackedNPuzzle.from_npuzzle(self)
+
+
+def batch_is_solvable(placements, n_rows: int, n_cols: Optional[int] = None,
+                      solution: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    Solvability of every row of an (m, n_rows * n_cols) array of placements with a single blank, for square
+    or rectangular boards. Each slide swaps the blank with a tile and moves the blank one cell, so a board is
+    solvable exactly when the parity of its permutation of the solution equals the parity of the blank's
+    taxicab distance from its goal cell.
+    """
+    if np is None:
+        raise ImportError("NumPy is required for batch_is_solvable")
+    n_cols = n_cols or n_rows
+    placements = np.asarray(placements, dtype=np.int64)
+    solution = np.asarray(solution if solution is not None else range(n_rows * n_cols), dtype=np.int64)
+    assert placements.ndim == 2 and placements.shape[1] == n_rows * n_cols, "expected one board per row"
+    goal_index = np.empty(len(solution), dtype=np.int64)
+    goal_index[solution] = np.arange(len(solution))
+    parity = batch_permutation_parity(goal_index[placements])
+
+    blank = np.argmin(placements, axis=1)
+    goal_blank = int(goal_index[0])
+    distance = np.abs(blank // n_cols - goal_blank // n_cols) + np.abs(blank % n_cols - goal_blank % n_cols)
+    return parity == distance % 2
+
+
+def bits_per_tile(width: int) -> int:
+    """Number of bits used for each cell when packing a board of the given width"""
+    return max(4, (width * width - 1).bit_length())
+
+
+def pack_placements(width: int, placements: Sequence[int]) -> int:
+    """Pack a list of placements into a single integer, cell i occupying bits [i*b, (i+1)*b)"""
+    bits = bits_per_tile(width)
+    state = 0
+    for index, tile in enumerate(placements):
+        state |= tile << (index * bits)
+    return state
+
+
+def unpack_state(width: int, state: int) -> List[int]:
+    """Inverse of pack_placements"""
+    bits = bits_per_tile(width)
+    mask = (1 << bits) - 1
+    return [(state >> (index * bits)) & mask for index in range(width * width)]
+
+
+def batch_unpack_states(width: int, states: Sequence[int]) -> np.ndarray:
+    """unpack_state of many packed states at once, as an (m, width * width) array"""
+    if np is None:
+        raise ImportError("NumPy is required for batch_unpack_states")
+    bits = bits_per_tile(width)
+    cells = width * width
+    if bits * cells > 64:
+        return np.array([unpack_state(width, state) for state in states], dtype=np.int64).reshape(-1, cells)
+    shifts = np.arange(cells, dtype=np.uint64) * np.uint64(bits)
+    packed = np.fromiter(states, dtype=np.uint64, count=len(states))
+    return ((packed[:, None] >> shifts) & np.uint64((1 << bits) - 1)).astype(np.int64)
+
+
+@lru_cache(maxsize=None)
+def blank_move_table(width: int) -> Dict[SlideDirection, Tuple[int, ...]]:
+    """
+    For each direction, the cell the blank moves to from every blank index, or -1 when the slide is illegal.
+    The tile in that cell is the one that slides into the blank.
+    """
+    table = {}
+    for direction in SlideDirection:
+        delta_row, delta_col = direction.value
+        targets = []
+        for index in range(width * width):
+            row, col = divmod(index, width)
+            start_row, start_col = row + delta_row, col + delta_col
+            if 0 <= start_row < width and 0 <= start_col < width:
+                targets.append(start_row * width + start_col)
+            else:
+                targets.append(-1)
+        table[direction] = tuple(targets)
+    return table
+
+
+class PackedNPuzzle:
+    """
+    An immutable N-puzzle stored as one packed integer with a cached blank index.
+
+    Sliding is a handful of shifts and masks and returns a new PackedNPuzzle, so it can stand in for
+    NPuzzle in the solvers. The solution is kept as a tuple shared by every descendant board.
+    """
+    __slots__ = ("width", "state", "blank", "goal", "solution")
+
+    def __init__(self, width: int, state: int, blank: int, goal: int, solution: Tuple[int, ...]):
+        self.width = width
+        self.state = state
+        self.blank = blank
+        self.goal = goal
+        self.solution = solution
+
+    @classmethod
+    def from_placements(cls, width: int, placements: Sequence[int],
+                        solution: Optional[Sequence[int]] = None) -> PackedNPuzzle:
+        solution = tuple(solution) if solution else tuple(range(width * width))
+        return cls(width, pack_placements(width, placements), list(placements).index(0),
+                   pack_placements(width, solution), solution)
+
+    @classmethod
+    def from_npuzzle(cls, puzzle: NPuzzle) -> PackedNPuzzle:
+        return cls.from_placements(puzzle.n_cols, puzzle.placements, puzzle.solution)
+
+    def to_npuzzle(self) -> NPuzzle:
+        return NPuzzle(self.width, self.placements, list(self.solution))
+
+    @property
+    def placements(self) -> List[int]:
+        return unpack_state(self.width, self.state)
+
+    @property
+    def n_rows(self) -> int:
+        return self.width
+
+    @property
+    def n_cols(self) -> int:
+        return self.width
+
+    @property
+    def n(self) -> int:
+        return self.width * self.width - 1
+
+    def get(self, row: int, col: int) -> int:
+        assert 0 <= row < self.width and 0 <= col < self.width
+        bits = bits_per_tile(self.width)
+        return (self.state >> ((row * self.width + col) * bits)) & ((1 << bits) - 1)
+
+    def get_blank_positions(self) -> List[Tuple[int, int]]:
+        return [divmod(self.blank, self.width)]
+
+    def is_solved(self) -> bool:
+        return self.state == self.goal
+
+    def is_solvable(self) -> bool:
+        return self.to_npuzzle().is_solvable()
+
+    def slide(self, direction: SlideDirection) -> PackedNPuzzle:
+        assert isinstance(direction, SlideDirection), "direction must be a SlideDirection type"
+        start = blank_move_table(self.width)[direction][self.blank]
+        if start < 0:
+            return self
+        bits = bits_per_tile(self.width)
+        tile = (self.state >> (start * bits)) & ((1 << bits) - 1)
+        # the blank cell holds 0, so xor clears the start cell and fills the blank cell
+        state = self.state ^ (tile << (start * bits)) ^ (tile << (self.blank * bits))
+        return PackedNPuzzle(self.width, state, start, self.goal, self.solution)
+
+    def __len__(self) -> int:
+        return self.width * self.width
+
+    def __str__(self) -> str:
+        return str(self.to_npuzzle())
+
+    def __eq__(self, other: PackedNPuzzle) -> bool:
+        return isinstance(other, PackedNPuzzle) and self.width == other.width \
+               and self.state == other.state and self.goal == other.goal
+
+    def __repr__(self) -> str:
+        return f"PackedNPuzzle({self.width}, {self.placements}, solution={list(self.solution)})"
+
+    def __hash__(self) -> int:
+        return hash(self.state)
+
+    def __copy__(self) -> PackedNPuzzle:
+        return self
+
+    def __deepcopy__(self, memodict={}) -> PackedNPuzzle:
+        return self
+
+
+class PackedSlidingPuzzle:
+    """
+    An immutable sliding puzzle of any shape and number of blanks, stored as one packed integer with the blank
+    cells cached as a bit mask. It is the compact state of the solvers in slidingpuzzle.general.
+    """
+    __slots__ = ("n_rows", "n_cols", "state", "blanks", "goal", "solution")
+
+    def __init__(self, n_rows: int, n_cols: int, state: int, blanks: int, goal: int, solution: Tuple[int, ...]):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.state = state
+        self.blanks = blanks
+        self.goal = goal
+        self.solution = solution
+
+    @staticmethod
+    def bits_per_cell(solution: Sequence[int]) -> int:
+        return max(4, max(solution).bit_length())
+
+    @classmethod
+    def from_placements(cls, n_rows: int, n_cols: int, placements: Sequence[int],
+                        solution: Optional[Sequence[int]] = None) -> PackedSlidingPuzzle:
+        solution = tuple(solution) if solution else tuple(range(n_rows * n_cols))
+        bits = cls.bits_per_cell(solution)
+        state = sum(tile << (index * bits) for index, tile in enumerate(placements))
+        goal = sum(tile << (index * bits) for index, tile in enumerate(solution))
+        blanks = sum(1 << index for index, tile in enumerate(placements) if tile == 0)
+        return cls(n_rows, n_cols, state, blanks, goal, solution)
+
+    @classmethod
+    def from_sliding_puzzle(cls, puzzle: SlidingPuzzle) -> PackedSlidingPuzzle:
+        return cls.from_placements(puzzle.n_rows, puzzle.n_cols, puzzle.placements, puzzle.solution)
+
+    def to_sliding_puzzle(self) -> SlidingPuzzle:
+        return SlidingPuzzle(self.n_rows, self.n_cols, self.placements, list(self.solution))
+
+    @property
+    def placements(self) -> List[int]:
+        bits = self.bits_per_cell(self.solution)
+        mask = (1 << bits) - 1
+        return [(self.state >> (index * bits)) & mask for index in range(self.n_rows * self.n_cols)]
+
+    def get(self, row: int, col: int) -> int:
+        assert 0 <= row < self.n_rows and 0 <= col < self.n_cols
+        bits = self.bits_per_cell(self.solution)
+        return (self.state >> ((row * self.n_cols + col) * bits)) & ((1 << bits) - 1)
+
+    def get_blank_positions(self) -> List[Tuple[int, int]]:
+        return [divmod(index, self.n_cols) for index in range(self.n_rows * self.n_cols) if self.blanks >> index & 1]
+
+    def is_solved(self) -> bool:
+        return self.state == self.goal
+
+    def is_solvable(self) -> bool:
+        return self.to_sliding_puzzle().is_solvable()
+
+    def slide(self, action: Action) -> PackedSlidingPuzzle:
+        start = action.start_row * self.n_cols + action.start_col
+        end = action.end_row * self.n_cols + action.end_col
+        assert abs(action.start_row - action.end_row) + abs(action.start_col - action.end_col) == 1, \
+            "a tile slides to a neighboring cell"
+        assert self.blanks >> end & 1 and not self.blanks >> start & 1, "a tile slides into a blank"
+        bits = self.bits_per_cell(self.solution)
+        tile = (self.state >> (start * bits)) & ((1 << bits) - 1)
+        state = self.state ^ (tile << (start * bits)) ^ (tile << (end * bits))
+        return PackedSlidingPuzzle(self.n_rows, self.n_cols, state, self.blanks ^ (1 << start) ^ (1 << end),
+                                   self.goal, self.solution)
+
+    def __len__(self) -> int:
+        return self.n_rows * self.n_cols
+
+    def __str__(self) -> str:
+        return str(self.to_sliding_puzzle())
+
+    def __eq__(self, other: PackedSlidingPuzzle) -> bool:
+        return isinstance(other, PackedSlidingPuzzle) and (self.n_rows, self.n_cols, self.state, self.goal) \
+               == (other.n_rows, other.n_cols, other.state, other.goal)
+
+    def __repr__(self) -> str:
+        return f"PackedSlidingPuzzle({self.n_rows}, {self.n_cols}, {self.placements}, solution={list(self.solution)})"
+
+    def __hash__(self) -> int:
+        return hash(self.state)
+
+    def __copy__(self) -> PackedSlidingPuzzle:
+        return self
+
+    def __deepcopy__(self, memodict={}) -> PackedSlidingPuzzle:
+        return self
@@ -0,0 +1,288 @@
+"""
+Dense integer ranks for permutations and partial permutations, such as the placements of an NPuzzle.
+
+Lehmer ranks preserve lexicographic order. Myrvold-Ruskey ranks use a different order but rank and unrank in
+linear time. Each scalar function has a NumPy batch version that handles many boards in one call.
+"""
+from __future__ import annotations
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+#: 20! is the largest factorial that fits in a signed 64-bit integer
+MAX_BATCH_LENGTH = 20
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for batch ranking")
+
+
+def factorial_count(n: int, k: int) -> int:
+    """Number of ways to place k distinguishable items on n cells, n!/(n-k)!"""
+    count = 1
+    for i in range(k):
+        count *= n - i
+    return count
+
+
+def lehmer_rank_and_parity(permutation: Sequence[int]) -> Tuple[int, int]:
+    """Lehmer rank and parity of a permutation of any distinct values; the digits sum to the inversion count"""
+    remaining = sorted(permutation)
+    rank = 0
+    inversions = 0
+    for i, value in enumerate(permutation):
+        digit = remaining.index(value)
+        remaining.pop(digit)
+        rank = rank * (len(permutation) - i) + digit
+        inversions += digit
+    return rank, inversions % 2
+
+
+def inversion_count(values: Sequence[int]) -> int:
+    """Number of pairs i < j with values[i] > values[j], counted with a Fenwick tree in O(n log n)"""
+    ranks = {value: rank for rank, value in enumerate(sorted(set(values)), start=1)}
+    tree = [0] * (len(ranks) + 1)
+    inversions = 0
+    for seen, value in enumerate(values):
+        # values seen so far that are no larger than this one
+        index = ranks[value]
+        not_larger = 0
+        while index:
+            not_larger += tree[index]
+            index &= index - 1
+        inversions += seen - not_larger
+        index = ranks[value]
+        while index < len(tree):
+            tree[index] += 1
+            index += index & -index
+    return inversions
+
+
+def inversion_parity(values: Sequence[int]) -> int:
+    """Parity of the inversion count, from the cycles of the sorting permutation when the values are distinct"""
+    n = len(values)
+    order = sorted(range(n), key=values.__getitem__)
+    if any(values[order[i]] == values[order[i + 1]] for i in range(n - 1)):
+        return inversion_count(values) % 2
+    seen = [False] * n
+    cycles = 0
+    for start in range(n):
+        if not seen[start]:
+            cycles += 1
+            index = start
+            while not seen[index]:
+                seen[index] = True
+                index = order[index]
+    return (n - cycles) % 2
+
+
+def lehmer_rank(permutation: Sequence[int]) -> int:
+    """Lexicographic rank of a permutation of any distinct values"""
+    return lehmer_rank_and_parity(permutation)[0]
+
+
+def lehmer_unrank(rank: int, n: int) -> List[int]:
+    """The permutation of range(n) with the given lexicographic rank"""
+    digits = []
+    for i in range(1, n + 1):
+        rank, digit = divmod(rank, i)
+        digits.append(digit)
+    remaining = list(range(n))
+    return [remaining.pop(digit) for digit in reversed(digits)]
+
+
+def myrvold_ruskey_rank(permutation: Sequence[int]) -> int:
+    """Linear-time rank of a permutation of range(n), following Myrvold and Ruskey (2001)"""
+    pi = list(permutation)
+    inverse = [0] * len(pi)
+    for index, value in enumerate(pi):
+        inverse[value] = index
+    digits = []
+    for k in range(len(pi), 1, -1):
+        s = pi[k - 1]
+        j = inverse[k - 1]
+        pi[j], pi[k - 1] = s, k - 1
+        inverse[s], inverse[k - 1] = j, k - 1
+        digits.append((s, k))
+    rank = 0
+    for s, k in reversed(digits):
+        rank = s + k * rank
+    return rank
+
+
+def myrvold_ruskey_unrank(rank: int, n: int) -> List[int]:
+    """Inverse of myrvold_ruskey_rank"""
+    pi = list(range(n))
+    for k in range(n, 0, -1):
+        rank, index = divmod(rank, k)
+        pi[k - 1], pi[index] = pi[index], pi[k - 1]
+    return pi
+
+
+def rank_partial(positions: Sequence[int], n: int) -> int:
+    """Dense rank of k distinct cell positions in range(n), in range(n!/(n-k)!)"""
+    rank = 0
+    for i, position in enumerate(positions):
+        digit = position
+        for j in range(i):
+            if positions[j] < position:
+                digit -= 1
+        rank = rank * (n - i) + digit
+    return rank
+
+
+def unrank_partial(rank: int, n: int, k: int) -> List[int]:
+    """Inverse of rank_partial"""
+    digits = []
+    for i in range(k - 1, -1, -1):
+        rank, digit = divmod(rank, n - i)
+        digits.append(digit)
+    digits.reverse()
+    free = list(range(n))
+    return [free.pop(digit) for digit in digits]
+
+
+def rank_placements(placements: Sequence[int]) -> int:
+    """Lexicographic rank of an NPuzzle's placements"""
+    return lehmer_rank(placements)
+
+
+def unrank_placements(rank: int, width: int) -> List[int]:
+    """Placements of a width x width board with the given rank"""
+    return lehmer_unrank(rank, width * width)
+
+
+def _as_batch(permutations, max_length: int = MAX_BATCH_LENGTH):
+    _require_numpy()
+    permutations = np.asarray(permutations, dtype=np.int64)
+    if permutations.ndim != 2:
+        raise ValueError("expected a two dimensional array with one permutation per row")
+    if permutations.shape[1] > max_length:
+        raise ValueError(f"ranks of permutations longer than {max_length} overflow 64 bits")
+    return permutations
+
+
+def batch_lehmer_rank(permutations) -> np.ndarray:
+    """Lehmer rank of every row of an (m, n) array of permutations of range(n)"""
+    permutations = _as_batch(permutations)
+    m, n = permutations.shape
+    ranks = np.zeros(m, dtype=np.int64)
+    for i in range(n):
+        digits = (permutations[:, i + 1:] < permutations[:, i:i + 1]).sum(axis=1)
+        ranks = ranks * (n - i) + digits
+    return ranks
+
+
+def batch_lehmer_unrank(ranks, n: int) -> np.ndarray:
+    """(m, n) array of the permutations with the given Lehmer ranks"""
+    _require_numpy()
+    if n > MAX_BATCH_LENGTH:
+        raise ValueError(f"ranks of permutations longer than {MAX_BATCH_LENGTH} overflow 64 bits")
+    ranks = np.array(ranks, dtype=np.int64)
+    m = len(ranks)
+    digits = np.empty((m, n), dtype=np.int64)
+    for i in range(1, n + 1):
+        digits[:, n - i] = ranks % i
+        ranks //= i
+    available = np.ones((m, n), dtype=bool)
+    permutations = np.empty((m, n), dtype=np.int64)
+    rows = np.arange(m)
+    for i in range(n):
+        # the digit-th value that has not been used yet
+        chosen = np.argmax(np.cumsum(available, axis=1) > digits[:, i:i + 1], axis=1)
+        permutations[:, i] = chosen
+        available[rows, chosen] = False
+    return permutations
+
+
+def batch_myrvold_ruskey_rank(permutations) -> np.ndarray:
+    """Myrvold-Ruskey rank of every row of an (m, n) array of permutations of range(n)"""
+    pi = _as_batch(permutations).copy()
+    m, n = pi.shape
+    rows = np.arange(m)
+    inverse = np.empty_like(pi)
+    inverse[rows[:, None], pi] = np.arange(n)
+    digits = []
+    for k in range(n, 1, -1):
+        s = pi[:, k - 1].copy()
+        j = inverse[:, k - 1].copy()
+        pi[rows, j] = s
+        pi[:, k - 1] = k - 1
+        inverse[rows, s] = j
+        inverse[:, k - 1] = k - 1
+        digits.append((s, k))
+    ranks = np.zeros(m, dtype=np.int64)
+    for s, k in reversed(digits):
+        ranks = s + k * ranks
+    return ranks
+
+
+def batch_myrvold_ruskey_unrank(ranks, n: int) -> np.ndarray:
+    """(m, n) array of the permutations with the given Myrvold-Ruskey ranks"""
+    _require_numpy()
+    ranks = np.array(ranks, dtype=np.int64)
+    m = len(ranks)
+    rows = np.arange(m)
+    pi = np.tile(np.arange(n, dtype=np.int64), (m, 1))
+    for k in range(n, 0, -1):
+        index = ranks % k
+        ranks //= k
+        last = pi[:, k - 1].copy()
+        pi[:, k - 1] = pi[rows, index]
+        pi[rows, index] = last
+    return pi
+
+
+def batch_rank_partial(positions, n: int) -> np.ndarray:
+    """rank_partial of every row of an (m, k) array of distinct positions in range(n)"""
+    positions = _as_batch(positions, max_length=n)
+    m, k = positions.shape
+    ranks = np.zeros(m, dtype=np.int64)
+    for i in range(k):
+        digits = positions[:, i] - (positions[:, :i] < positions[:, i:i + 1]).sum(axis=1)
+        ranks = ranks * (n - i) + digits
+    return ranks
+
+
+def batch_unrank_partial(ranks, n: int, k: int) -> np.ndarray:
+    """(m, k) array of the positions with the given rank_partial ranks"""
+    _require_numpy()
+    ranks = np.array(ranks, dtype=np.int64)
+    m = len(ranks)
+    digits = np.empty((m, k), dtype=np.int64)
+    for i in range(k - 1, -1, -1):
+        digits[:, i] = ranks % (n - i)
+        ranks //= n - i
+    positions = np.empty((m, k), dtype=np.int64)
+    for i in range(k):
+        # the digit-th free cell: step past every taken cell at or before it, in increasing order
+        cell = digits[:, i].copy()
+        for taken in np.sort(positions[:, :i], axis=1).T:
+            cell += taken <= cell
+        positions[:, i] = cell
+    return positions
+
+
+def batch_permutation_parity(permutations) -> np.ndarray:
+    """
+    Parity of every row of an (m, n) array of permutations of range(n), found by sorting all rows at once
+    with at most n - 1 transpositions each. Rows may be of any length.
+    """
+    permutations = _as_batch(permutations, max_length=np.iinfo(np.int64).max).copy()
+    m, n = permutations.shape
+    rows = np.arange(m)
+    inverse = np.empty_like(permutations)
+    inverse[rows[:, None], permutations] = np.arange(n)
+    parity = np.zeros(m, dtype=np.int8)
+    for i in range(n):
+        # swap value i into position i
+        position = inverse[:, i]
+        value = permutations[:, i]
+        permutations[rows, position] = value
+        inverse[rows, value] = position
+        parity ^= (position != i).astype(np.int8)
+    return parity
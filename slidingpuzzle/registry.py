@@ -0,0 +1,48 @@
+"""
+The solvers and heuristics known by name, shared by solve_many, the solving service and the benchmarks.
+"""
+from __future__ import annotations
+import inspect
+from typing import Callable, Dict, Type
+from .constructive import ConstructiveNPuzzleSolver
+from .distance_table import MAX_TABLE_WIDTH, DistanceTableNPuzzleSolver
+from .solver import (NPuzzleSolver, NPuzzleHeuristic, BFSNPuzzleSolver, AStarNPuzleSolver, IDAStarNPuzzleSolver,
+                     BatchAStarNPuzzleSolver, BidirectionalBFSNPuzzleSolver, BidirectionalAStarNPuzzleSolver,
+                     ManhattanHeuristic, LinearConflictHeuristic)
+from .suboptimal import (WeightedAStarNPuzzleSolver, GreedyBestFirstNPuzzleSolver, AnytimeWeightedAStarNPuzzleSolver,
+                         FocalSearchNPuzzleSolver, BeamSearchNPuzzleSolver)
+from .walking_distance import WalkingDistanceHeuristic
+
+SOLVERS: Dict[str, Type[NPuzzleSolver]] = {"bfs": BFSNPuzzleSolver,
+                                           "astar": AStarNPuzleSolver,
+                                           "batch-astar": BatchAStarNPuzzleSolver,
+                                           "idastar": IDAStarNPuzzleSolver,
+                                           "bidirectional-bfs": BidirectionalBFSNPuzzleSolver,
+                                           "bidirectional-astar": BidirectionalAStarNPuzzleSolver,
+                                           "table": DistanceTableNPuzzleSolver,
+                                           "weighted-astar": WeightedAStarNPuzzleSolver,
+                                           "greedy": GreedyBestFirstNPuzzleSolver,
+                                           "anytime-astar": AnytimeWeightedAStarNPuzzleSolver,
+                                           "focal": FocalSearchNPuzzleSolver,
+                                           "beam": BeamSearchNPuzzleSolver,
+                                           "constructive": ConstructiveNPuzzleSolver}
+
+HEURISTICS: Dict[str, Callable[[], NPuzzleHeuristic]] = {"manhattan": ManhattanHeuristic,
+                                                          "linear-conflict": LinearConflictHeuristic,
+                                                          "walking-distance": WalkingDistanceHeuristic}
+
+#: widths the solvers that are limited to small boards can handle
+MAX_WIDTH = {"bfs": 3, "bidirectional-bfs": 3, "table": MAX_TABLE_WIDTH}
+
+
+def resolve_solver(solver: str | Type[NPuzzleSolver]) -> Type[NPuzzleSolver]:
+    """The solver class for a name in SOLVERS, or the class itself"""
+    if isinstance(solver, str):
+        assert solver in SOLVERS, f"unknown solver {solver}, expected one of {', '.join(SOLVERS)}"
+        return SOLVERS[solver]
+    return solver
+
+
+def needs_heuristic(solver: str | Type[NPuzzleSolver]) -> bool:
+    """Whether the solver, a class or a name in SOLVERS, takes a heuristic"""
+    return "heuristic" in inspect.signature(resolve_solver(solver)).parameters
@@ -0,0 +1,503 @@
+"""
+An asyncio service that solves puzzles sent as JSON lines over TCP or a Unix socket. Every line is one object
+and every reply is one line carrying the request's id:
+
+    {"op": "solve", "id": 1, "width": 3, "placements": [...], "solver": "astar", "heuristic": "manhattan",
+     "deadline": 5.0}
+    {"op": "cancel", "id": 2, "target": 1}
+    {"op": "health"}
+    {"op": "metrics"}
+
+Solves run on a pool of worker processes with the solvers and heuristics of the registry. Requests
+wait in a bounded queue. A connection's solves are admitted one at a time, each once the last is in the queue,
+while its lines keep being read, so cancel, health and metrics are answered even when the queue is full. Only
+when as many solves wait for admission as max_in_flight allows does the reader pause, and clients that send
+too fast are slowed by TCP itself; with reject_when_full they are answered "overloaded" at once instead.
+Identical requests in flight share one solve. A request whose deadline passes or that is cancelled is answered
+straight away, and once no request is waiting for a solve its worker is told to stop through a flag in shared
+memory that the search polls.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .cache import SolutionCache
+from .puzzle import PackedNPuzzle, SlideDirection
+from .registry import HEURISTICS, MAX_WIDTH, SOLVERS, needs_heuristic
+from .solver import SearchBudget
+
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+OUT_OF_BUDGET = "out_of_budget"
+CANCELLED = "cancelled"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+OVERLOADED = "overloaded"
+ERROR = "error"
+
+#: seconds of finished solves that recent_throughput is measured over
+RECENT_WINDOW = 60.0
+
+_DIRECTIONS = list(SlideDirection)
+
+# set once in every worker process by _initialize_worker
+_stop_flags = None
+_heuristics: Dict[Tuple[str, int], Any] = {}
+
+
+def _initialize_worker(stop_flags):
+    global _stop_flags
+    _stop_flags = stop_flags
+
+
+def _tiles(encoded: bytes) -> List[int]:
+    """Tiles sent to a worker two bytes each, since boards from 16x16 up have tiles past 255"""
+    tiles = array("H")
+    tiles.frombytes(encoded)
+    return tiles.tolist()
+
+
+def _solve_job(slot: int, width: int, placements: bytes, solution: bytes, solver: str, heuristic: Optional[str],
+               max_nodes: Optional[int]) -> Tuple[Optional[bytes], str, int, float, bool]:
+    """
+    Runs in a worker: solve one puzzle until it is done or the flag of slot is raised. The last item of the result
+    tells whether the solution is known to be optimal, and so may be cached.
+    """
+    puzzle = PackedNPuzzle.from_placements(width, _tiles(placements), _tiles(solution))
+    budget = SearchBudget(max_nodes, stop=lambda: _stop_flags[slot] != 0)
+    solver_class = SOLVERS[solver]
+    if heuristic is not None:
+        # heuristics may build tables per width, so each worker keeps the ones it has made
+        if (heuristic, width) not in _heuristics:
+            _heuristics[heuristic, width] = HEURISTICS[heuristic]()
+        solver = solver_class(puzzle, _heuristics[heuristic, width], budget=budget)
+    else:
+        solver = solver_class(puzzle, budget=budget)
+    start_time = time.perf_counter()
+    moves = solver.solve()
+    seconds = time.perf_counter() - start_time
+    if moves is False:
+        if solver.budget_exhausted:
+            status = CANCELLED if _stop_flags[slot] else OUT_OF_BUDGET
+        else:
+            status = UNSOLVABLE
+        return None, status, solver.num_nodes_explored, seconds, False
+    return (bytes(_DIRECTIONS.index(move) for move in moves), SOLVED, solver.num_nodes_explored, seconds,
+            solver.solution_is_optimal())
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.perf_counter())
+
+
+class _Job:
+    """One solve in the queue or on a worker, shared by every request waiting for it"""
+    def __init__(self, key: tuple):
+        self.key = key
+        self.future = asyncio.get_running_loop().create_future()
+        self.waiters = 0
+        self.slot: Optional[int] = None
+        self.abandoned = False
+        # puts the job in the queue, waiting for room when it is full
+        self.enqueue: Optional[asyncio.Task] = None
+
+
+class SolverService:
+    """
+    workers is the number of solver processes, the CPU count by default, and max_queue the number of solves
+    that may wait for one. max_in_flight bounds the solves one connection may have open, and the solves it
+    may have waiting to be admitted before its reader pauses. With a SolutionCache, boards it holds are answered
+    without a worker and solutions the solving worker knows to be optimal are added to it; the cache is
+    used from a thread of its own, so its disk tier never blocks the event loop.
+    """
+    def __init__(self, workers: Optional[int] = None, max_queue: int = 1000, reject_when_full: bool = False,
+                 max_in_flight: int = 64, cache: Optional[SolutionCache] = None):
+        self.workers = workers or os.cpu_count()
+        self.max_queue = max_queue
+        self.reject_when_full = reject_when_full
+        self.max_in_flight = max_in_flight
+        self.cache = cache
+        self.counts: Dict[str, int] = {status: 0 for status in (SOLVED, UNSOLVABLE, OUT_OF_BUDGET, CANCELLED,
+                                                                DEADLINE_EXCEEDED, OVERLOADED, ERROR)}
+        self.requests = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.running = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cache_thread: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: Dict[tuple, _Job] = {}
+        self._dispatchers: List[asyncio.Task] = []
+        self._servers: List[asyncio.AbstractServer] = []
+        self._stop_flags = None
+        self._started = 0.0
+        self._finished = deque()
+        self._solve_seconds = 0.0
+        self._solves = 0
+
+    async def start(self) -> SolverService:
+        self._stop_flags = multiprocessing.RawArray("b", self.workers)
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_initialize_worker, initargs=(self._stop_flags,))
+        if self.cache is not None:
+            self._cache_thread = ThreadPoolExecutor(1)
+        self._queue = asyncio.Queue(self.max_queue)
+        self._dispatchers = [asyncio.create_task(self._dispatch(slot)) for slot in range(self.workers)]
+        self._started = time.monotonic()
+        return self
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        for slot in range(self.workers):
+            self._stop_flags[slot] = 1
+        for job in self._jobs.values():
+            job.enqueue.cancel()
+            if not job.future.done():
+                job.future.set_result((None, CANCELLED, 0, 0.0, False))
+        self._jobs.clear()
+        await asyncio.get_running_loop().run_in_executor(None, partial(self._pool.shutdown, cancel_futures=True))
+        if self._cache_thread is not None:
+            self._cache_thread.shutdown()
+
+    async def __aenter__(self) -> SolverService:
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """Listen on host and port, any free port by default; the server's sockets give the one bound"""
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self._servers.append(server)
+        return server
+
+    async def serve_unix(self, path: str) -> asyncio.AbstractServer:
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        self._servers.append(server)
+        return server
+
+    @property
+    def queue_depth(self) -> int:
+        """Solves waiting for a worker, including any waiting for room in the queue"""
+        return sum(job.slot is None for job in self._jobs.values())
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "workers": self.workers, "queue_depth": self.queue_depth,
+                "running": self.running, "uptime": time.monotonic() - self._started}
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        uptime = now - self._started
+        while self._finished and self._finished[0] < now - RECENT_WINDOW:
+            self._finished.popleft()
+        return {"requests": self.requests, "statuses": dict(self.counts), "coalesced": self.coalesced,
+                "cache_hits": self.cache_hits, "queue_depth": self.queue_depth, "max_queue": self.max_queue,
+                "waiting_for_room": sum(not job.enqueue.done() for job in self._jobs.values()),
+                "running": self.running, "in_flight": len(self._jobs), "uptime": uptime,
+                "throughput": self._solves / uptime if uptime > 0 else 0.0,
+                "recent_throughput": len(self._finished) / min(uptime, RECENT_WINDOW) if uptime > 0 else 0.0,
+                "mean_solve_seconds": self._solve_seconds / self._solves if self._solves else 0.0}
+
+    async def solve(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer one solve request, waiting for room in the queue first. Cancelling the calling task abandons it,
+        and the worker is stopped once no other request shares the solve.
+        """
+        start_time = time.perf_counter()
+        reply, job, deadline = await self._enter(request, start_time)
+        if reply is not None:
+            return reply
+        try:
+            return await self._finish(request, job, deadline, start_time)
+        finally:
+            self._leave(job)
+
+    async def _enter(self, request: Dict[str, Any],
+                     start_time: float) -> Tuple[Optional[Dict[str, Any]], Optional[_Job], Optional[float]]:
+        """
+        Accept a request: answer it at once, or join it to a job, waiting until a new job is in the queue.
+        Returns the reply, or the job and the deadline on the perf_counter clock; a request that joins a job
+        must _leave it.
+        """
+        self.requests += 1
+        try:
+            key, deadline = self._parse(request)
+        except (AssertionError, KeyError, TypeError, ValueError) as error:
+            return self._reply(request, ERROR, error=str(error) or type(error).__name__), None, None
+        deadline = start_time + deadline if deadline is not None else None
+
+        if self.cache is not None:
+            solution = await asyncio.get_running_loop().run_in_executor(
+                self._cache_thread, self.cache.get, PackedNPuzzle.from_placements(key[0], list(key[1]), list(key[2])))
+            if solution is not None:
+                self.cache_hits += 1
+                return self._reply(request, SOLVED, solution=[move.name for move in solution], nodes=0,
+                                   seconds=time.perf_counter() - start_time), None, None
+
+        job = self._jobs.get(key)
+        if job is not None:
+            self.coalesced += 1
+            job.waiters += 1
+            return None, job, deadline
+        if self.reject_when_full and self._queue.full():
+            return self._reply(request, OVERLOADED, seconds=time.perf_counter() - start_time), None, None
+        job = self._jobs[key] = _Job(key)
+        job.enqueue = asyncio.create_task(self._queue.put(job))
+        job.waiters += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(job.enqueue), _remaining(deadline))
+        except asyncio.TimeoutError:
+            self._leave(job)
+            return self._reply(request, DEADLINE_EXCEEDED, seconds=time.perf_counter() - start_time), None, None
+        except asyncio.CancelledError:
+            self._leave(job)
+            raise
+        return None, job, deadline
+
+    async def _finish(self, request: Dict[str, Any], job: _Job, deadline: Optional[float],
+                      start_time: float) -> Dict[str, Any]:
+        """Wait for the job until the deadline and reply with its outcome"""
+        try:
+            moves, status, nodes, _, _ = await asyncio.wait_for(asyncio.shield(job.future), _remaining(deadline))
+        except asyncio.TimeoutError:
+            return self._reply(request, DEADLINE_EXCEEDED, seconds=time.perf_counter() - start_time)
+        if status == ERROR:
+            return self._reply(request, ERROR, error=moves, seconds=time.perf_counter() - start_time)
+        solution = [_DIRECTIONS[move].name for move in moves] if moves is not None else None
+        return self._reply(request, status, solution=solution, nodes=nodes,
+                           seconds=time.perf_counter() - start_time)
+
+    def _leave(self, job: _Job):
+        job.waiters -= 1
+        if not job.waiters and not job.future.done():
+            self._abandon(job)
+
+    def _parse(self, request: Dict[str, Any]) -> Tuple[tuple, Optional[float]]:
+        """The key identical requests share, and the request's deadline in seconds"""
+        width = request["width"]
+        assert isinstance(width, int) and width >= 2, "width must be an integer of at least 2"
+        cells = width * width
+        placements = tuple(request["placements"])
+        solution = tuple(request.get("solution") or range(cells))
+        assert sorted(placements) == list(range(cells)), f"placements must hold 0 to {cells - 1} once each"
+        assert sorted(solution) == list(range(cells)), f"solution must hold 0 to {cells - 1} once each"
+        solver = request.get("solver", "astar")
+        assert solver in SOLVERS, f"unknown solver {solver}, expected one of {', '.join(SOLVERS)}"
+        assert width <= MAX_WIDTH.get(solver, width), f"{solver} is limited to width {MAX_WIDTH.get(solver)}"
+        heuristic = None
+        if needs_heuristic(solver):
+            heuristic = request.get("heuristic", "manhattan")
+            assert heuristic in HEURISTICS, f"unknown heuristic {heuristic}, expected one of {', '.join(HEURISTICS)}"
+        max_nodes = request.get("max_nodes")
+        assert max_nodes is None or isinstance(max_nodes, int) and max_nodes > 0, "max_nodes must be positive"
+        deadline = request.get("deadline")
+        assert deadline is None or isinstance(deadline, (int, float)) and deadline > 0, "deadline must be positive"
+        return (width, placements, solution, solver, heuristic, max_nodes), deadline
+
+    def _abandon(self, job: _Job):
+        """No request waits for the job any more: drop it from the queue, or stop its worker"""
+        job.abandoned = True
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        job.enqueue.cancel()
+        if job.slot is not None:
+            self._stop_flags[job.slot] = 1
+
+    async def _dispatch(self, slot: int):
+        """Feed one worker process, one job at a time"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            if job.abandoned:
+                continue
+            self._stop_flags[slot] = 0
+            job.slot = slot
+            self.running += 1
+            width, placements, solution, solver, heuristic, max_nodes = job.key
+            try:
+                result = await loop.run_in_executor(self._pool, _solve_job, slot, width,
+                                                    array("H", placements).tobytes(), array("H", solution).tobytes(),
+                                                    solver, heuristic, max_nodes)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                result = (f"{type(error).__name__}: {error}", ERROR, 0, 0.0, False)
+            finally:
+                self.running -= 1
+                job.slot = None
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            moves, status, _, seconds, optimal = result
+            if status != ERROR:
+                self._solves += 1
+                self._solve_seconds += seconds
+                self._finished.append(time.monotonic())
+            if not job.future.done():
+                job.future.set_result(result)
+            if status == SOLVED and self.cache is not None and optimal:
+                await loop.run_in_executor(self._cache_thread, self.cache.put,
+                                           PackedNPuzzle.from_placements(width, list(placements), list(solution)),
+                                           [_DIRECTIONS[move] for move in moves])
+
+    def _reply(self, request: Dict[str, Any], status: str, **fields) -> Dict[str, Any]:
+        self.counts[status] += 1
+        reply = {"id": request.get("id"), "status": status}
+        reply.update((name, value) for name, value in fields.items() if value is not None)
+        return reply
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks: Dict[Any, asyncio.Task] = {}
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        # solves read but not yet admitted, by the order they arrived in; when admissions is full the reader pauses
+        waiting: Dict[int, Tuple[Dict[str, Any], float]] = {}
+        admissions: asyncio.Queue = asyncio.Queue(self.max_in_flight)
+        write_lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+
+        async def send(reply: Dict[str, Any]):
+            async with write_lock:
+                writer.write(json.dumps(reply).encode() + b"\n")
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    # the client has hung up, so there is nobody left to tell
+                    pass
+
+        async def answer(request: Dict[str, Any], entered: asyncio.Future, start_time: float):
+            job = None
+            try:
+                try:
+                    reply, job, deadline = await self._enter(request, start_time)
+                finally:
+                    if not entered.done():
+                        entered.set_result(None)
+                if reply is None:
+                    reply = await self._finish(request, job, deadline, start_time)
+            except asyncio.CancelledError:
+                reply = self._reply(request, CANCELLED, seconds=time.perf_counter() - start_time)
+            finally:
+                if job is not None:
+                    self._leave(job)
+                in_flight.release()
+                if tasks.get(request.get("id")) is asyncio.current_task():
+                    del tasks[request.get("id")]
+            await send(reply)
+
+        def answered(request: Dict[str, Any], entered: asyncio.Future, start_time: float, task: asyncio.Task):
+            # a task cancelled before it starts never runs answer, so its bookkeeping and reply happen here
+            if not task.cancelled() or entered.done():
+                return
+            entered.set_result(None)
+            in_flight.release()
+            if tasks.get(request.get("id")) is task:
+                del tasks[request.get("id")]
+            reply = self._reply(request, CANCELLED, seconds=time.perf_counter() - start_time)
+            loop.create_task(send(reply))
+
+        async def admit():
+            """Admit the connection's solves in order, each once the one before it is answered or queued"""
+            while True:
+                number = await admissions.get()
+                await in_flight.acquire()
+                if number not in waiting:
+                    # cancelled while it waited
+                    in_flight.release()
+                    continue
+                request, start_time = waiting.pop(number)
+                entered = loop.create_future()
+                task = tasks[request.get("id")] = asyncio.create_task(answer(request, entered, start_time))
+                task.add_done_callback(partial(answered, request, entered, start_time))
+                # a full queue holds up admission here, and the reader only once admissions is full too
+                await entered
+
+        admitter = asyncio.create_task(admit())
+        arrivals = 0
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    assert isinstance(request, dict), "a request must be a JSON object"
+                except (AssertionError, ValueError) as error:
+                    self.requests += 1
+                    await send(self._reply({}, ERROR, error=str(error)))
+                    continue
+                op = request.get("op", "solve")
+                if op == "solve":
+                    arrivals += 1
+                    waiting[arrivals] = (request, time.perf_counter())
+                    await admissions.put(arrivals)
+                elif op == "cancel":
+                    target = request.get("target")
+                    task = tasks.get(target)
+                    number = next((number for number, (solve, _) in waiting.items() if solve.get("id") == target),
+                                  None)
+                    if task is not None:
+                        task.cancel()
+                    elif number is not None:
+                        solve, start_time = waiting.pop(number)
+                        self.requests += 1
+                        await send(self._reply(solve, CANCELLED, seconds=time.perf_counter() - start_time))
+                    await send({"id": request.get("id"), "status": "ok",
+                                "cancelled": task is not None or number is not None})
+                elif op == "health":
+                    await send({"id": request.get("id"), **self.health()})
+                elif op == "metrics":
+                    await send({"id": request.get("id"), "status": "ok", **self.metrics()})
+                else:
+                    self.requests += 1
+                    await send(self._reply(request, ERROR, error=f"unknown op {op}"))
+        except (ConnectionError, asyncio.CancelledError):
+            # the connection is gone or the service is closing, and the handler ends quietly either way
+            pass
+        finally:
+            # a client that hangs up abandons what it asked for
+            admitter.cancel()
+            for task in list(tasks.values()):
+                task.cancel()
+            await asyncio.gather(admitter, *tasks.values(), return_exceptions=True)
+            writer.close()
+
+
+async def _serve(args):
+    async with SolverService(args.workers, args.max_queue, args.reject_when_full, args.max_in_flight) as service:
+        if args.unix:
+            server = await service.serve_unix(args.unix)
+        else:
+            server = await service.serve_tcp(args.host, args.port)
+        print(f"serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}", flush=True)
+        await server.serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve puzzle solving as JSON lines over TCP or a Unix socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, help="solver processes, defaults to the CPU count")
+    parser.add_argument("--max-queue", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=64,
+                        help="open solves a connection may have before its reader pauses")
+    parser.add_argument("--reject-when-full", action="store_true",
+                        help="answer overloaded when the queue is full instead of pausing readers")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
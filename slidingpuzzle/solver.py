@@ -1,11 +1,23 @@
 from __future__ import annotations
 import copy
 import math
-from collections import defaultdict
-from queue import PriorityQueue
-from typing import List, Optional
+import sys
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache, wraps
+from heapq import heappop, heappush
+from typing import Callable, List, Optional, Sequence, Tuple
 from abc import ABC, abstractmethod
-from .puzzle import NPuzzle, Action, SlideDirection
+from .puzzle import NPuzzle, PackedNPuzzle, SlidingPuzzle, Action, SlideDirection, batch_unpack_states, bits_per_tile
+from .instrumentation import Instrumentation, SearchStats
+from .moves import MoveAutomaton, legal_moves, move_automaton
+from .structures import BucketQueue, NodeStore
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
 
 
 class PuzzleNode:
@@ -40,6 +52,11 @@ class PuzzleNode:
 
 
 class NPuzzleHeuristic(ABC):
+    #: heuristics that implement h_delta can be updated from the parent's value instead of recomputed
+    incremental = False
+    #: whether h never overestimates, so that the optimal solvers return shortest solutions
+    admissible = True
+
     @staticmethod
     @abstractmethod
     def h(node: PuzzleNode) -> int:
@@ -52,30 +69,247 @@ class NPuzzleHeuristic(ABC):
     def f(self, node: PuzzleNode) -> int:
         return self.g(node) + self.h(node)
 
+    def h_delta(self, puzzle: NPuzzle | PackedNPuzzle, tile: int, start: int, end: int) -> int:
+        """Change in h when tile slid from cell start to cell end, where puzzle is the board after the slide"""
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental evaluation")
+
+    def h_batch(self, placements, solution: Sequence[int], n_cols: Optional[int] = None) -> np.ndarray:
+        """
+        h of every row of an (m, cells) array of placements, all with the same solution, as an integer array.
+        Boards are square unless n_cols is given. This version calls h once per board; heuristics that can
+        score many boards in one vectorized call override it.
+        """
+        solution = list(solution)
+        n_cols = n_cols or math.isqrt(len(solution))
+        n_rows = len(solution) // n_cols
+        boards = (NPuzzle(n_cols, list(row), solution) if n_rows == n_cols
+                  else SlidingPuzzle(n_rows, n_cols, list(row), solution) for row in np.asarray(placements).tolist())
+        return np.array([self.h(PuzzleNode(board, [], [], None, None)) for board in boards], dtype=np.int64)
+
+
+GoalTables = namedtuple("GoalTables", "goal_rows goal_cols distances")
+
+
+@lru_cache(maxsize=64)
+def goal_tables(width: int, solution: Tuple[int, ...]) -> GoalTables:
+    """Goal row and column of every tile and its Manhattan distance from every cell"""
+    goal_rows, goal_cols = [0] * len(solution), [0] * len(solution)
+    for index, tile in enumerate(solution):
+        goal_rows[tile], goal_cols[tile] = divmod(index, width)
+    distances = [[abs(index // width - goal_rows[tile]) + abs(index % width - goal_cols[tile]) if tile else 0
+                  for index in range(len(solution))]
+                 for tile in range(len(solution))]
+    return GoalTables(goal_rows, goal_cols, distances)
+
+
+@lru_cache(maxsize=64)
+def _distance_array(width: int, solution: Tuple[int, ...]) -> np.ndarray:
+    """goal_tables distances as a (tile, cell) NumPy array"""
+    return np.array(goal_tables(width, solution).distances, dtype=np.int64)
+
 
 class ManhattanHeuristic(NPuzzleHeuristic):
+    incremental = True
+
+    def __init__(self):
+        self._solution = None
+        self._tables = None
+
+    def _goal_tables(self, puzzle: NPuzzle | PackedNPuzzle) -> GoalTables:
+        # children usually share their parent's solution, so skip the lookup when it is the same object
+        if puzzle.solution is not self._solution:
+            self._tables = goal_tables(puzzle.n_cols, tuple(puzzle.solution))
+            self._solution = puzzle.solution
+        return self._tables
+
     def h(self, node: PuzzleNode) -> int:
-        return self._manhattan_distance(node.puzzle)
+        distances = self._goal_tables(node.puzzle).distances
+        return sum(distances[tile][index] for index, tile in enumerate(node.puzzle.placements))
+
+    def h_delta(self, puzzle: NPuzzle | PackedNPuzzle, tile: int, start: int, end: int) -> int:
+        distances = self._goal_tables(puzzle).distances[tile]
+        return distances[end] - distances[start]
+
+    def h_batch(self, placements, solution: Sequence[int], n_cols: Optional[int] = None) -> np.ndarray:
+        distances = _distance_array(n_cols or math.isqrt(len(solution)), tuple(solution))
+        placements = np.asarray(placements, dtype=np.intp)
+        return distances[placements, np.arange(placements.shape[1])].sum(axis=1)
 
     @staticmethod
     def _manhattan_distance(puzzle: NPuzzle) -> int:
-        return sum(abs(b % 3 - g % 3) + abs(b // 3 - g // 3)
-                   for b, g in ((puzzle.placements.index(i), puzzle.solution.index(i))
-                                for i in range(1, puzzle.n+1)))
+        distances = goal_tables(puzzle.n_cols, tuple(puzzle.solution)).distances
+        return sum(distances[tile][index] for index, tile in enumerate(puzzle.placements))
+
+
+def _line_conflicts(tiles: Sequence[int], line: int, goal_lines: List[int], goal_offsets: List[int]) -> int:
+    """
+    Extra moves forced by tiles that are in their goal line but in the wrong order:
+    two for every tile outside the longest correctly ordered subsequence.
+    """
+    tails = []
+    count = 0
+    for tile in tiles:
+        if tile and goal_lines[tile] == line:
+            count += 1
+            offset = goal_offsets[tile]
+            position = bisect_left(tails, offset)
+            if position == len(tails):
+                tails.append(offset)
+            else:
+                tails[position] = offset
+    return 2 * (count - len(tails))
+
+
+class LinearConflictHeuristic(ManhattanHeuristic):
+    """Manhattan distance plus linear conflicts in every row and column"""
+    # the conflicts are not vectorized, so batches are scored one board at a time
+    h_batch = NPuzzleHeuristic.h_batch
+
+    def h(self, node: PuzzleNode) -> int:
+        puzzle = node.puzzle
+        width = puzzle.n_cols
+        goal_rows, goal_cols, distances = self._goal_tables(puzzle)
+        placements = puzzle.placements
+        total = sum(distances[tile][index] for index, tile in enumerate(placements))
+        for line in range(len(placements) // width):
+            total += _line_conflicts(placements[line * width:(line + 1) * width], line, goal_rows, goal_cols)
+        for line in range(width):
+            total += _line_conflicts(placements[line::width], line, goal_cols, goal_rows)
+        return total
+
+    def h_delta(self, puzzle: NPuzzle | PackedNPuzzle, tile: int, start: int, end: int) -> int:
+        width = puzzle.n_cols
+        goal_rows, goal_cols, distances = self._goal_tables(puzzle)
+        placements = puzzle.placements
+        delta = distances[tile][end] - distances[tile][start]
+        if start % width == end % width:
+            # a vertical slide only changes the rows it leaves and enters
+            lines = [start // width, end // width]
+            cells = [placements[line * width:(line + 1) * width] for line in lines]
+            goal_lines, goal_offsets = goal_rows, goal_cols
+            start_offset, end_offset = start % width, end % width
+        else:
+            lines = [start % width, end % width]
+            cells = [placements[line::width] for line in lines]
+            goal_lines, goal_offsets = goal_cols, goal_rows
+            start_offset, end_offset = start // width, end // width
+        delta += sum(_line_conflicts(line_cells, line, goal_lines, goal_offsets)
+                     for line, line_cells in zip(lines, cells))
+        # rebuild both lines as they were before the slide
+        cells[0][start_offset] = tile
+        cells[1][end_offset] = 0
+        delta -= sum(_line_conflicts(line_cells, line, goal_lines, goal_offsets)
+                     for line, line_cells in zip(lines, cells))
+        return delta
+
+
+class SearchBudget:
+    """
+    Limits on a single solve. A solver that runs out gives up and sets budget_exhausted; it returns False, or the
+    best solution found so far if it finds improving solutions. max_memory is in bytes and is compared against
+    the solver's own estimate of the memory its nodes and tables hold. stop is called with the clock and ends the
+    search once it returns True, so another thread or process can interrupt a solve.
+    """
+    def __init__(self, max_nodes: Optional[int] = None, time_limit: Optional[float] = None,
+                 check_interval: int = 1024, max_memory: Optional[int] = None,
+                 stop: Optional[Callable[[], bool]] = None):
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        # the clock, the memory estimate and stop are only read every check_interval nodes
+        self.check_interval = check_interval
+        self.max_memory = max_memory
+        self.stop = stop
+
+
+#: size of a packed state or small tuple held in a solver's hash tables and lists
+_ENTRY_BYTES = 40
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+def instrumented(solve):
+    """Wrap a solve method so that a solver's instrumentation sees it start and finish"""
+    @wraps(solve)
+    def wrapper(self):
+        if self.instrumentation is None:
+            return solve(self)
+        self.instrumentation.start(self)
+        solution = solve(self)
+        self.stats = self.instrumentation.finish(self, solution)
+        return solution
+    return wrapper
 
 
 class NPuzzleSolver(ABC):
-    def __init__(self, puzzle: NPuzzle):
-        assert isinstance(puzzle, NPuzzle), "puzzle must be an NPuzzle"
+    #: whether every solution the solver returns is a shortest one
+    optimal = True
+    #: the puzzle representations the solver accepts
+    puzzle_types: Tuple[type, ...] = (NPuzzle, PackedNPuzzle)
+
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, budget: Optional[SearchBudget] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        assert isinstance(puzzle, self.puzzle_types), \
+            f"puzzle must be one of {', '.join(kind.__name__ for kind in self.puzzle_types)}"
         self.puzzle = puzzle
         self.solution_node = None
+        # solvers that keep their nodes in a NodeStore record the solution node as its index
+        self.nodes: Optional[NodeStore] = None
         self.num_nodes_explored = 0
+        self.budget = budget
+        self.budget_exhausted = False
+        self._deadline = None
+        # hash tables and lists counted by _memory_in_use besides the node store
+        self._containers: list = []
+        self.instrumentation = instrumentation
+        # the SearchStats of the last solve, when instrumented
+        self.stats: Optional[SearchStats] = None
 
     @abstractmethod
     def solve(self) -> List[SlideDirection] | bool:
         pass
 
+    def solution_is_optimal(self) -> bool:
+        """Whether the last solution is known to be a shortest one, which callers check before caching it"""
+        heuristic = getattr(self, "heuristic", None)
+        return self.optimal and (heuristic is None or heuristic.admissible)
+
+    def _start_budget(self):
+        if self.budget is not None and self.budget.time_limit is not None:
+            self._deadline = time.monotonic() + self.budget.time_limit
+
+    def _out_of_budget(self) -> bool:
+        """Checked once per expanded node by solvers that have a budget"""
+        budget = self.budget
+        nodes = self.num_nodes_explored
+        if budget.max_nodes is not None and nodes >= budget.max_nodes:
+            self.budget_exhausted = True
+        elif nodes % budget.check_interval == 0:
+            self._check_limits()
+        return self.budget_exhausted
+
+    def _check_limits(self) -> bool:
+        """Checks the clock, the memory estimate and stop, which are too slow to read for every node"""
+        budget = self.budget
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self.budget_exhausted = True
+        elif budget.max_memory is not None and self._memory_in_use() >= budget.max_memory:
+            self.budget_exhausted = True
+        elif budget.stop is not None and budget.stop():
+            self.budget_exhausted = True
+        return self.budget_exhausted
+
+    def _memory_in_use(self) -> int:
+        """Rough bytes held by the search: the node store, plus each container and an integer per entry"""
+        used = self.nodes.nbytes if self.nodes is not None else 0
+        for container in self._containers:
+            used += sys.getsizeof(container) + len(container) * _ENTRY_BYTES
+        return used
+
     def _backtrack_solution_node(self) -> List[SlideDirection]:
+        if self.nodes is not None and self.solution_node is not None:
+            return self.nodes.path(self.solution_node)
         if self.solution_node:
             solution = []
             current = self.solution_node
@@ -88,75 +322,465 @@ class NPuzzleSolver(ABC):
 
 
 class BFSNPuzzleSolver(NPuzzleSolver):
+    @instrumented
     def solve(self) -> List[SlideDirection] | bool:
-        root = PuzzleNode(self.puzzle, [], [], None, None)
+        root = _packed(self.puzzle)
+        width, bits = root.width, bits_per_tile(root.width)
+        mask = (1 << bits) - 1
+        self.nodes = nodes = NodeStore(bits * width * width)
+        nodes.add(root.state, root.blank, -1, 0, 0)
 
-        if root.puzzle.is_solved():
-            self.solution_node = root
+        if root.is_solved():
+            self.solution_node = 0
             return self._backtrack_solution_node()
         self.num_nodes_explored += 1
 
-        frontier = [root]
-        reached = {self.puzzle}
-        while frontier:
-            current = frontier.pop(0)
+        self._start_budget()
+        budgeted = self.budget is not None
+        moves = legal_moves(width, width)
+        states, blanks, parents, g_values = nodes.states, nodes.blanks, nodes.parents, nodes.g_values
+        reached = {root.state}
+        self._containers = [reached]
+        instrumentation = self.instrumentation
+        instrumented = instrumentation is not None
+        # nodes are stored in the order they are reached, so the store doubles as the queue
+        current = 0
+        while current < len(nodes):
+            state, blank, g = states[current], blanks[current], g_values[current]
             self.num_nodes_explored += 1
-            for slide_direction in SlideDirection:
-                child_state = current.puzzle.slide(slide_direction)
-                # Expand the tree
-                child_node = PuzzleNode(child_state, [], [], current, slide_direction)
-                current.children.append(child_node)
-                current.actions_to_get_children.append(slide_direction)
-
-                if child_state.is_solved():
-                    self.solution_node = child_node
-                    return self._backtrack_solution_node()
-                if child_state not in reached:
-                    reached.add(child_state)
-                    frontier.append(child_node)
+            if budgeted and self._out_of_budget():
+                return False
+            if instrumented:
+                instrumentation.expand(state, g, 0, len(nodes) - current, current)
+            parent = parents[current]
+            previous_blank = blanks[parent] if parent >= 0 else -1
+            for move, start in moves[blank]:
+                # moving the blank back where it came from only recreates the parent
+                if start == previous_blank:
+                    continue
+                tile = (state >> (start * bits)) & mask
+                child = state ^ (tile << (start * bits)) ^ (tile << (blank * bits))
+                if child not in reached:
+                    reached.add(child)
+                    index = nodes.add(child, start, current, move, g + 1)
+                    if instrumented:
+                        instrumentation.generate(child, g + 1, 0)
+                    if child == root.goal:
+                        self.solution_node = index
+                        return self._backtrack_solution_node()
+                elif instrumented:
+                    instrumentation.duplicate(child, g + 1)
+            current += 1
         return False
 
 
 class AStarNPuzleSolver(NPuzzleSolver):
-    def __init__(self, puzzle: NPuzzle, heuristic: NPuzzleHeuristic):
-        super().__init__(puzzle)
+    """A* over a BucketQueue open list, so the heuristic must return non-negative integers"""
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
         self.heuristic = heuristic
 
+    @instrumented
     def solve(self) -> List[SlideDirection] | bool:
-        node_id = 0
-        start = PuzzleNode(self.puzzle, [], [], None, None)
-        nodes = {node_id: start}
-        unvisited = PriorityQueue()
-        unvisited.put((math.inf, node_id))
+        root = _packed(self.puzzle)
+        width, bits, goal, solution = root.width, bits_per_tile(root.width), root.goal, root.solution
+        mask = (1 << bits) - 1
+        self.nodes = nodes = NodeStore(bits * width * width)
+        nodes.add(root.state, root.blank, -1, 0, 0)
+        root_h = self.heuristic.h(PuzzleNode(root, [], [], None, None))
+        unvisited = BucketQueue()
+        unvisited.push(root_h, 0, 0)
+        # best g found for every generated state, so stale and duplicate entries are dropped on sight
+        g_score = {root.state: 0}
         visited = set()
+        self._containers = [g_score, visited, unvisited]
 
-        g_score = defaultdict(lambda: math.inf)
-        g_score[start] = 0
-
-        f_score = defaultdict(lambda: math.inf)
-        f_score[start] = self.heuristic.h(start)
-
+        incremental = self.heuristic.incremental
+        moves = legal_moves(width, width)
+        directions = list(SlideDirection)
+        states, blanks, parents = nodes.states, nodes.blanks, nodes.parents
+        self._start_budget()
+        budgeted = self.budget is not None
+        instrumentation = self.instrumentation
+        instrumented = instrumentation is not None
+        timing = instrumented and instrumentation.time_phases
+        lap = 0.0
         while unvisited:
-            current = nodes[unvisited.get()[1]]
+            if timing:
+                lap = time.perf_counter()
+            f, g, current = unvisited.pop()
+            if timing:
+                lap = instrumentation.lap("queue", lap)
+            state = states[current]
+            if g > g_score[state] or state in visited:
+                continue
+            h = f - g
             self.num_nodes_explored += 1
-            if current.puzzle.is_solved():
+            if budgeted and self._out_of_budget():
+                return False
+            if state == goal:
                 self.solution_node = current
                 return self._backtrack_solution_node()
+            visited.add(state)
+            if instrumented:
+                instrumentation.expand(state, g, h, len(unvisited), len(visited))
 
-            for direction in SlideDirection:
-                node_id += 1
-                child_puzzle = current.puzzle.slide(direction)
-                child = PuzzleNode(child_puzzle, [], [], current, direction)
-                current.children.append(child)
-                current.actions_to_get_children.append(direction)
-                if child_puzzle not in visited:
-                    tentative_g_score = g_score[current] + 1
-
-                    if tentative_g_score < g_score[child]:
-                        g_score[child] = tentative_g_score
-                        f_score[child] = tentative_g_score + self.heuristic.h(child)
-                    nodes[node_id] = child
-                    unvisited.put((f_score[child], node_id))
-
-            visited.add(current.puzzle)
+            blank, child_g = blanks[current], g + 1
+            parent = parents[current]
+            previous_blank = blanks[parent] if parent >= 0 else -1
+            for move, start in moves[blank]:
+                if start == previous_blank:
+                    continue
+                if timing:
+                    lap = time.perf_counter()
+                tile = (state >> (start * bits)) & mask
+                child = state ^ (tile << (start * bits)) ^ (tile << (blank * bits))
+                if child in visited or child_g >= g_score.get(child, math.inf):
+                    if instrumented:
+                        instrumentation.duplicate(child, child_g)
+                    continue
+                g_score[child] = child_g
+                index = nodes.add(child, start, current, move, child_g)
+                child_puzzle = PackedNPuzzle(width, child, start, goal, solution)
+                if timing:
+                    lap = instrumentation.lap("move_generation", lap)
+                if incremental:
+                    child_h = h + self.heuristic.h_delta(child_puzzle, tile, start, blank)
+                else:
+                    child_h = self.heuristic.h(PuzzleNode(child_puzzle, [], [], None, directions[move]))
+                if timing:
+                    lap = instrumentation.lap("heuristic", lap)
+                unvisited.push(child_g + child_h, child_g, index)
+                if timing:
+                    instrumentation.lap("queue", lap)
+                if instrumented:
+                    instrumentation.generate(child, child_g, child_h)
+        return False
+
+
+class BatchAStarNPuzzleSolver(NPuzzleSolver):
+    """
+    A* that pops up to batch_size nodes at a time, expands them together and scores all their children with a
+    single heuristic.h_batch call, for heuristics such as neural networks whose cost is dominated by the call
+    rather than the board. A batch may run past the lowest f, so nodes reached again by a shorter path are
+    reopened, and the goal is only accepted as the first node of a batch; the solution is optimal for an
+    admissible heuristic. Larger batches expand some nodes an ordinary A* would not.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic, batch_size: int = 256,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        assert batch_size > 0, "batch_size must be positive"
+        self.heuristic = heuristic
+        self.batch_size = batch_size
+        self.num_batches = 0
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        if np is None:
+            raise ImportError("NumPy is required for BatchAStarNPuzzleSolver")
+        root = _packed(self.puzzle)
+        width, bits, goal, solution = root.width, bits_per_tile(root.width), root.goal, root.solution
+        mask = (1 << bits) - 1
+        self.nodes = nodes = NodeStore(bits * width * width)
+        nodes.add(root.state, root.blank, -1, 0, 0)
+        unvisited = BucketQueue()
+        unvisited.push(int(self.heuristic.h_batch(batch_unpack_states(width, [root.state]), solution)[0]), 0, 0)
+        g_score = {root.state: 0}
+        visited = set()
+        self._containers = [g_score, visited, unvisited]
+
+        moves = legal_moves(width, width)
+        states, blanks, parents = nodes.states, nodes.blanks, nodes.parents
+        self._start_budget()
+        budgeted = self.budget is not None
+        instrumentation = self.instrumentation
+        instrumented = instrumentation is not None
+        while unvisited:
+            batch = []
+            while unvisited and len(batch) < self.batch_size:
+                f, g, current = unvisited.pop()
+                state = states[current]
+                if g > g_score[state] or state in visited:
+                    continue
+                if state == goal:
+                    if batch:
+                        # nodes ahead of it in this batch may still lead to a shorter solution
+                        unvisited.push(f, g, current)
+                        break
+                    self.solution_node = current
+                    return self._backtrack_solution_node()
+                self.num_nodes_explored += 1
+                if budgeted and self._out_of_budget():
+                    return False
+                visited.add(state)
+                if instrumented:
+                    instrumentation.expand(state, g, f - g, len(unvisited), len(visited))
+                batch.append((current, state, g))
+            self.num_batches += 1
+
+            children = []
+            for current, state, g in batch:
+                blank, child_g = blanks[current], g + 1
+                parent = parents[current]
+                previous_blank = blanks[parent] if parent >= 0 else -1
+                for move, start in moves[blank]:
+                    if start == previous_blank:
+                        continue
+                    tile = (state >> (start * bits)) & mask
+                    child = state ^ (tile << (start * bits)) ^ (tile << (blank * bits))
+                    if child_g >= g_score.get(child, math.inf):
+                        if instrumented:
+                            instrumentation.duplicate(child, child_g)
+                        continue
+                    g_score[child] = child_g
+                    visited.discard(child)
+                    children.append(nodes.add(child, start, current, move, child_g))
+            if not children:
+                continue
+            child_states = [states[index] for index in children]
+            child_h = self.heuristic.h_batch(batch_unpack_states(width, child_states), solution).tolist()
+            for index, child, h in zip(children, child_states, child_h):
+                child_g = nodes.g_values[index]
+                # a later sibling may have reached the same board by a shorter path
+                if child_g == g_score[child]:
+                    unvisited.push(child_g + h, child_g, index)
+                    if instrumented:
+                        instrumentation.generate(child, child_g, h)
+        return False
+
+
+class IDAStarNPuzzleSolver(NPuzzleSolver):
+    """
+    Iterative-deepening A* that applies and undoes slides on a single mutable board, so memory stays O(depth).
+    Iterative deepening never runs out of nodes, so unsolvable puzzles are turned away up front by is_solvable.
+
+    Children are generated through a MoveAutomaton of pruning_depth, which skips moves that undo the
+    previous one and, for depths above 2, the last move of longer redundant sequences.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic,
+                 budget: Optional[SearchBudget] = None, pruning_depth: int = 8,
+                 instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        self.heuristic = heuristic
+        self.pruning_depth = pruning_depth
+        self.automaton = move_automaton(pruning_depth)
+        self.iterations = 0
+        self.nodes_per_threshold: List[Tuple[int, int]] = []
+        self.nodes_per_second = 0.0
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        width = self.puzzle.n_cols
+        board = NPuzzle(width, list(self.puzzle.placements), list(self.puzzle.solution))
+        if not board.is_solvable():
+            return False
+        node = PuzzleNode(board, [], [], None, None)
+        placements = board.placements
+        directions = list(SlideDirection)
+        moves = [[(move, start, directions[move]) for move, start in cells] for cells in legal_moves(width, width)]
+        transitions = self.automaton.transitions
+        pruned = MoveAutomaton.PRUNED
+        path: List[SlideDirection] = []
+        found = -1
+
+        incremental = self.heuristic.incremental
+        budgeted = self.budget is not None
+        instrumentation = self.instrumentation
+        instrumented = instrumentation is not None
+        timing = instrumented and instrumentation.time_phases
+
+        def search(g: int, h: int, blank: int, state: int) -> int:
+            self.num_nodes_explored += 1
+            if budgeted and self._out_of_budget():
+                raise _OutOfBudget()
+            f = g + h
+            if f > threshold:
+                return f
+            if board.is_solved():
+                return found
+            if instrumented:
+                # the path is the only list IDA* keeps
+                instrumentation.expand(board, g, h, 0, len(path))
+            minimum = math.inf
+            for move, start, direction in moves[blank]:
+                child_state = transitions[state][move]
+                if child_state == pruned:
+                    if instrumented:
+                        instrumentation.duplicate(board, g + 1)
+                    continue
+                if timing:
+                    lap = time.perf_counter()
+                # make the move in place
+                tile = placements[start]
+                placements[blank] = tile
+                placements[start] = 0
+                path.append(direction)
+                if timing:
+                    lap = instrumentation.lap("move_generation", lap)
+                child_h = h + self.heuristic.h_delta(board, tile, start, blank) if incremental else self.heuristic.h(node)
+                if timing:
+                    instrumentation.lap("heuristic", lap)
+                if instrumented:
+                    instrumentation.generate(board, g + 1, child_h)
+                result = search(g + 1, child_h, start, child_state)
+                if result == found:
+                    return found
+                # and undo it
+                path.pop()
+                placements[start] = placements[blank]
+                placements[blank] = 0
+                minimum = min(minimum, result)
+            return minimum
+
+        start_time = time.perf_counter()
+        self._start_budget()
+        root_h = self.heuristic.h(node)
+        threshold = root_h
+        while True:
+            self.iterations += 1
+            nodes_before = self.num_nodes_explored
+            try:
+                result = search(0, root_h, placements.index(0), MoveAutomaton.START)
+            except _OutOfBudget:
+                result = math.inf
+            self.nodes_per_threshold.append((threshold, self.num_nodes_explored - nodes_before))
+            if result == found or result == math.inf:
+                break
+            if instrumented:
+                instrumentation.threshold(threshold, result)
+            threshold = result
+        elapsed = time.perf_counter() - start_time
+        self.nodes_per_second = self.num_nodes_explored / elapsed if elapsed > 0 else math.inf
+        return path if result == found else False
+
+
+def _packed(puzzle: NPuzzle | PackedNPuzzle) -> PackedNPuzzle:
+    return puzzle if isinstance(puzzle, PackedNPuzzle) else puzzle.pack()
+
+
+def _reversed_puzzle(puzzle: PackedNPuzzle) -> PackedNPuzzle:
+    """The solution as a puzzle whose goal is the starting board, for searching backwards"""
+    return PackedNPuzzle(puzzle.width, puzzle.goal, puzzle.solution.index(0), puzzle.state, tuple(puzzle.placements))
+
+
+def _join_paths(forward_parents: dict, backward_parents: dict, meet: int) -> List[SlideDirection]:
+    """Forward moves from the start to meet, followed by the backward moves from meet inverted and reversed"""
+    path = []
+    state = meet
+    while forward_parents[state][0] is not None:
+        state, direction = forward_parents[state][:2]
+        path.append(direction)
+    path.reverse()
+    state = meet
+    while backward_parents[state][0] is not None:
+        state, direction = backward_parents[state][:2]
+        path.append(direction.inverse)
+    return path
+
+
+class BidirectionalBFSNPuzzleSolver(NPuzzleSolver):
+    """
+    Breadth-first search from the puzzle and from its solution at once, always growing the smaller frontier
+    by a full layer, until the two meet. This explores about 2 b^(d/2) instead of b^d boards.
+    """
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        forward = _packed(self.puzzle)
+        if forward.is_solved():
+            return []
+        backward = _reversed_puzzle(forward)
+        # state -> (parent state, direction from the parent, depth)
+        parents = ({forward.state: (None, None, 0)}, {backward.state: (None, None, 0)})
+        frontiers = ([forward], [backward])
+        depths = [0, 0]
+        self._start_budget()
+        budgeted = self.budget is not None
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            own, other = parents[side], parents[1 - side]
+            depth = depths[side] + 1
+            best_length, meet = math.inf, None
+            next_frontier = []
+            for puzzle in frontiers[side]:
+                self.num_nodes_explored += 1
+                if budgeted and self._out_of_budget():
+                    return False
+                for direction in SlideDirection:
+                    child = puzzle.slide(direction)
+                    if child is puzzle or child.state in own:
+                        continue
+                    own[child.state] = (puzzle.state, direction, depth)
+                    next_frontier.append(child)
+                    if child.state in other and depth + other[child.state][2] < best_length:
+                        best_length, meet = depth + other[child.state][2], child.state
+            # finish the layer before stopping, since a later meeting in it may be shorter
+            if meet is not None:
+                return _join_paths(parents[0], parents[1], meet)
+            frontiers[side][:] = next_frontier
+            depths[side] = depth
         return False
+
+
+class BidirectionalAStarNPuzzleSolver(NPuzzleSolver):
+    """
+    Front-to-end bidirectional A*: the backward search estimates the distance to the starting board with the
+    same heuristic. It stops once the best meeting cost is no more than the larger of the two smallest f values,
+    so the solution is optimal for an admissible heuristic.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        self.heuristic = heuristic
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        forward = _packed(self.puzzle)
+        if forward.is_solved():
+            return []
+        backward = _reversed_puzzle(forward)
+        g_scores = ({forward.state: 0}, {backward.state: 0})
+        parents = ({forward.state: (None, None)}, {backward.state: (None, None)})
+        opens = ([], [])
+        counter = 0
+        for side, puzzle in enumerate((forward, backward)):
+            h = self.heuristic.h(PuzzleNode(puzzle, [], [], None, None))
+            opens[side].append((h, h, counter, 0, puzzle))
+            counter += 1
+
+        incremental = self.heuristic.incremental
+        best_cost, meet = math.inf, None
+        self._start_budget()
+        budgeted = self.budget is not None
+        while opens[0] and opens[1]:
+            if best_cost <= max(opens[0][0][0], opens[1][0][0]):
+                break
+            side = 0 if len(opens[0]) <= len(opens[1]) else 1
+            _, h, _, g, puzzle = heappop(opens[side])
+            own, other = g_scores[side], g_scores[1 - side]
+            if g > own[puzzle.state]:
+                continue
+            self.num_nodes_explored += 1
+            if budgeted and self._out_of_budget():
+                return False
+            for direction in SlideDirection:
+                child = puzzle.slide(direction)
+                if child is puzzle:
+                    continue
+                child_g = g + 1
+                if child_g >= own.get(child.state, math.inf):
+                    continue
+                own[child.state] = child_g
+                parents[side][child.state] = (puzzle.state, direction)
+                if incremental:
+                    child_h = h + self.heuristic.h_delta(child, child.placements[puzzle.blank], child.blank,
+                                                         puzzle.blank)
+                else:
+                    child_h = self.heuristic.h(PuzzleNode(child, [], [], None, direction))
+                counter += 1
+                heappush(opens[side], (child_g + child_h, child_h, counter, child_g, child))
+                if child.state in other and child_g + other[child.state] < best_cost:
+                    best_cost, meet = child_g + other[child.state], child.state
+        if meet is None:
+            return False
+        return _join_paths(parents[0], parents[1], meet)
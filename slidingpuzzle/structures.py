@@ -0,0 +1,113 @@
+from __future__ import annotations
+from array import array
+from typing import List, Tuple
+from .puzzle import SlideDirection
+
+_DIRECTIONS = list(SlideDirection)
+
+
+class NodeStore:
+    """
+    Search nodes kept as parallel arrays instead of PuzzleNode objects: packed state, blank cell,
+    parent index, move from the parent (an index into SlideDirection) and g. A node is its index.
+    Boards that do not fit in 64 bits keep their states in a plain list.
+    """
+    __slots__ = ("states", "blanks", "parents", "moves", "g_values")
+
+    def __init__(self, state_bits: int = 64):
+        self.states = array("Q") if state_bits <= 64 else []
+        self.blanks = array("H")
+        self.parents = array("q")
+        self.moves = array("B")
+        self.g_values = array("I")
+
+    def add(self, state: int, blank: int, parent: int, move: int, g: int) -> int:
+        """Append a node and return its index; the root has parent -1"""
+        self.states.append(state)
+        self.blanks.append(blank)
+        self.parents.append(parent)
+        self.moves.append(move)
+        self.g_values.append(g)
+        return len(self.moves) - 1
+
+    def path(self, index: int) -> List[SlideDirection]:
+        """Slides from the root to the node, following parent indices"""
+        moves = []
+        while self.parents[index] >= 0:
+            moves.append(_DIRECTIONS[self.moves[index]])
+            index = self.parents[index]
+        moves.reverse()
+        return moves
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays"""
+        arrays = (self.blanks, self.parents, self.moves, self.g_values)
+        states = len(self.states) * 8 if isinstance(self.states, list) else len(self.states) * self.states.itemsize
+        return states + sum(len(values) * values.itemsize for values in arrays)
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+
+class BucketQueue:
+    """
+    Open list for small non-negative integer priorities such as f = g + h.
+
+    There is one bucket per f, and each bucket holds one stack per g. Popping takes the lowest f and,
+    within it, the highest g (equivalently the lowest h) when prefer_deeper is set, so ties go to the
+    nodes closest to a goal. Push and pop are amortized O(1) and nothing is locked.
+    """
+    __slots__ = ("buckets", "min_f", "size", "prefer_deeper")
+
+    def __init__(self, prefer_deeper: bool = True):
+        self.buckets: List[List[list]] = []
+        self.min_f = 0
+        self.size = 0
+        self.prefer_deeper = prefer_deeper
+
+    def push(self, f: int, g: int, item):
+        buckets = self.buckets
+        while len(buckets) <= f:
+            buckets.append([])
+        bucket = buckets[f]
+        while len(bucket) <= g:
+            bucket.append([])
+        bucket[g].append(item)
+        if f < self.min_f or self.size == 0:
+            self.min_f = f
+        self.size += 1
+
+    def pop(self) -> Tuple[int, int, object]:
+        """Remove and return (f, g, item) with the lowest f"""
+        if not self.size:
+            raise IndexError("pop from an empty BucketQueue")
+        buckets = self.buckets
+        f = self.min_f
+        while not buckets[f]:
+            f += 1
+        self.min_f = f
+        bucket = buckets[f]
+        if self.prefer_deeper:
+            # trailing empty stacks are dropped so the deepest one is always last
+            while not bucket[-1]:
+                bucket.pop()
+            g = len(bucket) - 1
+        else:
+            g = 0
+            while not bucket[g]:
+                g += 1
+        item = bucket[g].pop()
+        if self.prefer_deeper:
+            while bucket and not bucket[-1]:
+                bucket.pop()
+        elif not any(bucket):
+            bucket.clear()
+        self.size -= 1
+        return f, g, item
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
@@ -0,0 +1,307 @@
+"""
+Solvers that trade optimality for speed: weighted A*, focal search, greedy best-first search, beam search and
+anytime weighted A*, which keeps improving its solution until it is proven optimal or the budget runs out.
+"""
+from __future__ import annotations
+import math
+import time
+from array import array
+from heapq import heappop, heappush, nsmallest
+from typing import Iterator, List, Optional
+from .instrumentation import Instrumentation
+from .moves import legal_moves
+from .puzzle import NPuzzle, PackedNPuzzle, SlideDirection, bits_per_tile
+from .solver import NPuzzleHeuristic, NPuzzleSolver, PuzzleNode, SearchBudget, _packed, instrumented
+from .structures import NodeStore
+
+_DIRECTIONS = list(SlideDirection)
+
+
+class _HeuristicSearch(NPuzzleSolver):
+    """Node storage, child generation and heuristic evaluation shared by the solvers in this module"""
+    optimal = False
+
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, budget, instrumentation)
+        self.heuristic = heuristic
+
+    def _setup(self) -> PackedNPuzzle:
+        root = _packed(self.puzzle)
+        self._root = root
+        self._bits = bits_per_tile(root.width)
+        self._mask = (1 << self._bits) - 1
+        self._moves = legal_moves(root.width, root.width)
+        self.nodes = NodeStore(self._bits * root.width * root.width)
+        self.nodes.add(root.state, root.blank, -1, 0, 0)
+        self.h_values = array("I", [self.heuristic.h(PuzzleNode(root, [], [], None, None))])
+        return root
+
+    def _children(self, current: int):
+        """(state, blank, move, child h) for every child that does not recreate the parent"""
+        nodes, root, bits, mask = self.nodes, self._root, self._bits, self._mask
+        state, blank = nodes.states[current], nodes.blanks[current]
+        parent = nodes.parents[current]
+        previous_blank = nodes.blanks[parent] if parent >= 0 else -1
+        h = self.h_values[current]
+        for move, start in self._moves[blank]:
+            if start == previous_blank:
+                continue
+            tile = (state >> (start * bits)) & mask
+            child = state ^ (tile << (start * bits)) ^ (tile << (blank * bits))
+            child_puzzle = PackedNPuzzle(root.width, child, start, root.goal, root.solution)
+            if self.heuristic.incremental:
+                child_h = h + self.heuristic.h_delta(child_puzzle, tile, start, blank)
+            else:
+                child_h = self.heuristic.h(PuzzleNode(child_puzzle, [], [], None, _DIRECTIONS[move]))
+            yield child, start, move, child_h
+
+    def _add(self, state: int, blank: int, parent: int, move: int, g: int, h: int) -> int:
+        self.h_values.append(h)
+        return self.nodes.add(state, blank, parent, move, g)
+
+    def _expand_node(self, current: int, open_size: int, closed_size: int) -> bool:
+        """Count an expansion and report whether the budget ran out"""
+        self.num_nodes_explored += 1
+        if self.instrumentation is not None:
+            self.instrumentation.expand(self.nodes.states[current], self.nodes.g_values[current],
+                                        self.h_values[current], open_size, closed_size)
+        return self.budget is not None and self._out_of_budget()
+
+
+class WeightedAStarNPuzzleSolver(_HeuristicSearch):
+    """
+    Best-first search on g + weight * h. With a consistent, admissible heuristic the solution is at most
+    weight times longer than optimal even though closed boards are never reopened.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic, weight: float = 2.0,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, heuristic, budget, instrumentation)
+        assert weight >= 1, "weights below 1 only slow the search down"
+        self.weight = weight
+
+    def _priority(self, g: int, h: int) -> float:
+        return g + self.weight * h
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        for solution in self._search(anytime=False):
+            return solution
+        return False
+
+    def _search(self, anytime: bool) -> Iterator[List[SlideDirection]]:
+        """
+        Yield each solution shorter than the last. Unless anytime is set the search stops at the first; otherwise
+        it prunes every node whose g + h cannot beat the incumbent and ends once nothing is left to prune.
+        """
+        root = self._setup()
+        nodes, h_values = self.nodes, self.h_values
+        states = nodes.states
+        open_list = [(self._priority(0, h_values[0]), 0, 0)]
+        g_score = {root.state: 0}
+        closed = set()
+        self._containers = [g_score, closed, open_list]
+        incumbent = math.inf
+        self._start_budget()
+        while open_list:
+            _, negative_g, current = heappop(open_list)
+            state, g = states[current], -negative_g
+            if g > g_score[state] or state in closed or g + h_values[current] >= incumbent:
+                continue
+            if self._expand_node(current, len(open_list), len(closed)):
+                return
+            if state == root.goal:
+                incumbent = g
+                self.solution_node = current
+                yield self._backtrack_solution_node()
+                if not anytime:
+                    return
+                continue
+            closed.add(state)
+            child_g = g + 1
+            for child, blank, move, child_h in self._children(current):
+                if child_g >= g_score.get(child, math.inf) or child_g + child_h >= incumbent:
+                    if self.instrumentation is not None:
+                        self.instrumentation.duplicate(child, child_g)
+                    continue
+                if child in closed:
+                    if not anytime:
+                        continue
+                    closed.discard(child)
+                g_score[child] = child_g
+                index = self._add(child, blank, current, move, child_g, child_h)
+                heappush(open_list, (self._priority(child_g, child_h), -child_g, index))
+                if self.instrumentation is not None:
+                    self.instrumentation.generate(child, child_g, child_h)
+
+
+class GreedyBestFirstNPuzzleSolver(WeightedAStarNPuzzleSolver):
+    """Best-first search on h alone, usually the fastest way to some solution, with no bound on its length"""
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, heuristic, math.inf, budget, instrumentation)
+
+    def _priority(self, g: int, h: int) -> float:
+        return h
+
+
+class AnytimeWeightedAStarNPuzzleSolver(WeightedAStarNPuzzleSolver):
+    """
+    Anytime weighted A* (Hansen and Zhou, 2007): weighted A* finds a first solution quickly, then the search
+    goes on, pruning with the admissible g + h, and every shorter solution replaces the last. solve returns the
+    best one when the search finishes, which proves it optimal, or when the budget runs out. solutions yields
+    them as they are found, and each is recorded in improvements as (seconds, length, nodes). The class is not
+    optimal, but proven_optimal tells whether the last solve finished and so proved its solution shortest.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic, weight: float = 3.0,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, heuristic, weight, budget, instrumentation)
+        self.improvements = []
+        self.proven_optimal = False
+
+    def solution_is_optimal(self) -> bool:
+        return self.proven_optimal and self.heuristic.admissible
+
+    def solutions(self) -> Iterator[List[SlideDirection]]:
+        start_time = time.perf_counter()
+        self.improvements = []
+        self.proven_optimal = False
+        for solution in self._search(anytime=True):
+            self.improvements.append((time.perf_counter() - start_time, len(solution), self.num_nodes_explored))
+            yield solution
+        self.proven_optimal = bool(self.improvements) and not self.budget_exhausted
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        best = False
+        for best in self.solutions():
+            pass
+        return best
+
+
+class FocalSearchNPuzzleSolver(_HeuristicSearch):
+    """
+    Focal search (Pearl and Kim, 1982): of the open boards whose f = g + h is within a factor epsilon of the
+    smallest f, the one with the lowest h is expanded next. With an admissible heuristic the solution is at
+    most epsilon times longer than optimal. Closed boards are reopened when a shorter path reaches them.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic, epsilon: float = 1.5,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, heuristic, budget, instrumentation)
+        assert epsilon >= 1, "epsilon is a suboptimality bound and must be at least 1"
+        self.epsilon = epsilon
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        root = self._setup()
+        nodes, h_values = self.nodes, self.h_values
+        states, g_values = nodes.states, nodes.g_values
+        # open boards are bucketed by f; live counts the current entries in each bucket
+        buckets: List[List[int]] = []
+        live: List[int] = []
+        focal: list = []
+        current_index = {root.state: 0}
+        g_score = {root.state: 0}
+        self._containers = [g_score, current_index, focal]
+
+        def push(index: int):
+            f = g_values[index] + h_values[index]
+            while len(buckets) <= f:
+                buckets.append([])
+                live.append(0)
+            buckets[f].append(index)
+            live[f] += 1
+            if f <= bound:
+                heappush(focal, (h_values[index], -g_values[index], index))
+
+        def retire(index: int):
+            live[g_values[index] + h_values[index]] -= 1
+            del current_index[states[index]]
+
+        f_min, bound = h_values[0], math.floor(self.epsilon * h_values[0])
+        push(0)
+        self._start_budget()
+        while current_index:
+            # raise the lower bound to the smallest f still open and widen the focal list to match
+            if f_min < len(live) and live[f_min] == 0:
+                while live[f_min] == 0:
+                    f_min += 1
+                new_bound = math.floor(self.epsilon * f_min)
+                for f in range(bound + 1, min(new_bound, len(buckets) - 1) + 1):
+                    for index in buckets[f]:
+                        if current_index.get(states[index]) == index:
+                            heappush(focal, (h_values[index], -g_values[index], index))
+                bound = new_bound
+            _, _, current = heappop(focal)
+            state = states[current]
+            # entries whose f is now past the bound are pushed again when the bound widens
+            if current_index.get(state) != current or g_values[current] + h_values[current] > bound:
+                continue
+            retire(current)
+            if self._expand_node(current, len(current_index), len(g_score) - len(current_index)):
+                return False
+            if state == root.goal:
+                self.solution_node = current
+                return self._backtrack_solution_node()
+            child_g = g_values[current] + 1
+            for child, blank, move, child_h in self._children(current):
+                if child_g >= g_score.get(child, math.inf):
+                    if self.instrumentation is not None:
+                        self.instrumentation.duplicate(child, child_g)
+                    continue
+                if child in current_index:
+                    retire(current_index[child])
+                g_score[child] = child_g
+                index = self._add(child, blank, current, move, child_g, child_h)
+                current_index[child] = index
+                if child_g + child_h < f_min:
+                    # only an inconsistent heuristic lowers the smallest f, and the bound shrinks with it
+                    f_min = child_g + child_h
+                    bound = math.floor(self.epsilon * f_min)
+                push(index)
+                if self.instrumentation is not None:
+                    self.instrumentation.generate(child, child_g, child_h)
+        return False
+
+
+class BeamSearchNPuzzleSolver(_HeuristicSearch):
+    """
+    Breadth-first search that keeps only the beam_width children with the lowest h at every depth, so memory
+    is bounded by the beam and the depth. It is incomplete: it can return False for a solvable puzzle, and
+    wider beams find solutions more often and shorter ones.
+    """
+    def __init__(self, puzzle: NPuzzle | PackedNPuzzle, heuristic: NPuzzleHeuristic, beam_width: int = 1000,
+                 budget: Optional[SearchBudget] = None, instrumentation: Optional[Instrumentation] = None):
+        super().__init__(puzzle, heuristic, budget, instrumentation)
+        assert beam_width > 0, "the beam must hold at least one board"
+        self.beam_width = beam_width
+
+    @instrumented
+    def solve(self) -> List[SlideDirection] | bool:
+        root = self._setup()
+        if root.is_solved():
+            return []
+        seen = {root.state}
+        self._containers = [seen]
+        layer = [0]
+        g = 0
+        self._start_budget()
+        while layer:
+            g += 1
+            candidates = {}
+            for current in layer:
+                if self._expand_node(current, len(layer), len(seen)):
+                    return False
+                for child, blank, move, child_h in self._children(current):
+                    if child in seen or child in candidates:
+                        continue
+                    candidates[child] = (child_h, child, blank, current, move)
+            layer = []
+            for child_h, child, blank, parent, move in nsmallest(self.beam_width, candidates.values()):
+                seen.add(child)
+                index = self._add(child, blank, parent, move, g, child_h)
+                if child == root.goal:
+                    self.solution_node = index
+                    return self._backtrack_solution_node()
+                layer.append(index)
+        return False
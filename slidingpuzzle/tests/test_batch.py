@@ -0,0 +1,77 @@
+import os
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import LinearConflictHeuristic, IDAStarNPuzzleSolver
+from slidingpuzzle.batch import *
+from slidingpuzzle.distance_table import DistanceTableHeuristic
+
+SOLUTION = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+
+@pytest.fixture
+def puzzles():
+    return [NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], SOLUTION),
+            NPuzzle(3, [1, 2, 5, 3, 4, 0, 6, 7, 8], SOLUTION),
+            NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], SOLUTION),
+            NPuzzle(3, [1, 2, 3, 4, 5, 6, 7, 0, 8], SOLUTION)]
+
+
+def check_results(results, puzzles):
+    for result in results:
+        assert result.status == SOLVED
+        puzzle = puzzles[result.index]
+        assert result.puzzle is puzzle
+        for direction in result.solution:
+            puzzle = puzzle.slide(direction)
+        assert puzzle.is_solved()
+
+
+def test_solve_many_in_input_order(puzzles):
+    results = list(solve_many(puzzles, solver="idastar", heuristic=LinearConflictHeuristic(), workers=2,
+                              ordered=True, max_pending=2))
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert [len(result.solution) for result in results] == [13, 21, 16, 1]
+    check_results(results, puzzles)
+
+
+def test_solve_many_in_completion_order(puzzles):
+    results = list(solve_many(iter(puzzles), solver=IDAStarNPuzzleSolver, workers=2))
+    assert sorted(result.index for result in results) == [0, 1, 2, 3]
+    check_results(results, puzzles)
+
+
+def test_solve_many_in_process(puzzles):
+    results = list(solve_many(puzzles, solver="astar", workers=0))
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    check_results(results, puzzles)
+
+
+def test_solve_many_budgets(puzzles):
+    results = list(solve_many(puzzles[2:3], solver="idastar", workers=1, max_nodes=10))
+    assert results[0].status == OUT_OF_BUDGET
+    assert results[0].solution is False
+    assert results[0].nodes == 10
+
+    results = list(solve_many(puzzles[2:3], solver="bfs", workers=0, time_limit=0.0))
+    assert results[0].status == OUT_OF_BUDGET
+
+
+def test_solve_many_unsolvable():
+    results = list(solve_many([NPuzzle(2, [0, 2, 1, 3])], solver="bfs", workers=1))
+    assert results[0].status == UNSOLVABLE
+
+
+def test_solve_many_builds_the_distance_table_before_the_workers(puzzles, tmp_path, monkeypatch):
+    monkeypatch.setattr("slidingpuzzle.distance_table._tables", {})
+    results = list(solve_many(puzzles, heuristic=DistanceTableHeuristic(str(tmp_path)), workers=4, ordered=True))
+    assert [len(result.solution) for result in results] == [13, 21, 16, 1]
+    assert os.listdir(tmp_path) == ["distances_3_8.bin"]
+
+
+def test_solve_many_boards_with_more_than_256_tiles():
+    solution = [*range(1, 289), 0]
+    puzzle = NPuzzle(17, solution[:-2] + [0, 288], solution)
+    for workers in (0, 1):
+        result, = solve_many([puzzle], solver="constructive", workers=workers)
+        assert result.status == SOLVED and len(result.solution) == 1
+        assert puzzle.slide(result.solution[0]).is_solved()
@@ -0,0 +1,96 @@
+import json
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import ManhattanHeuristic, PuzzleNode
+from slidingpuzzle.benchmark import *
+from slidingpuzzle.benchmark.runner import main
+
+
+@pytest.mark.parametrize("name", sorted(INSTANCE_SETS))
+def test_instance_sets_are_solvable(name):
+    instances = get_instance_set(name)
+    assert instances
+    for instance in instances:
+        puzzle = NPuzzle(instance.width, list(instance.placements), list(instance.solution))
+        assert puzzle.is_solvable()
+        h = ManhattanHeuristic().h(PuzzleNode(puzzle, [], [], None, None))
+        # every slide changes the Manhattan distance by one, so the optimal length has the same parity
+        assert h <= instance.optimal_length and (instance.optimal_length - h) % 2 == 0
+
+
+def test_korf_instances():
+    instances = get_instance_set("korf100")
+    assert len(instances) == 100
+    assert sum(instance.optimal_length for instance in instances) == 5305
+    assert instances[0].name == "korf001"
+    assert instances[0].placements == (14, 13, 15, 7, 11, 12, 9, 5, 6, 0, 2, 1, 4, 8, 10, 3)
+    assert instances[0].optimal_length == 57
+
+
+def test_load_instances_with_unknown_length(tmp_path):
+    path = tmp_path / "instances.txt"
+    path.write_text("# comment\n\nfirst - 1 2 3 4 5 6 7 8 0\n")
+    instance, = load_instances(str(path), 3, [1, 2, 3, 4, 5, 6, 7, 8, 0])
+    assert instance.name == "first"
+    assert instance.optimal_length is None
+
+
+def test_parse_configuration():
+    assert parse_configuration("astar:linear-conflict") == Configuration("astar", "linear-conflict")
+    assert parse_configuration("idastar") == Configuration("idastar", "manhattan")
+    assert parse_configuration("bfs") == Configuration("bfs", None)
+    with pytest.raises(AssertionError):
+        parse_configuration("bfs:manhattan")
+    assert Configuration("table", None) in all_configurations()
+
+
+@pytest.mark.parametrize("isolate", [False, True])
+def test_run_benchmark(isolate):
+    instances = [instance for instance in get_instance_set("eight-graded") if instance.optimal_length == 12]
+    configurations = [parse_configuration("astar"), parse_configuration("bfs")]
+    results = list(run_benchmark(instances, configurations, "eight-graded", isolate=isolate))
+    assert len(results) == 2 * len(instances)
+    for result in results:
+        assert result.status == "solved"
+        assert result.solution_length == result.optimal_length == 12
+        assert result.nodes > 0 and result.nodes_per_second > 0
+        assert result.peak_rss_kb is None or result.peak_rss_kb > 0
+
+
+def test_small_board_solvers_skip_large_instances():
+    instances = get_instance_set("korf100")[:1]
+    assert list(run_benchmark(instances, [Configuration("bfs", None)], isolate=False)) == []
+
+
+def test_budget_is_reported():
+    instance = get_instance_set("korf100")[0]
+    result = run_one(instance, Configuration("astar", "manhattan"), max_nodes=100)
+    assert result.status == "out_of_budget"
+    assert result.solution_length is None
+
+
+def test_compare_results(tmp_path):
+    instance = get_instance_set("eight-graded")[30]
+    result = run_one(instance, Configuration("astar", "manhattan"), "eight-graded")
+    assert compare_results([result], [result]) == []
+    slower = result._replace(seconds=result.seconds + 1, nodes=result.nodes * 2, solution_length=40)
+    metrics = {regression.metric for regression in compare_results([result], [slower])}
+    assert metrics == {"seconds", "nodes", "solution_length"}
+    failed = result._replace(status="out_of_budget", solution_length=None)
+    assert [regression.metric for regression in compare_results([result], [failed])] == ["status"]
+
+    baseline, current = str(tmp_path / "baseline.json"), str(tmp_path / "current.json")
+    save_results(baseline, [result])
+    save_results(current, [slower])
+    assert load_results(baseline) == [result]
+    assert "metadata" in json.loads(open(baseline).read())
+    assert main(["compare", baseline, baseline]) == 0
+    assert main(["compare", baseline, current]) == 1
+
+
+def test_command_line_run(tmp_path, capsys):
+    output = str(tmp_path / "results.json")
+    assert main(["run", "--set", "eight-graded", "--limit", "3", "-c", "idastar:linear-conflict", "--no-isolate",
+                 "-o", output]) == 0
+    assert len(load_results(output)) == 3
+    assert "d01-1" in capsys.readouterr().out
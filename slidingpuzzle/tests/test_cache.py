@@ -0,0 +1,134 @@
+import pytest
+from slidingpuzzle.puzzle import NPuzzle, PackedNPuzzle
+from slidingpuzzle.solver import *
+from slidingpuzzle.suboptimal import GreedyBestFirstNPuzzleSolver, AnytimeWeightedAStarNPuzzleSolver
+from slidingpuzzle.benchmark.instances import get_instance_set, to_puzzle
+from slidingpuzzle.batch import solve_many, SOLVED
+from slidingpuzzle.cache import *
+
+SOLUTION = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+
+def transpose(placements, width=3):
+    return [placements[col * width + row] for row in range(width) for col in range(width)]
+
+
+def is_solution(puzzle, solution):
+    for direction in solution:
+        puzzle = puzzle.slide(direction)
+    return puzzle.is_solved()
+
+
+@pytest.mark.parametrize("width", [3, 4, 5])
+@pytest.mark.parametrize("blank_first", [False, True])
+def test_symmetries_preserve_goal_and_moves(width, blank_first):
+    solution = list(range(width * width)) if blank_first else list(range(1, width * width)) + [0]
+    symmetries = board_symmetries(width, tuple(solution))
+    assert len(symmetries) == 2
+    puzzle = NPuzzle.random_puzzle(width)
+    puzzle = NPuzzle(width, puzzle.placements, solution)
+    for symmetry in symmetries:
+        assert apply_symmetry(symmetry, solution) == solution
+        image = NPuzzle(width, apply_symmetry(symmetry, puzzle.placements), solution)
+        assert image.is_solvable() == puzzle.is_solvable()
+        for direction in SlideDirection:
+            moved = puzzle.slide(direction)
+            image_direction = list(SlideDirection)[symmetry.directions[list(SlideDirection).index(direction)]]
+            assert apply_symmetry(symmetry, moved.placements) == image.slide(image_direction).placements
+
+
+def test_centered_blank_has_all_symmetries():
+    assert len(board_symmetries(3, (1, 2, 3, 4, 0, 5, 6, 7, 8))) == 8
+    assert len(board_symmetries(3, (1, 0, 2, 3, 4, 5, 6, 7, 8))) == 2
+
+
+def test_mirror_images_share_an_entry():
+    cache = SolutionCache()
+    puzzle = NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], SOLUTION)
+    mirror = NPuzzle(3, [{0: 0, 2: 4, 3: 7, 4: 2, 6: 8, 7: 3, 8: 6}.get(tile, tile)
+                         for tile in transpose(puzzle.placements)], SOLUTION)
+    solution = AStarNPuzleSolver(puzzle, ManhattanHeuristic()).solve()
+    cache.put(puzzle, solution)
+    assert cache.get(puzzle) == solution
+    mirrored = cache.get(mirror)
+    assert len(mirrored) == len(solution) and is_solution(mirror, mirrored)
+    assert mirror in cache and puzzle.pack() in cache
+    assert cache.stats.memory_hits == 2 and cache.stats.misses == 0
+    assert SolutionCache(symmetries=False).get(mirror) is None
+
+
+def test_lru_eviction():
+    cache = SolutionCache(capacity=2)
+    puzzles = [NPuzzle(3, placements, SOLUTION) for placements in ([1, 2, 3, 4, 5, 6, 7, 0, 8],
+                                                                  [1, 2, 3, 4, 5, 6, 0, 7, 8],
+                                                                  [1, 2, 3, 4, 0, 6, 7, 5, 8])]
+    for puzzle in puzzles[:2]:
+        cache.put(puzzle, BFSNPuzzleSolver(puzzle).solve())
+    cache.get(puzzles[0])
+    cache.put(puzzles[2], BFSNPuzzleSolver(puzzles[2]).solve())
+    assert cache.stats.evictions == 1
+    assert puzzles[0] in cache and puzzles[2] in cache and puzzles[1] not in cache
+    assert cache.get(puzzles[1]) is None
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_disk_tier(tmp_path):
+    path = str(tmp_path / "solutions.sqlite")
+    puzzle = NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], SOLUTION)
+    solution = AStarNPuzleSolver(puzzle, ManhattanHeuristic()).solve()
+    with SolutionCache(path=path) as cache:
+        cache.put(puzzle, solution)
+    with SolutionCache(capacity=0, path=path) as cache:
+        assert len(cache) == 1
+        assert cache.get(puzzle) == solution
+        assert cache.stats.disk_hits == 1
+    with SolutionCache(path=path, disk_capacity=1) as cache:
+        other = NPuzzle(3, [1, 2, 3, 4, 5, 6, 7, 0, 8], SOLUTION)
+        cache.put(other, BFSNPuzzleSolver(other).solve())
+        assert len(cache) == 1 and cache.stats.disk_evictions == 1
+        cache.clear()
+        assert len(cache) == 0
+
+
+def test_cached_solver():
+    cache = SolutionCache()
+    puzzle = NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], SOLUTION)
+    first = CachedNPuzzleSolver(IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic()), cache)
+    assert len(first.solve()) == 16 and not first.hit and first.num_nodes_explored > 0
+    second = CachedNPuzzleSolver(AStarNPuzleSolver(PackedNPuzzle.from_npuzzle(puzzle), ManhattanHeuristic()), cache)
+    assert len(second.solve()) == 16 and second.hit and second.num_nodes_explored == 0
+
+
+def test_suboptimal_solutions_are_not_stored():
+    cache = SolutionCache()
+    puzzle = NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], SOLUTION)
+    solver = CachedNPuzzleSolver(GreedyBestFirstNPuzzleSolver(puzzle, ManhattanHeuristic()), cache)
+    assert is_solution(puzzle, solver.solve())
+    assert puzzle not in cache
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_anytime_solutions_are_stored_only_when_proven_optimal(workers):
+    cache = SolutionCache()
+    hard = to_puzzle(get_instance_set("korf100")[0])
+    easy = NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], SOLUTION)
+    cut_short, finished = solve_many([hard, easy], "anytime-astar", workers=workers, ordered=True,
+                                     max_nodes=20000, cache=cache)
+    assert cut_short.status == SOLVED and len(cut_short.solution) > 57
+    assert hard not in cache
+    assert finished.status == SOLVED and cache.get(easy) == finished.solution
+
+    solver = CachedNPuzzleSolver(AnytimeWeightedAStarNPuzzleSolver(hard, ManhattanHeuristic(),
+                                                                   budget=SearchBudget(max_nodes=20000)), cache)
+    assert is_solution(hard, solver.solve()) and hard not in cache
+
+
+def test_solve_many_with_cache():
+    cache = SolutionCache()
+    puzzles = [NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], SOLUTION), NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], SOLUTION)]
+    first = list(solve_many(puzzles, workers=0, cache=cache))
+    second = list(solve_many(puzzles * 2, workers=2, ordered=True, cache=cache))
+    assert [result.index for result in second] == [0, 1, 2, 3]
+    assert all(result.status == SOLVED and result.nodes == 0 for result in second)
+    assert [len(result.solution) for result in second] == [len(result.solution) for result in first] * 2
+    assert cache.stats.hits == 4 and cache.stats.misses == 2
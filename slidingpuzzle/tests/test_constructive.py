@@ -0,0 +1,63 @@
+import random
+import time
+import pytest
+from slidingpuzzle.puzzle import NPuzzle, SlideDirection
+from slidingpuzzle.constructive import *
+from slidingpuzzle.generators import random_solvable_placements
+from slidingpuzzle.solver import IDAStarNPuzzleSolver, LinearConflictHeuristic
+
+
+def apply_solution(puzzle, solution):
+    # packed boards slide without copying a placements list, which adds up over thousands of slides
+    puzzle = puzzle.pack()
+    for direction in solution:
+        puzzle = puzzle.slide(direction)
+    return puzzle
+
+
+@pytest.mark.parametrize("width", [2, 3, 4, 5, 6, 9])
+def test_constructive_solves_any_goal(width):
+    rng = random.Random(width)
+    for _ in range(15):
+        solution = list(range(width * width))
+        rng.shuffle(solution)
+        puzzle = NPuzzle(width, random_solvable_placements(width, width, solution, rng), solution)
+        assert apply_solution(puzzle, ConstructiveNPuzzleSolver(puzzle).solve()).is_solved()
+
+
+def test_constructive_edge_cases():
+    assert ConstructiveNPuzzleSolver(NPuzzle(1, [0])).solve() == []
+    assert ConstructiveNPuzzleSolver(NPuzzle(3, list(range(9)))).solve() == []
+    assert ConstructiveNPuzzleSolver(NPuzzle(2, [0, 2, 1, 3])).solve() is False
+    puzzle = NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], [1, 2, 3, 4, 5, 6, 7, 8, 0])
+    assert apply_solution(puzzle, ConstructiveNPuzzleSolver(puzzle.pack()).solve()).is_solved()
+
+
+def test_constructive_large_board_is_fast():
+    puzzle = NPuzzle(20, random_solvable_placements(20, rng=random.Random(0)))
+    start = time.perf_counter()
+    solution = ConstructiveNPuzzleSolver(puzzle).solve()
+    assert time.perf_counter() - start < 1.0
+    assert apply_solution(puzzle, solution).is_solved()
+
+
+def test_cancel_inverses():
+    up, down, left, right = SlideDirection.UP, SlideDirection.DOWN, SlideDirection.LEFT, SlideDirection.RIGHT
+    assert cancel_inverses([up, left, right, down, left]) == [left]
+    assert cancel_inverses([up, up, left]) == [up, up, left]
+
+
+def test_window_reoptimization_shortens():
+    puzzle = NPuzzle(6, random_solvable_placements(6, rng=random.Random(3)))
+    plain = ConstructiveNPuzzleSolver(puzzle, cancel_inverses=False)
+    plain_solution = plain.solve()
+    assert len(plain_solution) == plain.constructed_length
+    solution = ConstructiveNPuzzleSolver(puzzle, window=12).solve()
+    assert apply_solution(puzzle, solution).is_solved()
+    assert len(solution) < len(plain_solution)
+
+
+def test_constructive_length_bounds():
+    puzzle = NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], [1, 2, 3, 4, 5, 6, 7, 8, 0])
+    optimal = len(IDAStarNPuzzleSolver(puzzle, LinearConflictHeuristic()).solve())
+    assert optimal <= len(ConstructiveNPuzzleSolver(puzzle, window=12).solve())
@@ -0,0 +1,79 @@
+import os
+import pickle
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import PuzzleNode, IDAStarNPuzzleSolver, ManhattanHeuristic
+from slidingpuzzle.distance_table import *
+
+
+@pytest.fixture(scope="module")
+def eight_puzzle_table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tables") / "distances.bin")
+    DistanceTable.build(3, 8).save(path)
+    return DistanceTable.load(path)
+
+
+def test_distance_table_covers_all_solvable_boards(eight_puzzle_table):
+    assert eight_puzzle_table.nbytes == 181440
+    assert UNREACHED not in eight_puzzle_table.table
+    assert max(eight_puzzle_table.table) == 31
+
+
+def test_distance_table_small_board():
+    table = DistanceTable.build(2, 0)
+    assert sorted(table.table) == [0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6]
+    assert table.distance(NPuzzle(2, [0, 1, 2, 3])) == 0
+    assert table.distance(NPuzzle(2, [0, 2, 1, 3])) == UNREACHED
+    assert DistanceTableNPuzzleSolver(NPuzzle(2, [0, 2, 1, 3]), table).solve() is False
+
+
+@pytest.mark.parametrize("placements", [[1, 2, 6, 3, 5, 0, 4, 7, 8],
+                                        [3, 5, 6, 1, 4, 8, 0, 7, 2],
+                                        [8, 7, 6, 5, 4, 3, 2, 1, 0]])
+def test_distance_table_solver_is_optimal(eight_puzzle_table, placements):
+    puzzle = NPuzzle(3, placements, solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    optimal = len(IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic()).solve())
+    assert eight_puzzle_table.distance(puzzle) == optimal
+
+    solution = DistanceTableNPuzzleSolver(puzzle.pack(), eight_puzzle_table).solve()
+    assert len(solution) == optimal
+    for direction in solution:
+        puzzle = puzzle.slide(direction)
+    assert puzzle.is_solved()
+
+
+def test_distance_table_rejects_other_blank_goal(eight_puzzle_table):
+    with pytest.raises(AssertionError):
+        eight_puzzle_table.distance(NPuzzle(3, list(range(9))))
+
+
+def test_distance_table_refuses_large_boards(tmp_path):
+    with pytest.raises(AssertionError):
+        get_distance_table(4, 15, str(tmp_path))
+    with pytest.raises(AssertionError):
+        DistanceTableNPuzzleSolver(NPuzzle.random_puzzle(4), cache_dir=str(tmp_path))
+    assert not list(tmp_path.iterdir())
+
+
+def test_distance_table_cache_and_heuristic(tmp_path):
+    table = get_distance_table(2, 3, str(tmp_path))
+    assert (tmp_path / "distances_2_3.bin").exists()
+    assert table.path is not None
+    assert pickle.loads(pickle.dumps(table)).distance(NPuzzle(2, [1, 2, 3, 0], [1, 2, 3, 0])) == 0
+
+    heuristic = DistanceTableHeuristic(str(tmp_path))
+    puzzle = NPuzzle(2, [0, 1, 3, 2], [1, 2, 3, 0])
+    assert heuristic.h(PuzzleNode(puzzle, [], [], None, None)) == table.distance(puzzle)
+
+
+def test_get_distance_table_rebuilds_a_truncated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("slidingpuzzle.distance_table._tables", {})
+    path = tmp_path / "distances_2_0.bin"
+    DistanceTable.build(2, 0).save(str(path))
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(ValueError):
+        DistanceTable.load(str(path))
+    table = get_distance_table(2, 0, str(tmp_path))
+    assert table.nbytes == 12
+    assert DistanceTable.load(str(path)).nbytes == 12
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".partial")] == []
@@ -0,0 +1,94 @@
+import os
+import random
+import pytest
+from slidingpuzzle.distance_table import DistanceTable
+from slidingpuzzle.general import BFSSlidingPuzzleSolver
+from slidingpuzzle.generators import random_walk_placements
+from slidingpuzzle.puzzle import NPuzzle, SlidingPuzzle
+from slidingpuzzle.ranking import lehmer_rank
+
+np = pytest.importorskip("numpy")
+from slidingpuzzle.external_bfs import *  # noqa: E402
+
+EIGHT_PROFILE = [1, 2, 4, 8, 16, 20, 39, 62, 116, 152, 286, 396, 748, 1024, 1893, 2512, 4485, 5638, 9529, 10878,
+                 16993, 17110, 23952, 20224, 24047, 15578, 14560, 6274, 3910, 760, 221, 2]
+
+
+@pytest.mark.parametrize("chunk_size,bitmap", [(1 << 20, False), (1000, False), (777, True)])
+def test_eight_puzzle_profile(tmp_path, chunk_size, bitmap):
+    search = ExternalBFS(3, 3, str(tmp_path), chunk_size=chunk_size, bitmap=bitmap)
+    assert search.run() == EIGHT_PROFILE
+    assert search.complete and search.radius == 31 and search.num_states == 181440
+
+
+def test_layers_are_sorted_and_distinct(tmp_path):
+    search = ExternalBFS(2, 3, str(tmp_path))
+    search.run()
+    seen = set()
+    for depth in range(len(search.counts)):
+        layer = search.layer(depth)
+        assert (np.diff(layer.astype(np.int64)) > 0).all()
+        assert seen.isdisjoint(layer.tolist())
+        seen.update(layer.tolist())
+    assert len(seen) == 360
+
+
+def test_several_blanks(tmp_path):
+    solution = [1, 2, 3, 4, 0, 0]
+    search = ExternalBFS(2, 3, str(tmp_path), solution)
+    search.run()
+    # with two blanks every arrangement of the tiles is reachable
+    assert search.num_states == 360
+    for depth in (3, 7, 11):
+        for placements in search.placements(search.layer(depth)[:3]).tolist():
+            puzzle = SlidingPuzzle(2, 3, placements, list(solution))
+            assert len(BFSSlidingPuzzleSolver(puzzle).solve()) == depth
+
+
+def test_resume_from_checkpoint(tmp_path):
+    directory = str(tmp_path)
+    first = ExternalBFS(3, 3, directory, chunk_size=5000)
+    assert first.run(max_depth=12) == EIGHT_PROFILE[:13]
+    assert not first.complete
+    # an interrupted layer leaves a partial file behind
+    with open(os.path.join(directory, layer_filename(13) + ".partial"), "wb") as f:
+        f.write(b"interrupted")
+    resumed = ExternalBFS(3, 3, directory, chunk_size=5000, bitmap=True)
+    assert resumed.run() == EIGHT_PROFILE
+    with pytest.raises(ValueError):
+        ExternalBFS(3, 3, directory, solution=[1, 2, 3, 4, 5, 6, 7, 8, 0]).run()
+
+
+def test_discarded_layers(tmp_path):
+    search = ExternalBFS(2, 3, str(tmp_path), keep_layers=False)
+    search.run()
+    layers = sorted(name for name in os.listdir(tmp_path) if name.startswith("layer-"))
+    assert layers == [layer_filename(search.radius)]
+    with pytest.raises(AssertionError):
+        search.distance_table()
+
+
+def test_distance_table(tmp_path):
+    search = ExternalBFS(3, 3, str(tmp_path / "layers"))
+    search.run()
+    table = search.distance_table(str(tmp_path / "distances.bin"))
+    assert len(table) == 362880 and (table != UNREACHED).sum() == 181440
+    reference = DistanceTable.build(3, 0)
+    rng = random.Random(4)
+    for _ in range(200):
+        placements = random_walk_placements(3, rng.randrange(60), rng=rng)
+        assert table[lehmer_rank(placements)] == reference.distance(NPuzzle(3, placements, list(range(9))))
+
+
+def test_command_line(tmp_path, capsys):
+    main([str(tmp_path), "--rows", "2", "--cols", "3", "--bitmap"])
+    assert "360 boards, radius 21" in capsys.readouterr().out
+
+
+def test_drop_known_reads_the_layer_in_chunks(tmp_path):
+    search = ExternalBFS(3, 3, str(tmp_path), chunk_size=7)
+    rng = np.random.default_rng(2)
+    layer = np.unique(rng.integers(0, 10000, 500).astype(np.uint64))
+    merged = np.unique(rng.integers(0, 10000, 40).astype(np.uint64))
+    expected = merged[~np.isin(merged, layer[30:400])]
+    assert (search._drop_known(merged, layer, 30, 400) == expected).all()
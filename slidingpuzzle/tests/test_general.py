@@ -0,0 +1,97 @@
+import itertools
+import pytest
+from slidingpuzzle.puzzle import *
+from slidingpuzzle.solver import ManhattanHeuristic, LinearConflictHeuristic, SearchBudget, NPuzzleSolver
+from slidingpuzzle.general import *
+from slidingpuzzle.generators import random_walk_placements
+
+
+def apply(puzzle, actions):
+    for action in actions:
+        puzzle = puzzle.slide(action)
+    return puzzle
+
+
+def test_npuzzle_solvers_reject_rectangular_boards():
+    from slidingpuzzle.solver import AStarNPuzleSolver
+    with pytest.raises(AssertionError):
+        AStarNPuzleSolver(SlidingPuzzle(2, 3, [1, 2, 3, 4, 0, 5]), ManhattanHeuristic())
+
+
+@pytest.mark.parametrize("n_rows,n_cols,blanks", [(2, 2, 1), (2, 3, 1), (3, 2, 1), (2, 3, 2), (1, 4, 2)])
+def test_bfs_reaches_exactly_the_solvable_boards(n_rows, n_cols, blanks):
+    solution = list(range(1, n_rows * n_cols - blanks + 1)) + [0] * blanks
+    for placements in set(itertools.permutations(solution)):
+        puzzle = SlidingPuzzle(n_rows, n_cols, list(placements), list(solution))
+        actions = BFSSlidingPuzzleSolver(puzzle).solve()
+        assert (actions is not False) == puzzle.is_solvable()
+        if actions is not False:
+            assert apply(puzzle, actions).is_solved()
+
+
+@pytest.mark.parametrize("n_rows,n_cols,blanks,steps", [(2, 5, 1, 60), (3, 4, 1, 40), (3, 4, 2, 60),
+                                                        (4, 4, 3, 60), (3, 3, 2, 40)])
+def test_solvers_agree(n_rows, n_cols, blanks, steps):
+    solution = list(range(1, n_rows * n_cols - blanks + 1)) + [0] * blanks
+    puzzle = SlidingPuzzle(n_rows, n_cols, list(solution), list(solution))
+    # scramble with a walk that takes the first legal slide of a blank chosen round robin
+    for step in range(steps):
+        blank_row, blank_col = puzzle.get_blank_positions()[step % blanks]
+        for delta_row, delta_col in ((0, 1), (1, 0), (0, -1), (-1, 0))[step % 4:] + ((0, 1), (1, 0)):
+            row, col = blank_row + delta_row, blank_col + delta_col
+            if 0 <= row < n_rows and 0 <= col < n_cols and puzzle.is_full(row, col):
+                puzzle = puzzle.slide(Action(row, col, blank_row, blank_col))
+                break
+    lengths = set()
+    for solver in [AStarSlidingPuzzleSolver(puzzle, ManhattanHeuristic()),
+                   AStarSlidingPuzzleSolver(puzzle.pack(), LinearConflictHeuristic()),
+                   IDAStarSlidingPuzzleSolver(puzzle, LinearConflictHeuristic())]:
+        actions = solver.solve()
+        assert apply(puzzle, actions).is_solved()
+        lengths.add(len(actions))
+    if n_rows * n_cols <= 9:
+        lengths.add(len(BFSSlidingPuzzleSolver(puzzle).solve()))
+    assert len(lengths) == 1
+
+
+def test_square_boards_match_npuzzle_solvers():
+    from slidingpuzzle.solver import AStarNPuzleSolver, IDAStarNPuzzleSolver
+    puzzle = NPuzzle(4, random_walk_placements(4, 40))
+    expected = len(IDAStarNPuzzleSolver(puzzle, LinearConflictHeuristic()).solve())
+    for solver in [AStarSlidingPuzzleSolver(puzzle, LinearConflictHeuristic()),
+                   IDAStarSlidingPuzzleSolver(puzzle.pack(), ManhattanHeuristic())]:
+        actions = solver.solve()
+        assert len(actions) == expected
+        assert apply(SlidingPuzzle(4, 4, puzzle.placements, puzzle.solution), actions).is_solved()
+    astar = AStarNPuzleSolver(puzzle, ManhattanHeuristic())
+    general = AStarSlidingPuzzleSolver(puzzle, ManhattanHeuristic())
+    astar.solve()
+    general.solve()
+    assert general.num_nodes_explored == astar.num_nodes_explored
+
+
+@pytest.mark.parametrize("n_rows,n_cols,placements,solution",
+                         [(2, 3, [2, 1, 3, 4, 5, 0], [1, 2, 3, 4, 5, 0]),
+                          (2, 3, [4, 2, 3, 1, 5, 0], [1, 2, 3, 4, 5, 0]),
+                          (3, 2, [0, 1, 2, 3, 5, 4], [0, 1, 2, 3, 4, 5])])
+def test_linear_conflict_on_rectangular_boards(n_rows, n_cols, placements, solution):
+    from slidingpuzzle.solver import PuzzleNode
+    # two tiles swapped in their goal row or column
+    node = PuzzleNode(SlidingPuzzle(n_rows, n_cols, placements, solution), [], [], None, None)
+    assert ManhattanHeuristic().h(node) == 2
+    assert LinearConflictHeuristic().h(node) == 4
+
+
+def test_solved_and_budget():
+    solution = [1, 2, 3, 4, 5, 0, 0, 6]
+    assert AStarSlidingPuzzleSolver(SlidingPuzzle(2, 4, solution, solution), ManhattanHeuristic()).solve() == []
+    puzzle = SlidingPuzzle(2, 4, [2, 1, 3, 4, 5, 0, 0, 6], solution)
+    solver = AStarSlidingPuzzleSolver(puzzle, ManhattanHeuristic(), budget=SearchBudget(max_nodes=5))
+    assert solver.solve() is False and solver.budget_exhausted
+
+
+def test_idastar_unsolvable():
+    puzzle = SlidingPuzzle(2, 3, [2, 1, 3, 4, 5, 0], [1, 2, 3, 4, 5, 0])
+    solver = IDAStarSlidingPuzzleSolver(puzzle, ManhattanHeuristic())
+    assert solver.solve() is False
+    assert not solver.budget_exhausted and solver.num_nodes_explored == 0
@@ -0,0 +1,114 @@
+import itertools
+import random
+import pytest
+from slidingpuzzle.distance_table import DistanceTable
+from slidingpuzzle.puzzle import NPuzzle, batch_is_solvable
+from slidingpuzzle.solver import ManhattanHeuristic, PuzzleNode
+from slidingpuzzle.generators import *
+
+SOLUTION = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+
+@pytest.fixture(scope="module")
+def eight_puzzle_table():
+    return DistanceTable.build(3, 8)
+
+
+@pytest.mark.parametrize("n_rows,n_cols", [(2, 2), (3, 3), (4, 4), (2, 5)])
+def test_random_solvable_placements_are_solvable(n_rows, n_cols):
+    np = pytest.importorskip("numpy")
+    rng = random.Random(1)
+    boards = [random_solvable_placements(n_rows, n_cols, rng=rng) for _ in range(200)]
+    assert batch_is_solvable(np.array(boards), n_rows, n_cols).all()
+
+
+def test_random_solvable_placements_cover_all_boards():
+    rng = random.Random(2)
+    boards = {tuple(random_solvable_placements(2, rng=rng)) for _ in range(500)}
+    assert len(boards) == 12
+
+
+def test_npuzzle_random_puzzle_is_solvable():
+    assert all(NPuzzle.random_puzzle(4).is_solvable() for _ in range(20))
+
+
+def test_generators_are_reproducible():
+    first = [puzzle.placements for puzzle in iter_solvable_puzzles(4, 5, seed=7)]
+    second = [puzzle.placements for puzzle in iter_solvable_puzzles(4, 5, seed=7)]
+    assert first == second
+    assert len(first) == 5
+    walks = [puzzle.placements for puzzle in iter_random_walk_puzzles(4, 30, 5, seed=7)]
+    assert walks == [puzzle.placements for puzzle in iter_random_walk_puzzles(4, 30, 5, seed=7)]
+
+
+def test_iterators_stream_without_count():
+    assert len(list(itertools.islice(iter_solvable_puzzles(3, seed=1), 1000))) == 1000
+
+
+def test_random_walks_stay_within_steps(eight_puzzle_table):
+    for puzzle in iter_random_walk_puzzles(3, 6, 50, solution=SOLUTION, seed=3):
+        distance = eight_puzzle_table.distance(puzzle)
+        assert distance <= 6 and distance % 2 == 0
+
+
+def test_puzzles_at_distance(tmp_path):
+    table = DistanceTable.build(2, 3)
+    for distance in range(7):
+        for puzzle in iter_puzzles_at_distance(2, distance, 3, solution=[1, 2, 3, 0], seed=distance, cache_dir=None):
+            assert table.distance(puzzle) == distance
+    hardest = list(iter_puzzles_at_distance(3, 31, 4, solution=SOLUTION, seed=0, cache_dir=str(tmp_path)))
+    assert {tuple(puzzle.placements) for puzzle in hardest} <= {(6, 4, 7, 8, 5, 0, 3, 2, 1), (8, 6, 7, 2, 5, 4, 3, 0, 1)}
+    with pytest.raises(AssertionError):
+        next(iter_puzzles_at_distance(2, 7, cache_dir=None))
+
+
+def test_puzzles_by_heuristic():
+    heuristic = ManhattanHeuristic()
+    for puzzle in iter_puzzles_by_heuristic(4, 30, 34, count=20, seed=4):
+        assert 30 <= heuristic.h(PuzzleNode(puzzle, [], [], None, None)) <= 34
+        assert puzzle.is_solvable()
+    assert len(list(iter_puzzles_by_heuristic(4, 0, 10, count=5, seed=4, walk_steps=10))) == 5
+
+
+@pytest.mark.parametrize("n_rows,n_cols", [(3, 3), (4, 4), (3, 5), (16, 20)])
+def test_batch_solvable_placements(n_rows, n_cols):
+    np = pytest.importorskip("numpy")
+    boards = batch_solvable_placements(2000, n_rows, n_cols, seed=5)
+    assert boards.shape == (2000, n_rows * n_cols)
+    assert boards.dtype == (np.uint8 if n_rows * n_cols <= 256 else np.uint16)
+    assert batch_is_solvable(boards, n_rows, n_cols).all()
+    assert (np.sort(boards, axis=1) == np.arange(n_rows * n_cols)).all()
+    assert (boards == batch_solvable_placements(2000, n_rows, n_cols, seed=5)).all()
+
+
+def test_batch_random_walks(eight_puzzle_table):
+    np = pytest.importorskip("numpy")
+    boards = batch_random_walks(500, 3, 8, solution=SOLUTION, seed=6)
+    assert (boards == batch_random_walks(500, 3, 8, solution=SOLUTION, seed=6)).all()
+    assert batch_is_solvable(boards, 3, solution=SOLUTION).all()
+    distances = [eight_puzzle_table.distance(NPuzzle(3, board.tolist(), SOLUTION)) for board in boards]
+    assert max(distances) <= 8 and all(distance % 2 == 0 for distance in distances)
+    # a single step from the goal only has two moves to choose from
+    first_steps = {tuple(board) for board in batch_random_walks(200, 3, 1, solution=SOLUTION, seed=1)}
+    assert len(first_steps) == 2
+
+
+def test_batch_random_walks_with_zero_draws(monkeypatch, eight_puzzle_table):
+    np = pytest.importorskip("numpy")
+    default_rng = np.random.default_rng
+
+    class ZeroDrawGenerator:
+        """Draws that are all exactly 0 for about a third of the boards at every step"""
+        def __init__(self, seed):
+            self.rng = default_rng(seed)
+
+        def random(self, shape, dtype):
+            draws = self.rng.random(shape, dtype=dtype)
+            draws[self.rng.random(shape[0]) < 0.3] = 0
+            return draws
+
+    monkeypatch.setattr(np.random, "default_rng", ZeroDrawGenerator)
+    boards = batch_random_walks(2000, 3, 9, solution=SOLUTION, seed=3)
+    assert (np.sort(boards, axis=1) == np.arange(9)).all()
+    distances = [eight_puzzle_table.distance(NPuzzle(3, board.tolist(), SOLUTION)) for board in boards]
+    assert max(distances) <= 9 and all(distance % 2 == 1 for distance in distances)
@@ -0,0 +1,94 @@
+import json
+import tracemalloc
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import *
+from slidingpuzzle.instrumentation import *
+
+
+@pytest.fixture
+def deep_npuzzle():
+    return NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+
+
+def test_uninstrumented_solver_has_no_stats(deep_npuzzle):
+    solver = AStarNPuzleSolver(deep_npuzzle, ManhattanHeuristic())
+    assert len(solver.solve()) == 16
+    assert solver.stats is None
+
+
+@pytest.mark.parametrize("make_solver", [lambda puzzle, instrumentation: BFSNPuzzleSolver(
+                                             puzzle, instrumentation=instrumentation),
+                                         lambda puzzle, instrumentation: AStarNPuzleSolver(
+                                             puzzle, ManhattanHeuristic(), instrumentation=instrumentation),
+                                         lambda puzzle, instrumentation: IDAStarNPuzzleSolver(
+                                             puzzle, LinearConflictHeuristic(), instrumentation=instrumentation)])
+def test_callbacks_match_counters(deep_npuzzle, make_solver):
+    events = {"expand": 0, "generate": 0, "duplicate": 0}
+
+    def count(kind):
+        def callback(state, g, h):
+            events[kind] += 1
+            assert g >= 0
+        return callback
+
+    instrumentation = Instrumentation(on_expand=count("expand"), on_generate=count("generate"),
+                                      on_duplicate=count("duplicate"), sample_interval=16)
+    solver = make_solver(deep_npuzzle, instrumentation)
+    solution = solver.solve()
+    stats = solver.stats
+    assert stats is instrumentation.stats
+    assert len(solution) == stats.solution_length == 16
+    assert stats.solved
+    assert (stats.expanded, stats.generated, stats.duplicates) == (events["expand"], events["generate"],
+                                                                    events["duplicate"])
+    assert stats.expanded > 0 and stats.generated > 0
+    assert len(stats.list_sizes) == stats.expanded // 16
+    assert stats.seconds > 0
+
+
+def test_threshold_callback(deep_npuzzle):
+    changes = []
+    instrumentation = Instrumentation(on_threshold=lambda old, new: changes.append((old, new)))
+    solver = IDAStarNPuzzleSolver(deep_npuzzle, ManhattanHeuristic(), instrumentation=instrumentation)
+    solver.solve()
+    assert changes == [(old, new) for old, new, _ in solver.stats.thresholds]
+    assert changes[-1][1] == 16
+    assert all(old < new for old, new in changes)
+
+
+@pytest.mark.parametrize("solver_class", [AStarNPuzleSolver, IDAStarNPuzzleSolver])
+def test_phase_timing(deep_npuzzle, solver_class):
+    solver = solver_class(deep_npuzzle, ManhattanHeuristic(), instrumentation=Instrumentation(time_phases=True))
+    solver.solve()
+    phases = solver.stats.phase_seconds
+    assert set(phases) == set(PHASES)
+    assert phases["move_generation"] > 0 and phases["heuristic"] > 0
+    assert sum(phases.values()) < solver.stats.seconds
+
+
+def test_memory_tracing(deep_npuzzle):
+    instrumentation = Instrumentation(trace_memory=True, memory_interval=50, top_allocations=3)
+    solver = AStarNPuzleSolver(deep_npuzzle, ManhattanHeuristic(), instrumentation=instrumentation)
+    solver.solve()
+    stats = solver.stats
+    assert len(stats.memory) == stats.expanded // 50 + 1
+    assert all(peak >= current > 0 for _, current, peak in stats.memory)
+    assert len(stats.top_allocations) == 3
+    assert not tracemalloc.is_tracing()
+
+
+def test_stats_export_as_json(deep_npuzzle):
+    solver = IDAStarNPuzzleSolver(deep_npuzzle, ManhattanHeuristic(), instrumentation=Instrumentation())
+    solver.solve()
+    exported = json.loads(solver.stats.to_json())
+    assert exported["solver"] == "IDAStarNPuzzleSolver"
+    assert exported["expanded"] == solver.stats.expanded
+    assert exported["solution_length"] == 16
+
+
+def test_solvers_without_node_hooks_report_totals(deep_npuzzle):
+    solver = BidirectionalBFSNPuzzleSolver(deep_npuzzle, instrumentation=Instrumentation())
+    solver.solve()
+    assert solver.stats.expanded == solver.num_nodes_explored > 0
+    assert solver.stats.solution_length == 16
@@ -0,0 +1,77 @@
+import itertools
+import random
+from slidingpuzzle.moves import *
+from slidingpuzzle.puzzle import NPuzzle, SlideDirection
+from slidingpuzzle.solver import BFSNPuzzleSolver, IDAStarNPuzzleSolver, ManhattanHeuristic
+
+
+def test_legal_moves_corners_and_center():
+    table = legal_moves(3, 3)
+    assert len(table) == 9
+    assert len(table[0]) == 2
+    assert len(table[1]) == 3
+    assert len(table[4]) == 4
+    for blank, moves in enumerate(table):
+        for move, start in moves:
+            delta_row, delta_col = DIRECTIONS[move].value
+            assert divmod(start, 3) == (blank // 3 + delta_row, blank % 3 + delta_col)
+
+
+def test_legal_moves_rectangular():
+    table = legal_moves(2, 4)
+    assert sorted(start for _, start in table[5]) == [1, 4, 6]
+
+
+def test_depth_two_prunes_only_inverses():
+    automaton = MoveAutomaton(2)
+    assert sorted(automaton.forbidden) == sorted(
+        (move, DIRECTIONS.index(direction.inverse)) for move, direction in enumerate(DIRECTIONS))
+    for move, direction in enumerate(DIRECTIONS):
+        state = automaton.transitions[MoveAutomaton.START][move]
+        assert state != MoveAutomaton.PRUNED
+        for next_move, next_direction in enumerate(DIRECTIONS):
+            pruned = automaton.transitions[state][next_move] == MoveAutomaton.PRUNED
+            assert pruned == (next_direction is direction.inverse)
+
+
+def _slide_all(width, moves):
+    """Board after the moves, starting with the blank in the middle of a board big enough to look unbounded"""
+    placements = list(range(width * width))
+    blank = (width // 2) * width + width // 2
+    for move in moves:
+        delta_row, delta_col = DIRECTIONS[move].value
+        start = blank + delta_row * width + delta_col
+        placements[blank], placements[start] = placements[start], placements[blank]
+        blank = start
+    return placements
+
+
+def test_forbidden_strings_have_equivalents():
+    automaton = MoveAutomaton(6)
+    assert len(automaton.forbidden) > 4
+    for string in automaton.forbidden:
+        target = _slide_all(13, string)
+        alternatives = [moves for length in range(len(string) + 1)
+                        for moves in itertools.product(range(len(DIRECTIONS)), repeat=length)
+                        if moves != string and (length < len(string) or moves < string)]
+        assert any(_slide_all(13, moves) == target for moves in alternatives)
+
+
+def test_deeper_pruning_keeps_optimal_solutions():
+    random.seed(4)
+    solution = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+    for _ in range(5):
+        puzzle = NPuzzle(3, list(solution), solution)
+        for _ in range(40):
+            puzzle = puzzle.slide(random.choice(list(SlideDirection)))
+        optimal = len(BFSNPuzzleSolver(puzzle).solve())
+        shallow = IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), pruning_depth=2)
+        deep = IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), pruning_depth=8)
+        assert len(shallow.solve()) == optimal
+        assert len(deep.solve()) == optimal
+        assert deep.num_nodes_explored <= shallow.num_nodes_explored
+
+
+def test_move_automaton_is_shared():
+    assert move_automaton(4) is move_automaton(4)
+    assert len(move_automaton(8)) > len(move_automaton(2))
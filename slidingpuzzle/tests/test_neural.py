@@ -0,0 +1,80 @@
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import BatchAStarNPuzzleSolver, ManhattanHeuristic, PuzzleNode
+from slidingpuzzle.cache import CachedNPuzzleSolver, SolutionCache
+
+np = pytest.importorskip("numpy")
+from slidingpuzzle.neural import MLPHeuristic  # noqa: E402
+
+EIGHT_SOLUTION = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+
+def apply_solution(puzzle, solution):
+    for direction in solution:
+        puzzle = puzzle.slide(direction)
+    return puzzle
+
+
+@pytest.fixture(scope="module")
+def trained_heuristic():
+    rng = np.random.default_rng(0)
+    boards = [NPuzzle(3, NPuzzle.random_puzzle(3).placements, EIGHT_SOLUTION) for _ in range(2000)]
+    placements = np.array([board.placements for board in boards])
+    # Manhattan distance is a cheap stand-in for true distances as a training target
+    distances = ManhattanHeuristic().h_batch(placements, EIGHT_SOLUTION)
+    heuristic = MLPHeuristic.initialize(3, (64,), rng)
+    losses = heuristic.fit(placements, distances, EIGHT_SOLUTION, epochs=30, learning_rate=3e-3, rng=rng)
+    return heuristic, losses
+
+
+def test_mlp_encode():
+    heuristic = MLPHeuristic.initialize(3, (8,), np.random.default_rng(0))
+    encoded = heuristic.encode([EIGHT_SOLUTION], EIGHT_SOLUTION)
+    assert encoded.shape == (1, 81)
+    assert (encoded.reshape(9, 9) == np.eye(9)).all()
+
+
+def test_mlp_fit_reduces_loss(trained_heuristic):
+    heuristic, losses = trained_heuristic
+    assert losses[-1] < losses[0] / 10
+    placements = np.array([NPuzzle.random_puzzle(3).placements for _ in range(200)])
+    error = heuristic.h_batch(placements, EIGHT_SOLUTION) - ManhattanHeuristic().h_batch(placements, EIGHT_SOLUTION)
+    assert np.abs(error).mean() < 2
+
+
+def test_mlp_h_matches_h_batch(trained_heuristic):
+    heuristic, _ = trained_heuristic
+    puzzles = [NPuzzle(3, NPuzzle.random_puzzle(3).placements, EIGHT_SOLUTION) for _ in range(10)]
+    batch = heuristic.h_batch(np.array([puzzle.placements for puzzle in puzzles]), EIGHT_SOLUTION)
+    assert batch.tolist() == [heuristic.h(PuzzleNode(puzzle, [], [], None, None)) for puzzle in puzzles]
+    assert (batch >= 0).all()
+
+
+def test_mlp_save_load(tmp_path, trained_heuristic):
+    heuristic, _ = trained_heuristic
+    heuristic.save(tmp_path / "eight.npz")
+    loaded = MLPHeuristic.load(tmp_path / "eight.npz")
+    assert loaded.width == 3
+    placements = np.array([NPuzzle.random_puzzle(3).placements for _ in range(20)])
+    assert np.array_equal(loaded.predict(placements, EIGHT_SOLUTION), heuristic.predict(placements, EIGHT_SOLUTION))
+
+
+def test_mlp_with_batch_astar(trained_heuristic):
+    heuristic, _ = trained_heuristic
+    puzzle = NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], EIGHT_SOLUTION)
+    solver = BatchAStarNPuzzleSolver(puzzle, heuristic, batch_size=64)
+    solution = solver.solve()
+    assert apply_solution(puzzle, solution).is_solved()
+    assert len(solution) >= 16
+
+
+def test_inadmissible_solutions_are_not_cached(trained_heuristic):
+    heuristic, _ = trained_heuristic
+    puzzle = NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], EIGHT_SOLUTION)
+    cache = SolutionCache()
+    solver = CachedNPuzzleSolver(BatchAStarNPuzzleSolver(puzzle, heuristic), cache)
+    assert not solver.optimal
+    assert solver.solve()
+    assert len(cache) == 0
+    assert CachedNPuzzleSolver(BatchAStarNPuzzleSolver(puzzle, ManhattanHeuristic()), cache).solve()
+    assert len(cache) == 1
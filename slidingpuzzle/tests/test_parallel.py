@@ -0,0 +1,49 @@
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import ManhattanHeuristic, LinearConflictHeuristic, SearchBudget
+from slidingpuzzle.parallel import *
+
+SOLUTION = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+
+def test_owner_of_spreads_states():
+    owners = [owner_of(state, 4) for state in range(1000)]
+    assert set(owners) == {0, 1, 2, 3}
+    assert min(owners.count(worker) for worker in range(4)) > 150
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+@pytest.mark.parametrize("placements,optimal", [([1, 2, 6, 3, 5, 0, 4, 7, 8], 13),
+                                                ([8, 7, 6, 5, 4, 3, 2, 1, 0], 30)])
+def test_hda_star_is_optimal(workers, placements, optimal):
+    puzzle = NPuzzle(3, placements, SOLUTION)
+    solver = HDAStarNPuzzleSolver(puzzle, LinearConflictHeuristic(), workers=workers, batch_size=16)
+    solution = solver.solve()
+    assert len(solution) == optimal
+    for direction in solution:
+        puzzle = puzzle.slide(direction)
+    assert puzzle.is_solved()
+    assert len(solver.nodes_per_worker) == workers
+    assert sum(solver.nodes_per_worker) == solver.num_nodes_explored
+
+
+def test_hda_star_solved_and_unsolvable():
+    assert HDAStarNPuzzleSolver(NPuzzle(3, SOLUTION, SOLUTION), ManhattanHeuristic(), workers=2).solve() == []
+    assert HDAStarNPuzzleSolver(NPuzzle(2, [0, 2, 1, 3]), ManhattanHeuristic(), workers=2).solve() is False
+
+
+def test_hda_star_budget():
+    puzzle = NPuzzle(4, [0, 11, 9, 13, 12, 15, 10, 14, 3, 7, 6, 2, 4, 8, 5, 1], [*range(1, 16), 0])
+    solver = HDAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), workers=2, budget=SearchBudget(time_limit=0.5))
+    assert solver.solve() is False
+    assert solver.budget_exhausted
+
+
+@pytest.mark.parametrize("budget", [SearchBudget(max_memory=1 << 20), SearchBudget(stop=lambda: True)])
+def test_hda_star_memory_and_stop_budgets(budget):
+    puzzle = NPuzzle(4, [0, 11, 9, 13, 12, 15, 10, 14, 3, 7, 6, 2, 4, 8, 5, 1], [*range(1, 16), 0])
+    solver = HDAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), workers=2, budget=budget)
+    assert solver.solve() is False
+    assert solver.budget_exhausted
+    if budget.max_memory is not None:
+        assert sum(solver.memory_per_worker) >= budget.max_memory
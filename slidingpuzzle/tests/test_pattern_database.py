@@ -0,0 +1,100 @@
+import pickle
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import PuzzleNode, IDAStarNPuzzleSolver, ManhattanHeuristic
+from slidingpuzzle.pattern_database import *
+
+
+@pytest.fixture(scope="module")
+def eight_puzzle_heuristic():
+    return PatternDatabaseHeuristic.build(3, "4-4", solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+
+
+def node(puzzle):
+    return PuzzleNode(puzzle, [], [], None, None)
+
+
+def test_parse_partition():
+    assert parse_partition("6-6-3", 4, [*range(1, 16), 0]) == [(1, 2, 3, 4, 5, 6), (7, 8, 9, 10, 11, 12),
+                                                              (13, 14, 15)]
+    assert parse_partition([[1, 3], [2]], 2) == [(1, 3), (2,)]
+    with pytest.raises(AssertionError):
+        parse_partition("4-3", 3)
+
+
+def test_pattern_database_heuristic_is_admissible(eight_puzzle_heuristic):
+    solution = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+    assert eight_puzzle_heuristic.h(node(NPuzzle(3, solution, solution))) == 0
+    for placements in ([1, 2, 6, 3, 5, 0, 4, 7, 8], [3, 5, 6, 1, 4, 8, 0, 7, 2], [1, 2, 5, 3, 4, 0, 6, 7, 8]):
+        puzzle = NPuzzle(3, placements, solution)
+        optimal = len(IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic()).solve())
+        h = eight_puzzle_heuristic.h(node(puzzle))
+        assert ManhattanHeuristic().h(node(puzzle)) <= h <= optimal
+
+
+def test_pattern_database_solves_with_idastar(eight_puzzle_heuristic):
+    puzzle = NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], [1, 2, 3, 4, 5, 6, 7, 8, 0])
+    assert len(IDAStarNPuzzleSolver(puzzle, eight_puzzle_heuristic).solve()) == 13
+
+
+def test_pattern_database_save_load(tmp_path, eight_puzzle_heuristic):
+    paths = []
+    for database in eight_puzzle_heuristic.databases:
+        path = str(tmp_path / database_filename(3, database.tiles))
+        database.save(path)
+        paths.append(path)
+    loaded = PatternDatabaseHeuristic.load(paths)
+    assert [bytes(database.table) for database in loaded.databases] == \
+           [bytes(database.table) for database in eight_puzzle_heuristic.databases]
+    assert loaded.databases[0].solution == (1, 2, 3, 4, 5, 6, 7, 8, 0)
+
+    unpickled = pickle.loads(pickle.dumps(loaded))
+    puzzle = NPuzzle(3, [3, 5, 6, 1, 4, 8, 0, 7, 2], [1, 2, 3, 4, 5, 6, 7, 8, 0])
+    assert unpickled.h(node(puzzle)) == eight_puzzle_heuristic.h(node(puzzle))
+
+
+def test_pattern_database_load_rejects_other_files(tmp_path):
+    path = tmp_path / "bogus.bin"
+    path.write_bytes(b"not a database")
+    with pytest.raises(ValueError):
+        PatternDatabase.load(str(path))
+
+
+def test_pattern_database_stats(eight_puzzle_heuristic):
+    stats = eight_puzzle_heuristic.stats()
+    assert stats["table_bytes"] == [9 * 8 * 7 * 6, 9 * 8 * 7 * 6]
+    assert stats["total_bytes"] == 2 * 9 * 8 * 7 * 6
+    assert eight_puzzle_heuristic.measure_lookup_cost(10) > 0
+
+
+def test_build_tool(tmp_path, capsys):
+    main([str(tmp_path), "--width", "2", "--partition", "2-1", "--lookup-samples", "10"])
+    assert len(list(tmp_path.iterdir())) == 2
+    assert "lookup cost" in capsys.readouterr().out
+
+
+def test_pattern_database_h_batch(eight_puzzle_heuristic):
+    np = pytest.importorskip("numpy")
+    solution = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+    puzzles = [NPuzzle(3, NPuzzle.random_puzzle(3).placements, solution) for _ in range(50)]
+    expected = [eight_puzzle_heuristic.h(node(puzzle)) for puzzle in puzzles]
+    placements = np.array([puzzle.placements for puzzle in puzzles])
+    assert eight_puzzle_heuristic.h_batch(placements, solution).tolist() == expected
+    with pytest.raises(AssertionError):
+        eight_puzzle_heuristic.h_batch(placements, list(range(9)))
+    with pytest.raises(AssertionError):
+        eight_puzzle_heuristic.h(node(NPuzzle(3, puzzles[0].placements, list(range(9)))))
+
+
+def test_numpy_build_matches_python_build():
+    pytest.importorskip("numpy")
+    from slidingpuzzle.pattern_database import _build_table, _build_table_numpy
+    solution = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+    for tiles in [(1, 2, 3, 4), (5, 6, 7, 8)]:
+        goal = tuple(solution.index(tile) for tile in tiles)
+        assert _build_table_numpy(3, goal, 8, chunk_size=1000) == _build_table(3, goal, 8)
+
+
+def test_build_refuses_huge_patterns():
+    with pytest.raises(AssertionError):
+        PatternDatabase.build(4, range(1, 8))
@@ -1,5 +1,7 @@
 import pytest
 import copy
+import itertools
+import random
 from slidingpuzzle.puzzle import *
 
 
@@ -108,6 +110,12 @@ def test_sliding_puzzle_slide(almost_solved_sliding_puzzle):
         almost_solved_sliding_puzzle.slide(action)
 
 
+def test_sliding_puzzle_slide_leaves_original(almost_solved_sliding_puzzle):
+    result = almost_solved_sliding_puzzle.slide(Action(0, 0, 0, 1))
+    assert almost_solved_sliding_puzzle.placements == [1, 0, 2, 3, 4, 5, 6, 7, 8]
+    assert result.solution == almost_solved_sliding_puzzle.solution
+
+
 def test_sliding_puzzle_legal_start_end(almost_solved_sliding_puzzle):
     assert not almost_solved_sliding_puzzle._legal_start_end(0, -1, 0, 0)
     assert not almost_solved_sliding_puzzle._legal_start_end(0, 0, 0, -1)
@@ -219,6 +227,52 @@ def test_npuzzle_is_solvable(example_npuzzle1, example_npuzzle2):
         assert puzzle.is_solvable()
 
 
+def test_npuzzle_is_solvable_relative_to_solution():
+    # with the blank first in the solution, the classic blank-last rule gives the opposite answer
+    solution = list(range(16))
+    placements = [1, 0] + list(range(2, 16))
+    assert NPuzzle(4, placements, solution).is_solvable()
+    assert not NPuzzle(4, [2, 1, 0] + list(range(3, 16)), solution).is_solvable()
+    assert NPuzzle(4, [4, 1, 2, 3, 0] + list(range(5, 16)), solution).is_solvable()
+
+
+def _reachable(n_rows, n_cols):
+    start = tuple(range(n_rows * n_cols))
+    reached, frontier = {start}, [start]
+    while frontier:
+        board = frontier.pop()
+        blank = board.index(0)
+        for start_cell in (blank - n_cols, blank + n_cols, blank - 1, blank + 1):
+            if 0 <= start_cell < n_rows * n_cols and (start_cell // n_cols == blank // n_cols
+                                                       or start_cell % n_cols == blank % n_cols):
+                child = list(board)
+                child[blank], child[start_cell] = child[start_cell], 0
+                child = tuple(child)
+                if child not in reached:
+                    reached.add(child)
+                    frontier.append(child)
+    return reached
+
+
+@pytest.mark.parametrize("n_rows,n_cols", [(2, 3), (3, 2), (2, 2), (3, 3)])
+def test_batch_is_solvable_matches_reachability(n_rows, n_cols):
+    np = pytest.importorskip("numpy")
+    boards = list(itertools.permutations(range(n_rows * n_cols)))
+    result = batch_is_solvable(np.array(boards), n_rows, n_cols)
+    assert result.sum() == len(boards) // 2
+    assert {board for board, solvable in zip(boards, result) if solvable} == _reachable(n_rows, n_cols)
+
+
+def test_batch_is_solvable_matches_npuzzle():
+    np = pytest.importorskip("numpy")
+    random.seed(5)
+    for width in (3, 4, 5):
+        solution = list(range(1, width * width)) + [0]
+        boards = [random.sample(range(width * width), width * width) for _ in range(50)]
+        expected = [NPuzzle(width, board, solution).is_solvable() for board in boards]
+        assert batch_is_solvable(boards, width, solution=solution).tolist() == expected
+
+
 def test_npuzzle_inversion_count(example_npuzzle2):
     assert example_npuzzle2._get_inv_count() == 1
 
@@ -237,4 +291,97 @@ def test_npuzzle_deep_copy(example_npuzzle1):
     my_deep_copy = copy.deepcopy(example_npuzzle1)
     assert example_npuzzle1 == my_deep_copy
     assert isinstance(my_deep_copy, NPuzzle)
-    assert id(example_npuzzle1) != id(my_deep_copy)
\ No newline at end of file
+    assert id(example_npuzzle1) != id(my_deep_copy)
+
+
+@pytest.mark.parametrize("width", [2, 3, 4, 5])
+def test_pack_unpack_round_trip(width):
+    placements = generate_random_puzzle_placements(width, width)
+    assert unpack_state(width, pack_placements(width, placements)) == placements
+
+
+@pytest.mark.parametrize("width", [3, 4, 5])
+def test_batch_unpack_states(width):
+    pytest.importorskip("numpy")
+    boards = [generate_random_puzzle_placements(width, width) for _ in range(20)]
+    unpacked = batch_unpack_states(width, [pack_placements(width, board) for board in boards])
+    assert unpacked.tolist() == boards
+
+
+def test_bits_per_tile():
+    assert bits_per_tile(3) == 4
+    assert bits_per_tile(4) == 4
+    assert bits_per_tile(5) == 5
+    assert bits_per_tile(12) == 8
+
+
+def test_packed_npuzzle_conversion(example_npuzzle1):
+    packed = example_npuzzle1.pack()
+    assert isinstance(packed, PackedNPuzzle)
+    assert packed.blank == 1
+    assert packed.placements == example_npuzzle1.placements
+    assert list(packed.solution) == example_npuzzle1.solution
+    assert packed.to_npuzzle() == example_npuzzle1
+    assert str(packed) == str(example_npuzzle1)
+    assert packed.get(0, 0) == 1
+
+
+@pytest.mark.parametrize("width", [3, 4, 5])
+def test_packed_npuzzle_slide_matches_npuzzle(width):
+    puzzle = NPuzzle.random_puzzle(width)
+    packed = puzzle.pack()
+    for _ in range(50):
+        direction = random.choice(list(SlideDirection))
+        puzzle = puzzle.slide(direction)
+        packed = packed.slide(direction)
+        assert packed.placements == puzzle.placements
+        assert packed.get_blank_positions() == puzzle.get_blank_positions()
+
+
+def test_packed_npuzzle_slide(example_npuzzle1):
+    packed = example_npuzzle1.pack()
+    result = packed.slide(SlideDirection.LEFT)
+    assert isinstance(result, PackedNPuzzle)
+    assert result.is_solved()
+    assert not packed.is_solved()
+    assert result.slide(SlideDirection.LEFT) is result
+    assert hash(result) == hash(PackedNPuzzle.from_npuzzle(example_npuzzle1.slide(SlideDirection.LEFT)))
+    assert copy.deepcopy(result) == result
+
+
+def test_slide_direction_inverse():
+    assert SlideDirection.UP.inverse == SlideDirection.DOWN
+    assert SlideDirection.DOWN.inverse == SlideDirection.UP
+    assert SlideDirection.LEFT.inverse == SlideDirection.RIGHT
+    assert SlideDirection.RIGHT.inverse == SlideDirection.LEFT
+
+
+def test_packed_sliding_puzzle_slide_matches_sliding_puzzle():
+    puzzle = SlidingPuzzle(3, 4, [1, 0, 2, 3, 4, 5, 0, 6, 7, 8, 9, 10])
+    packed = puzzle.pack()
+    assert isinstance(packed, PackedSlidingPuzzle) and packed.placements == puzzle.placements
+    assert packed.get_blank_positions() == puzzle.get_blank_positions()
+    for action in [Action(0, 0, 0, 1), Action(1, 0, 0, 0), Action(1, 1, 1, 0), Action(0, 1, 1, 1)]:
+        puzzle = puzzle.slide(action)
+        packed = packed.slide(action)
+        assert packed.placements == puzzle.placements
+        assert packed.get_blank_positions() == puzzle.get_blank_positions()
+    assert packed.to_sliding_puzzle() == puzzle
+    with pytest.raises(AssertionError):
+        packed.slide(Action(1, 0, 1, 1))
+
+
+@pytest.mark.parametrize("placements,solution,solvable",
+                         [([2, 1, 3, 4, 5, 0], [1, 2, 3, 4, 5, 0], False),
+                          ([1, 2, 3, 4, 0, 5], [1, 2, 3, 4, 5, 0], True),
+                          ([4, 1, 2, 5, 3, 0], [1, 2, 3, 4, 5, 0], True),
+                          ([2, 1, 3, 4, 0, 0], [1, 2, 3, 4, 0, 0], True),
+                          ([2, 1, 3, 4, 5, 6], [1, 2, 3, 4, 5, 6], False),
+                          ([1, 2, 3, 4, 5, 7], [1, 2, 3, 4, 5, 0], False)])
+def test_sliding_puzzle_is_solvable(placements, solution, solvable):
+    assert SlidingPuzzle(2, 3, placements, solution).is_solvable() == solvable
+
+
+def test_single_row_is_solvable():
+    assert SlidingPuzzle(1, 4, [1, 0, 2, 0], [1, 2, 0, 0]).is_solvable()
+    assert not SlidingPuzzle(1, 4, [2, 0, 1, 0], [1, 2, 0, 0]).is_solvable()
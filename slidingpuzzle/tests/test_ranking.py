@@ -0,0 +1,89 @@
+import itertools
+import math
+import random
+import pytest
+from slidingpuzzle.ranking import *
+
+np = pytest.importorskip("numpy")
+
+
+def test_lehmer_rank_is_lexicographic():
+    for rank, permutation in enumerate(itertools.permutations(range(5))):
+        assert lehmer_rank(permutation) == rank
+        assert lehmer_unrank(rank, 5) == list(permutation)
+
+
+def test_lehmer_rank_parity():
+    assert lehmer_rank_and_parity([0, 1, 2, 3]) == (0, 0)
+    assert lehmer_rank_and_parity([1, 0, 2, 3]) == (6, 1)
+    assert lehmer_rank_and_parity([10, 30, 20]) == (1, 1)
+
+
+def test_myrvold_ruskey_rank_is_a_bijection():
+    ranks = {myrvold_ruskey_rank(permutation) for permutation in itertools.permutations(range(6))}
+    assert ranks == set(range(math.factorial(6)))
+    for rank in range(math.factorial(6)):
+        assert myrvold_ruskey_rank(myrvold_ruskey_unrank(rank, 6)) == rank
+
+
+@pytest.mark.parametrize("n,k", [(9, 4), (16, 3), (6, 6)])
+def test_rank_partial_round_trip(n, k):
+    assert factorial_count(n, k) == math.factorial(n) // math.factorial(n - k)
+    for rank in range(0, factorial_count(n, k), 7):
+        positions = unrank_partial(rank, n, k)
+        assert len(set(positions)) == k
+        assert rank_partial(positions, n) == rank
+
+
+def test_rank_placements():
+    assert rank_placements(list(range(16))) == 0
+    placements = random.sample(range(16), 16)
+    assert unrank_placements(rank_placements(placements), 4) == placements
+
+
+@pytest.mark.parametrize("n", [9, 16])
+def test_batch_lehmer_matches_scalar(n):
+    permutations = np.array([random.sample(range(n), n) for _ in range(50)])
+    ranks = batch_lehmer_rank(permutations)
+    assert list(ranks) == [lehmer_rank(permutation) for permutation in permutations.tolist()]
+    assert (batch_lehmer_unrank(ranks, n) == permutations).all()
+
+
+@pytest.mark.parametrize("n", [9, 16])
+def test_batch_myrvold_ruskey_matches_scalar(n):
+    permutations = np.array([random.sample(range(n), n) for _ in range(50)])
+    ranks = batch_myrvold_ruskey_rank(permutations)
+    assert list(ranks) == [myrvold_ruskey_rank(permutation) for permutation in permutations.tolist()]
+    assert (batch_myrvold_ruskey_unrank(ranks, n) == permutations).all()
+
+
+def test_batch_rank_partial_matches_scalar():
+    positions = np.array([random.sample(range(16), 6) for _ in range(50)])
+    assert list(batch_rank_partial(positions, 16)) == [rank_partial(row, 16) for row in positions.tolist()]
+
+    assert (batch_unrank_partial(batch_rank_partial(positions, 16), 16, 6) == positions).all()
+    ranks = np.arange(factorial_count(5, 3))
+    assert batch_unrank_partial(ranks, 5, 3).tolist() == [unrank_partial(rank, 5, 3) for rank in ranks.tolist()]
+
+def test_batch_rejects_long_permutations():
+    with pytest.raises(ValueError):
+        batch_lehmer_rank(np.arange(21)[None, :])
+
+
+def test_inversion_count_matches_brute_force():
+    random.seed(8)
+    for n in (0, 1, 5, 40):
+        values = random.sample(range(1000), n)
+        expected = sum(values[i] > values[j] for i in range(n) for j in range(i + 1, n))
+        assert inversion_count(values) == expected
+        assert inversion_parity(values) == expected % 2
+    assert inversion_count([3, 1, 3, 2]) == 3
+    assert inversion_parity([3, 1, 3, 2]) == 1
+
+
+def test_batch_permutation_parity_long_rows():
+    rng = np.random.default_rng(2)
+    permutations = np.array([rng.permutation(49) for _ in range(200)])
+    expected = [inversion_parity(list(row)) for row in permutations]
+    assert batch_permutation_parity(permutations).tolist() == expected
+    assert batch_permutation_parity([[0, 1, 2], [1, 0, 2]]).tolist() == [0, 1]
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import pytest
+from slidingpuzzle.benchmark.instances import get_instance_set
+from slidingpuzzle.cache import SolutionCache
+from slidingpuzzle.puzzle import NPuzzle, SlideDirection
+from slidingpuzzle.service import *
+
+SOLUTION = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+EASY = {"width": 3, "placements": [1, 2, 6, 3, 5, 0, 4, 7, 8], "solution": SOLUTION}
+# takes IDA* far longer than any test, so it only ends when it is stopped
+HARD = {"width": 4, "placements": list(get_instance_set("korf100")[0].placements), "solver": "idastar"}
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, **message):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self):
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 30))
+
+    async def ask(self, **message):
+        await self.send(**message)
+        return await self.receive()
+
+    async def wait_until(self, condition):
+        for _ in range(300):
+            metrics = await self.ask(op="metrics")
+            if condition(metrics):
+                return metrics
+            await asyncio.sleep(0.02)
+        raise AssertionError(f"never reached, last metrics {metrics}")
+
+
+def serve(test, **options):
+    """Run test(service, client) against a service listening on a local TCP port"""
+    async def main():
+        async with SolverService(**options) as service:
+            server = await service.serve_tcp()
+            client = Client(*await asyncio.open_connection(*server.sockets[0].getsockname()[:2]))
+            try:
+                await test(service, client)
+            finally:
+                client.writer.close()
+    asyncio.run(main())
+
+
+def check_solution(request, reply):
+    assert reply["status"] == SOLVED
+    puzzle = NPuzzle(request["width"], request["placements"], request["solution"])
+    for name in reply["solution"]:
+        puzzle = puzzle.slide(SlideDirection[name])
+    assert puzzle.is_solved()
+
+
+def test_solve_over_tcp():
+    async def test(service, client):
+        reply = await client.ask(op="solve", id="a", **EASY)
+        assert reply["id"] == "a"
+        assert len(reply["solution"]) == 13 and reply["nodes"] > 0
+        check_solution(EASY, reply)
+        reply = await client.ask(id="b", solver="idastar", heuristic="linear-conflict", **EASY)
+        assert len(reply["solution"]) == 13
+    serve(test, workers=1)
+
+
+def test_unsolvable_and_bad_requests():
+    async def test(service, client):
+        unsolvable = dict(EASY, placements=[2, 1, 6, 3, 5, 0, 4, 7, 8])
+        assert (await client.ask(id=1, **unsolvable))["status"] == UNSOLVABLE
+        assert (await client.ask(id=2, width=3, placements=[1, 2, 3]))["status"] == ERROR
+        assert (await client.ask(id=3, **dict(HARD, solver="bfs")))["status"] == ERROR
+        assert (await client.ask(id=4, heuristic="nonsense", **EASY))["status"] == ERROR
+        assert (await client.ask(id=5, op="nonsense"))["status"] == ERROR
+        client.writer.write(b"not json\n")
+        assert (await client.receive())["status"] == ERROR
+        metrics = await client.ask(op="metrics")
+        assert metrics["requests"] == 6
+        assert metrics["statuses"][ERROR] == 5 and metrics["statuses"][UNSOLVABLE] == 1
+    serve(test, workers=1)
+
+
+def test_identical_requests_share_a_solve():
+    async def test(service, client):
+        await client.send(id=1, **EASY)
+        await client.send(id=2, **EASY)
+        first, second = await client.receive(), await client.receive()
+        assert {first["id"], second["id"]} == {1, 2}
+        assert first["solution"] == second["solution"]
+        metrics = await client.ask(op="metrics")
+        assert metrics["coalesced"] == 1 and metrics["statuses"][SOLVED] == 2
+        assert metrics["throughput"] > 0 and metrics["in_flight"] == 0
+    serve(test, workers=2)
+
+
+def test_deadline_stops_the_worker():
+    async def test(service, client):
+        reply = await client.ask(id=1, deadline=0.2, **HARD)
+        assert reply["status"] == DEADLINE_EXCEEDED and reply["seconds"] < 5
+        await client.wait_until(lambda metrics: metrics["running"] == 0)
+        # the only worker is free again
+        check_solution(EASY, await client.ask(id=2, **EASY))
+    serve(test, workers=1)
+
+
+def test_cancel():
+    async def test(service, client):
+        await client.send(id="hard", **HARD)
+        await client.wait_until(lambda metrics: metrics["running"] == 1)
+        await client.send(op="cancel", id="stop", target="hard")
+        replies = {reply["id"]: reply for reply in [await client.receive(), await client.receive()]}
+        assert replies["stop"]["cancelled"]
+        assert replies["hard"]["status"] == CANCELLED
+        await client.wait_until(lambda metrics: metrics["running"] == 0)
+        assert not (await client.ask(op="cancel", target="hard"))["cancelled"]
+    serve(test, workers=1)
+
+
+def test_overloaded_when_full():
+    async def test(service, client):
+        await client.send(id=1, **HARD)
+        await client.wait_until(lambda metrics: metrics["running"] == 1)
+        await client.send(id=2, **dict(HARD, solver="astar"))
+        await client.wait_until(lambda metrics: metrics["queue_depth"] == 1)
+        reply = await client.ask(id=3, **EASY)
+        assert reply["status"] == OVERLOADED
+    serve(test, workers=1, max_queue=1, reject_when_full=True)
+
+
+def test_solve_task_cancellation_and_cache():
+    async def main():
+        async with SolverService(workers=1, cache=SolutionCache()) as service:
+            task = asyncio.create_task(service.solve(HARD))
+            while not service.running:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            first = await service.solve(EASY)
+            second = await service.solve(EASY)
+            assert first["nodes"] > 0 and second["nodes"] == 0
+            assert second["solution"] == first["solution"] and service.cache_hits == 1
+    asyncio.run(main())
+
+
+def test_health_over_unix_socket(tmp_path):
+    async def main():
+        async with SolverService(workers=2) as service:
+            await service.serve_unix(str(tmp_path / "solver.sock"))
+            client = Client(*await asyncio.open_unix_connection(str(tmp_path / "solver.sock")))
+            health = await client.ask(op="health", id="h")
+            assert health["id"] == "h" and health["status"] == "ok"
+            assert health["workers"] == 2 and health["queue_depth"] == 0
+            check_solution(EASY, await client.ask(**EASY))
+            client.writer.close()
+    asyncio.run(main())
+
+
+def test_full_connection_stops_reading():
+    async def test(service, client):
+        await client.send(id=1, deadline=1.5, **HARD)
+        await client.send(id=2, **EASY)
+        await client.send(id=3, **EASY)
+        await client.send(op="health", id=4)
+        # the second solve waits for the first to give up and the third waits behind it, but the reader goes on
+        assert (await client.receive())["id"] == 4
+        await client.send(id=5, **EASY)
+        await client.send(op="health", id=6)
+        # now as many solves wait for admission as max_in_flight allows, so the reader pauses
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.receive(), 0.2)
+        first = await client.receive()
+        assert (first["id"], first["status"]) == (1, DEADLINE_EXCEEDED)
+        assert {(await client.receive())["id"] for _ in range(4)} == {2, 3, 5, 6}
+    serve(test, workers=1, max_in_flight=1)
+
+
+def test_full_queue_still_reads_control_ops():
+    async def test(service, client):
+        await client.send(id=1, **HARD)
+        await client.wait_until(lambda metrics: metrics["running"] == 1)
+        # distinct solves that cannot start: one fills the queue, the next waits for room and the last for admission
+        for heuristic in ("manhattan", "linear-conflict", "walking-distance"):
+            await client.send(id=heuristic, heuristic=heuristic, **dict(HARD, solver="astar"))
+        metrics = await client.wait_until(lambda metrics: metrics["waiting_for_room"] == 1)
+        assert metrics["requests"] == 3 and metrics["queue_depth"] == 2
+
+        for target in ("walking-distance", "linear-conflict"):
+            await client.send(op="cancel", id=f"stop {target}", target=target)
+            replies = {reply["id"]: reply for reply in [await client.receive(), await client.receive()]}
+            assert replies[f"stop {target}"]["cancelled"]
+            assert replies[target]["status"] == CANCELLED
+        metrics = await client.ask(op="metrics")
+        assert metrics["requests"] == 4 and metrics["statuses"][CANCELLED] == 2
+        assert metrics["queue_depth"] == 1 and metrics["waiting_for_room"] == 0
+    serve(test, workers=1, max_queue=1)
+
+
+def test_sqlite_cache_is_used_off_the_event_loop(tmp_path):
+    async def test(service, client):
+        first = await client.ask(id=1, **EASY)
+        second = await client.ask(id=2, **EASY)
+        assert first["nodes"] > 0 and second["nodes"] == 0
+        assert second["solution"] == first["solution"]
+    with SolutionCache(path=str(tmp_path / "cache.sqlite")) as cache:
+        serve(test, workers=1, cache=cache)
+        assert len(cache) == 1
+
+
+def test_only_proven_optimal_solutions_are_cached():
+    async def test(service, client):
+        cut_short = dict(HARD, solver="anytime-astar", max_nodes=20000)
+        for request_id in (1, 2):
+            reply = await client.ask(id=request_id, **cut_short)
+            assert reply["status"] == SOLVED and len(reply["solution"]) > 57 and reply["nodes"] > 0
+        assert (await client.ask(id=3, solver="anytime-astar", **EASY))["nodes"] > 0
+        assert (await client.ask(id=4, solver="anytime-astar", **EASY))["nodes"] == 0
+    serve(test, workers=1, cache=SolutionCache())
+
+
+def test_boards_with_more_than_256_tiles():
+    async def test(service, client):
+        solution = [*range(1, 289), 0]
+        request = {"width": 17, "placements": solution[:-2] + [0, 288], "solution": solution,
+                   "solver": "constructive"}
+        reply = await client.ask(id=1, **request)
+        assert len(reply["solution"]) == 1
+        check_solution(request, reply)
+    serve(test, workers=1)
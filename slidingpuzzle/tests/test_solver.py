@@ -0,0 +1,186 @@
+import random
+import pytest
+from slidingpuzzle.puzzle import NPuzzle, SlideDirection
+from slidingpuzzle.solver import *
+
+
+def apply_solution(puzzle, solution):
+    for direction in solution:
+        puzzle = puzzle.slide(direction)
+    return puzzle
+
+
+@pytest.fixture
+def example_npuzzle():
+    return NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_bfs_solver(example_npuzzle, packed):
+    puzzle = example_npuzzle.pack() if packed else example_npuzzle
+    solution = BFSNPuzzleSolver(puzzle).solve()
+    assert len(solution) == 13
+    assert apply_solution(puzzle, solution).is_solved()
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_astar_solver(example_npuzzle, packed):
+    puzzle = example_npuzzle.pack() if packed else example_npuzzle
+    solution = AStarNPuzleSolver(puzzle, ManhattanHeuristic()).solve()
+    assert apply_solution(puzzle, solution).is_solved()
+    assert all(isinstance(direction, SlideDirection) for direction in solution)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_idastar_solver(example_npuzzle, packed):
+    puzzle = example_npuzzle.pack() if packed else example_npuzzle
+    solver = IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic())
+    solution = solver.solve()
+    assert len(solution) == 13
+    assert apply_solution(puzzle, solution).is_solved()
+    assert puzzle.placements == example_npuzzle.placements
+    assert solver.iterations == len(solver.nodes_per_threshold)
+    assert sum(nodes for _, nodes in solver.nodes_per_threshold) == solver.num_nodes_explored
+    assert solver.nodes_per_second > 0
+
+
+def test_idastar_solver_solved_puzzle():
+    puzzle = NPuzzle(3, [0, 1, 2, 3, 4, 5, 6, 7, 8])
+    assert IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic()).solve() == []
+
+
+def test_idastar_solver_unsolvable_puzzle():
+    solver = IDAStarNPuzzleSolver(NPuzzle(3, [0, 2, 1, 3, 4, 5, 6, 7, 8]), ManhattanHeuristic())
+    assert solver.solve() is False
+    assert not solver.budget_exhausted and solver.num_nodes_explored == 0
+
+
+def brute_force_manhattan(puzzle):
+    width = puzzle.n_cols
+    return sum(abs(index // width - puzzle.solution.index(tile) // width)
+               + abs(index % width - puzzle.solution.index(tile) % width)
+               for index, tile in enumerate(puzzle.placements) if tile)
+
+
+@pytest.mark.parametrize("width", [3, 4, 5])
+def test_manhattan_heuristic_any_width(width):
+    for _ in range(10):
+        puzzle = NPuzzle.random_puzzle(width)
+        assert ManhattanHeuristic().h(PuzzleNode(puzzle, [], [], None, None)) == brute_force_manhattan(puzzle)
+
+
+@pytest.mark.parametrize("heuristic_class", [ManhattanHeuristic, LinearConflictHeuristic])
+@pytest.mark.parametrize("width", [3, 4, 5])
+def test_incremental_heuristics_match_full_evaluation(heuristic_class, width):
+    heuristic = heuristic_class()
+    solution = [*range(1, width * width), 0]
+    puzzle = NPuzzle(width, list(solution), solution)
+    h = heuristic.h(PuzzleNode(puzzle, [], [], None, None))
+    for _ in range(200):
+        blank = puzzle.placements.index(0)
+        direction = random.choice(list(SlideDirection))
+        child = puzzle.slide(direction)
+        start = child.placements.index(0)
+        if start != blank:
+            h += heuristic.h_delta(child, child.placements[blank], start, blank)
+        puzzle = child
+        assert h == heuristic.h(PuzzleNode(puzzle, [], [], None, None))
+
+
+def test_linear_conflict_heuristic():
+    solution = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+    heuristic = LinearConflictHeuristic()
+    assert heuristic.h(PuzzleNode(NPuzzle(3, [2, 1, 3, 4, 5, 6, 7, 8, 0], solution), [], [], None, None)) == 4
+    assert heuristic.h(PuzzleNode(NPuzzle(3, [3, 2, 1, 4, 5, 6, 7, 8, 0], solution), [], [], None, None)) == 8
+    for placements in ([1, 2, 6, 3, 5, 0, 4, 7, 8], [3, 5, 6, 1, 4, 8, 0, 7, 2], [8, 7, 6, 5, 4, 3, 2, 1, 0]):
+        puzzle = NPuzzle(3, placements, solution)
+        optimal = len(IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic()).solve())
+        node = PuzzleNode(puzzle, [], [], None, None)
+        assert ManhattanHeuristic().h(node) <= heuristic.h(node) <= optimal
+        assert len(IDAStarNPuzzleSolver(puzzle, heuristic).solve()) == optimal
+        assert len(AStarNPuzleSolver(puzzle.pack(), heuristic).solve()) == optimal
+
+
+@pytest.mark.parametrize("solver_class", [AStarNPuzleSolver, IDAStarNPuzzleSolver])
+def test_solver_node_budget(solver_class):
+    puzzle = NPuzzle(3, [8, 7, 6, 5, 4, 3, 2, 1, 0], solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    solver = solver_class(puzzle, ManhattanHeuristic(), budget=SearchBudget(max_nodes=50))
+    assert solver.solve() is False
+    assert solver.budget_exhausted
+    assert solver.num_nodes_explored == 50
+
+
+def test_bfs_solver_time_budget():
+    puzzle = NPuzzle(3, [8, 7, 6, 5, 4, 3, 2, 1, 0], solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    solver = BFSNPuzzleSolver(puzzle, budget=SearchBudget(time_limit=0.0, check_interval=1))
+    assert solver.solve() is False
+    assert solver.budget_exhausted
+
+
+def test_solver_stop_budget():
+    puzzle = NPuzzle(3, [8, 7, 6, 5, 4, 3, 2, 1, 0], solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    calls = []
+    budget = SearchBudget(check_interval=16, stop=lambda: calls.append(1) or len(calls) == 3)
+    solver = IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), budget=budget)
+    assert solver.solve() is False
+    assert solver.budget_exhausted
+    assert solver.num_nodes_explored == 48
+
+
+@pytest.mark.parametrize("placements,optimal", [([1, 2, 6, 3, 5, 0, 4, 7, 8], 13),
+                                                ([3, 5, 6, 1, 4, 8, 0, 7, 2], 16),
+                                                ([1, 2, 3, 4, 5, 6, 7, 0, 8], 1),
+                                                ([8, 7, 6, 5, 4, 3, 2, 1, 0], 30)])
+@pytest.mark.parametrize("make_solver", [BidirectionalBFSNPuzzleSolver,
+                                         lambda puzzle: BidirectionalAStarNPuzzleSolver(puzzle, ManhattanHeuristic()),
+                                         lambda puzzle: BidirectionalAStarNPuzzleSolver(puzzle, LinearConflictHeuristic())])
+def test_bidirectional_solvers_are_optimal(make_solver, placements, optimal):
+    puzzle = NPuzzle(3, placements, solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    solution = make_solver(puzzle).solve()
+    assert len(solution) == optimal
+    assert apply_solution(puzzle, solution).is_solved()
+
+
+def test_bidirectional_bfs_explores_fewer_nodes(example_npuzzle):
+    bfs = BFSNPuzzleSolver(example_npuzzle)
+    bidirectional = BidirectionalBFSNPuzzleSolver(example_npuzzle)
+    assert len(bfs.solve()) == len(bidirectional.solve())
+    assert bidirectional.num_nodes_explored * 5 < bfs.num_nodes_explored
+
+
+@pytest.mark.parametrize("make_solver", [BidirectionalBFSNPuzzleSolver,
+                                         lambda puzzle: BidirectionalAStarNPuzzleSolver(puzzle, ManhattanHeuristic())])
+def test_bidirectional_solvers_unsolvable(make_solver):
+    assert make_solver(NPuzzle(2, [0, 2, 1, 3])).solve() is False
+    assert make_solver(NPuzzle(2, [0, 1, 2, 3])).solve() == []
+
+
+@pytest.mark.parametrize("heuristic", [ManhattanHeuristic(), LinearConflictHeuristic()])
+def test_h_batch_matches_h(heuristic):
+    np = pytest.importorskip("numpy")
+    random.seed(3)
+    for width in (3, 4):
+        solution = [*range(1, width * width), 0]
+        puzzles = [NPuzzle(width, NPuzzle.random_puzzle(width).placements, solution) for _ in range(30)]
+        placements = np.array([puzzle.placements for puzzle in puzzles])
+        expected = [heuristic.h(PuzzleNode(puzzle, [], [], None, None)) for puzzle in puzzles]
+        assert heuristic.h_batch(placements, solution).tolist() == expected
+
+
+@pytest.mark.parametrize("batch_size", [1, 16, 256])
+@pytest.mark.parametrize("placements,optimal", [([1, 2, 6, 3, 5, 0, 4, 7, 8], 13),
+                                                ([1, 2, 3, 4, 5, 6, 7, 8, 0], 0),
+                                                ([8, 7, 6, 5, 4, 3, 2, 1, 0], 30)])
+def test_batch_astar_is_optimal(batch_size, placements, optimal):
+    pytest.importorskip("numpy")
+    puzzle = NPuzzle(3, placements, solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    solver = BatchAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), batch_size)
+    solution = solver.solve()
+    assert len(solution) == optimal
+    assert apply_solution(puzzle, solution).is_solved()
+    assert solver.num_batches <= max(solver.num_nodes_explored, 1)
+
+
+def test_batch_astar_unsolvable():
+    pytest.importorskip("numpy")
+    assert BatchAStarNPuzzleSolver(NPuzzle(2, [0, 2, 1, 3]), ManhattanHeuristic()).solve() is False
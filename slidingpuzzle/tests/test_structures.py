@@ -0,0 +1,73 @@
+import heapq
+import random
+import pytest
+from slidingpuzzle.puzzle import NPuzzle, SlideDirection
+from slidingpuzzle.solver import BFSNPuzzleSolver
+from slidingpuzzle.structures import *
+
+
+def test_node_store_path():
+    nodes = NodeStore()
+    root = nodes.add(10, 0, -1, 0, 0)
+    child = nodes.add(11, 1, root, list(SlideDirection).index(SlideDirection.LEFT), 1)
+    grandchild = nodes.add(12, 4, child, list(SlideDirection).index(SlideDirection.UP), 2)
+    assert len(nodes) == 3
+    assert nodes.path(root) == []
+    assert nodes.path(grandchild) == [SlideDirection.LEFT, SlideDirection.UP]
+    assert nodes.g_values[grandchild] == 2
+    assert nodes.nbytes == 3 * (8 + 2 + 8 + 1 + 4)
+
+
+def test_node_store_wide_states():
+    nodes = NodeStore(state_bits=200)
+    nodes.add(1 << 150, 0, -1, 0, 0)
+    assert nodes.states[0] == 1 << 150
+
+
+def test_solver_keeps_nodes_in_store():
+    puzzle = NPuzzle(3, [1, 2, 6, 3, 5, 0, 4, 7, 8], solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    solver = BFSNPuzzleSolver(puzzle)
+    solution = solver.solve()
+    assert isinstance(solver.nodes, NodeStore)
+    assert solver.nodes.path(solver.solution_node) == solution
+    assert solver.nodes.nbytes < 30 * len(solver.nodes)
+
+
+def test_bucket_queue_orders_by_f_then_deeper_g():
+    queue = BucketQueue()
+    queue.push(5, 1, "a")
+    queue.push(3, 0, "b")
+    queue.push(5, 3, "c")
+    queue.push(3, 2, "d")
+    assert len(queue) == 4
+    assert [queue.pop() for _ in range(4)] == [(3, 2, "d"), (3, 0, "b"), (5, 3, "c"), (5, 1, "a")]
+    assert not queue
+    with pytest.raises(IndexError):
+        queue.pop()
+
+
+def test_bucket_queue_shallower_ties_and_reuse():
+    queue = BucketQueue(prefer_deeper=False)
+    queue.push(4, 2, "a")
+    queue.push(4, 1, "b")
+    assert queue.pop() == (4, 1, "b")
+    queue.push(2, 5, "c")
+    assert queue.pop() == (2, 5, "c")
+    assert queue.pop() == (4, 2, "a")
+    queue.push(7, 0, "d")
+    assert queue.pop() == (7, 0, "d")
+
+
+def test_bucket_queue_matches_heap():
+    queue = BucketQueue()
+    heap = []
+    for i in range(500):
+        f, g = random.randrange(40), random.randrange(20)
+        queue.push(f, g, i)
+        heapq.heappush(heap, (f, -g))
+        if random.random() < 0.4:
+            f, g, _ = queue.pop()
+            assert (f, -g) == heapq.heappop(heap)
+    while queue:
+        f, g, _ = queue.pop()
+        assert (f, -g) == heapq.heappop(heap)
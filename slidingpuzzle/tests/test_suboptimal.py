@@ -0,0 +1,109 @@
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import *
+from slidingpuzzle.suboptimal import *
+from slidingpuzzle.instrumentation import Instrumentation
+from slidingpuzzle.benchmark.instances import get_instance_set, to_puzzle
+
+EIGHT_SOLUTION = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+
+def _is_solution(puzzle, solution):
+    for direction in solution:
+        puzzle = puzzle.slide(direction)
+    return puzzle.is_solved()
+
+
+@pytest.fixture
+def graded_instances():
+    return get_instance_set("eight-graded")[::6]
+
+
+@pytest.mark.parametrize("weight", [1.0, 1.5, 3.0])
+def test_weighted_astar_bound(graded_instances, weight):
+    for instance in graded_instances:
+        solution = WeightedAStarNPuzzleSolver(to_puzzle(instance), ManhattanHeuristic(), weight).solve()
+        assert _is_solution(to_puzzle(instance), solution)
+        assert instance.optimal_length <= len(solution) <= weight * instance.optimal_length
+
+
+@pytest.mark.parametrize("epsilon", [1.0, 1.25, 2.0])
+def test_focal_search_bound(graded_instances, epsilon):
+    for instance in graded_instances:
+        solution = FocalSearchNPuzzleSolver(to_puzzle(instance), LinearConflictHeuristic(), epsilon).solve()
+        assert _is_solution(to_puzzle(instance), solution)
+        assert instance.optimal_length <= len(solution) <= epsilon * instance.optimal_length
+
+
+@pytest.mark.parametrize("make_solver", [lambda puzzle: GreedyBestFirstNPuzzleSolver(puzzle, ManhattanHeuristic()),
+                                         lambda puzzle: BeamSearchNPuzzleSolver(puzzle, ManhattanHeuristic(), 100)])
+def test_unbounded_solvers_find_solutions(graded_instances, make_solver):
+    for instance in graded_instances:
+        solution = make_solver(to_puzzle(instance)).solve()
+        assert _is_solution(to_puzzle(instance), solution)
+        assert len(solution) >= instance.optimal_length
+
+
+def test_solved_puzzle():
+    puzzle = NPuzzle(3, EIGHT_SOLUTION, EIGHT_SOLUTION)
+    for solver_class in (WeightedAStarNPuzzleSolver, GreedyBestFirstNPuzzleSolver, AnytimeWeightedAStarNPuzzleSolver,
+                         FocalSearchNPuzzleSolver, BeamSearchNPuzzleSolver):
+        assert solver_class(puzzle, ManhattanHeuristic()).solve() == []
+
+
+def test_narrow_beam_can_fail():
+    puzzle = NPuzzle(3, [1, 3, 0, 8, 2, 5, 4, 7, 6], EIGHT_SOLUTION)
+    assert BeamSearchNPuzzleSolver(puzzle, ManhattanHeuristic(), beam_width=1).solve() is False
+    assert len(BeamSearchNPuzzleSolver(puzzle, ManhattanHeuristic(), beam_width=10).solve()) == 8
+
+
+def test_anytime_converges_to_optimal():
+    instance = get_instance_set("eight-graded")[-1]
+    solver = AnytimeWeightedAStarNPuzzleSolver(to_puzzle(instance), ManhattanHeuristic(), weight=5.0)
+    solutions = list(solver.solutions())
+    lengths = [len(solution) for solution in solutions]
+    assert lengths == sorted(lengths, reverse=True) and len(set(lengths)) == len(lengths)
+    assert lengths[-1] == instance.optimal_length
+    assert all(_is_solution(to_puzzle(instance), solution) for solution in solutions)
+    assert solver.proven_optimal and solver.solution_is_optimal()
+    assert not AnytimeWeightedAStarNPuzzleSolver.optimal
+    assert [length for _, length, _ in solver.improvements] == lengths
+
+
+def test_anytime_returns_best_solution_on_timeout():
+    instance = get_instance_set("korf100")[0]
+    solver = AnytimeWeightedAStarNPuzzleSolver(to_puzzle(instance), LinearConflictHeuristic(),
+                                               budget=SearchBudget(max_nodes=5000))
+    solution = solver.solve()
+    assert solver.budget_exhausted and not solver.proven_optimal and not solver.solution_is_optimal()
+    assert _is_solution(to_puzzle(instance), solution)
+    assert len(solution) == solver.improvements[-1][1]
+
+
+@pytest.mark.parametrize("solver_class", [WeightedAStarNPuzzleSolver, FocalSearchNPuzzleSolver,
+                                          BeamSearchNPuzzleSolver])
+@pytest.mark.parametrize("budget", [SearchBudget(max_nodes=20), SearchBudget(time_limit=0.0, check_interval=1),
+                                    SearchBudget(max_memory=1, check_interval=1)])
+def test_budgets(solver_class, budget):
+    puzzle = to_puzzle(get_instance_set("korf100")[0])
+    solver = solver_class(puzzle, ManhattanHeuristic(), budget=budget)
+    assert solver.solve() is False
+    assert solver.budget_exhausted
+
+
+def test_memory_estimate_grows():
+    puzzle = to_puzzle(get_instance_set("korf100")[0])
+    small = WeightedAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), budget=SearchBudget(max_nodes=100))
+    large = WeightedAStarNPuzzleSolver(puzzle, ManhattanHeuristic(), budget=SearchBudget(max_nodes=1000))
+    small.solve()
+    large.solve()
+    assert 0 < small._memory_in_use() < large._memory_in_use()
+
+
+def test_instrumented(graded_instances):
+    instance = graded_instances[-1]
+    solver = FocalSearchNPuzzleSolver(to_puzzle(instance), ManhattanHeuristic(), instrumentation=Instrumentation())
+    solution = solver.solve()
+    assert solver.stats.solution_length == len(solution)
+    assert solver.stats.expanded == solver.num_nodes_explored
+    assert solver.stats.generated > 0
@@ -0,0 +1,78 @@
+import json
+import os
+import pytest
+from slidingpuzzle.distance_table import get_distance_table
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.training_data import *
+
+np = pytest.importorskip("numpy")
+
+SOLUTION = list(range(9))
+
+
+@pytest.fixture(scope="module")
+def cache_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("tables"))
+
+
+def test_table_labels_are_optimal(tmp_path, cache_dir):
+    dataset = generate_training_data(str(tmp_path), 3, 2, 300, workers=0, cache_dir=cache_dir)
+    assert len(dataset) == 600 and dataset.num_shards == 2
+    table = get_distance_table(3, 0, cache_dir)
+    placements, distances = dataset.load()
+    assert placements.shape == (600, 9) and distances.dtype == np.uint8
+    for board, distance in zip(placements.tolist(), distances.tolist()):
+        assert table.distance(NPuzzle(3, board, SOLUTION)) == distance
+
+
+def test_stratified_depths(tmp_path, cache_dir):
+    dataset = generate_training_data(str(tmp_path), 3, 3, 31, depths=range(1, 32), workers=0, cache_dir=cache_dir)
+    assert dataset.depth_counts == {depth: 3 for depth in range(1, 32)}
+
+
+def test_solver_labels(tmp_path):
+    dataset = generate_training_data(str(tmp_path), 3, 1, 12, source="solver", depths=[4, 8, 12], workers=0)
+    assert dataset.depth_counts == {4: 4, 8: 4, 12: 4}
+    table = get_distance_table(3, 0, None)
+    for board, distance in zip(*dataset.load()):
+        assert table.distance(NPuzzle(3, board.tolist(), SOLUTION)) == distance
+
+
+def test_shards_are_memory_mapped_records(tmp_path, cache_dir):
+    dataset = generate_training_data(str(tmp_path), 3, 1, 50, workers=0, cache_dir=cache_dir)
+    assert os.path.getsize(tmp_path / shard_filename(0)) == 50 * record_size(3)
+    shard = dataset.shard(0)
+    assert isinstance(shard, np.memmap) and shard.shape == (50, 10)
+    batches = list(dataset.iter_batches(20))
+    assert [len(distances) for _, distances in batches] == [20, 20, 10]
+
+
+def test_resume_and_extend(tmp_path, cache_dir):
+    directory = str(tmp_path / "data")
+    generate_training_data(directory, 3, 2, 40, depths=[5, 10], seed=3, workers=0, cache_dir=cache_dir)
+    first = (tmp_path / "data" / shard_filename(0)).read_bytes()
+    os.remove(os.path.join(directory, shard_filename(1)))
+    (tmp_path / "data" / (shard_filename(2) + ".partial")).write_bytes(b"interrupted")
+
+    dataset = generate_training_data(directory, 3, 3, 40, depths=[5, 10], seed=3, workers=2, cache_dir=cache_dir)
+    assert len(dataset) == 120
+    assert (tmp_path / "data" / shard_filename(0)).read_bytes() == first
+    assert not os.path.exists(os.path.join(directory, shard_filename(2) + ".partial"))
+    with open(os.path.join(directory, MANIFEST)) as f:
+        assert [shard["file"] for shard in json.load(f)["shards"]] == [shard_filename(index) for index in range(3)]
+
+    fresh = generate_training_data(str(tmp_path / "fresh"), 3, 3, 40, depths=[5, 10], seed=3, workers=0,
+                                   cache_dir=cache_dir)
+    for index in range(3):
+        assert np.array_equal(fresh.shard(index), dataset.shard(index))
+
+
+def test_resume_rejects_other_parameters(tmp_path, cache_dir):
+    generate_training_data(str(tmp_path), 3, 1, 10, workers=0, cache_dir=cache_dir)
+    with pytest.raises(ValueError):
+        generate_training_data(str(tmp_path), 3, 1, 20, workers=0, cache_dir=cache_dir)
+
+
+def test_command_line(tmp_path, capsys):
+    main([str(tmp_path), "--shards", "2", "--shard-size", "10", "--depths", "3", "7", "--workers", "0"])
+    assert "20 records in 2 shards" in capsys.readouterr().out
@@ -0,0 +1,57 @@
+import pytest
+from slidingpuzzle.puzzle import NPuzzle
+from slidingpuzzle.solver import PuzzleNode, IDAStarNPuzzleSolver, ManhattanHeuristic
+from slidingpuzzle.walking_distance import *
+
+
+def node(puzzle):
+    return PuzzleNode(puzzle, [], [], None, None)
+
+
+def test_walking_distance_table_sizes():
+    table = build_walking_distance_table(4, 3)
+    assert len(table) == 24964
+    assert max(table.values()) == 35
+    assert len(build_walking_distance_table(3, 2)) == 105
+
+
+def test_walking_distance_table_disk_cache(tmp_path):
+    table = build_walking_distance_table(3, 0)
+    path = str(tmp_path / "wd.bin")
+    save_walking_distance_table(path, 3, 0, table)
+    assert load_walking_distance_table(path) == table
+
+    get_walking_distance_table(3, 1, str(tmp_path))
+    assert (tmp_path / "wd_3_1.bin").exists()
+
+
+def test_walking_distance_table_rebuilds_a_truncated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("slidingpuzzle.walking_distance._tables", {})
+    path = tmp_path / "wd_3_2.bin"
+    save_walking_distance_table(str(path), 3, 2, build_walking_distance_table(3, 2))
+    path.write_bytes(path.read_bytes()[:-5])
+    with pytest.raises(ValueError):
+        load_walking_distance_table(str(path))
+    assert len(get_walking_distance_table(3, 2, str(tmp_path))) == 105
+    assert len(load_walking_distance_table(str(path))) == 105
+
+
+@pytest.mark.parametrize("placements", [[1, 2, 6, 3, 5, 0, 4, 7, 8],
+                                        [3, 5, 6, 1, 4, 8, 0, 7, 2],
+                                        [8, 7, 6, 5, 4, 3, 2, 1, 0]])
+def test_walking_distance_heuristic_is_admissible(tmp_path, placements):
+    heuristic = WalkingDistanceHeuristic(str(tmp_path))
+    puzzle = NPuzzle(3, placements, solution=[1, 2, 3, 4, 5, 6, 7, 8, 0])
+    optimal = len(IDAStarNPuzzleSolver(puzzle, ManhattanHeuristic()).solve())
+    assert ManhattanHeuristic().h(node(puzzle)) <= heuristic.h(node(puzzle)) <= optimal
+    assert len(IDAStarNPuzzleSolver(puzzle, heuristic).solve()) == optimal
+
+
+def test_walking_distance_heuristic_goal(tmp_path):
+    heuristic = WalkingDistanceHeuristic(str(tmp_path))
+    assert heuristic.h(node(NPuzzle(4, list(range(16))))) == 0
+    assert heuristic.h(node(NPuzzle(4, [1, 0, *range(2, 16)]))) == 1
+    puzzle = NPuzzle(4, [0, 11, 9, 13, 12, 15, 10, 14, 3, 7, 6, 2, 4, 8, 5, 1], solution=[*range(1, 16), 0])
+    manhattan = sum(abs(index // 4 - puzzle.solution.index(tile) // 4) + abs(index % 4 - puzzle.solution.index(tile) % 4)
+                    for index, tile in enumerate(puzzle.placements) if tile)
+    assert heuristic.h(node(puzzle)) >= manhattan
@@ -0,0 +1,306 @@
+"""
+Labeled boards for training and evaluating learned heuristics: (placements, optimal distance) pairs written to
+sharded binary files by a pool of worker processes.
+
+Every record is width * width + 1 bytes, the placements followed by the distance, so a shard is a plain array
+of uint8 records that NumPy can memory-map. Labels come from the complete distance table of a small puzzle,
+itself a backward breadth-first search from the solution, or from IDA* with an admissible heuristic on larger
+boards. Boards are drawn uniformly from the solvable ones or stratified by depth, with equal numbers at each
+requested distance.
+
+A manifest.json in the directory records the parameters and the finished shards. Shards are written under a
+temporary name and renamed when complete, so an interrupted run resumes by generating only the missing ones,
+and each shard has its own seed, so it holds the same records whichever run writes it.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from .distance_table import MAX_TABLE_WIDTH, UNREACHED, get_distance_table
+from .generators import random_solvable_placements, random_walk_placements
+from .puzzle import NPuzzle
+from .solver import IDAStarNPuzzleSolver, LinearConflictHeuristic, NPuzzleHeuristic
+from .walking_distance import DEFAULT_CACHE_DIR
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+SOURCES = ("table", "solver")
+
+#: parameters that must match for a run to resume an existing directory
+_IDENTITY = ("version", "width", "solution", "source", "shard_size", "depths", "seed")
+
+
+def record_size(width: int) -> int:
+    return width * width + 1
+
+
+def shard_filename(index: int) -> str:
+    return f"shard-{index:05d}.bin"
+
+
+def _quotas(shard_size: int, depths: Sequence[int]) -> Dict[int, int]:
+    """shard_size split as evenly as possible over the depths, the first ones taking the remainder"""
+    share, remainder = divmod(shard_size, len(depths))
+    return {depth: share + (position < remainder) for position, depth in enumerate(depths)}
+
+
+class _TableLabeler:
+    """Uniform or per-depth draws of boards from a complete distance table"""
+    def __init__(self, width: int, solution: Sequence[int], cache_dir: Optional[str]):
+        self.solution = list(solution)
+        self.table = get_distance_table(width, self.solution.index(0), cache_dir)
+        if np is not None:
+            distances = np.frombuffer(self.table.table, dtype=np.uint8)
+            self.reachable = np.flatnonzero(distances != UNREACHED).tolist()
+        else:
+            distances = self.table.table
+            self.reachable = [index for index, value in enumerate(distances) if value != UNREACHED]
+        self._distances = distances
+        self._by_depth: Dict[int, List[int]] = {}
+
+    def draw(self, rng: random.Random, depth: Optional[int] = None) -> Tuple[List[int], int]:
+        if depth is None:
+            index = rng.choice(self.reachable)
+        else:
+            if depth not in self._by_depth:
+                if np is not None:
+                    self._by_depth[depth] = np.flatnonzero(self._distances == depth).tolist()
+                else:
+                    self._by_depth[depth] = [index for index, value in enumerate(self._distances) if value == depth]
+                assert self._by_depth[depth], f"no board is {depth} slides from the solution"
+            index = rng.choice(self._by_depth[depth])
+        return self.table.placements(index, self.solution), int(self.table.table[index])
+
+
+def _solve_length(width: int, placements: List[int], solution: List[int], heuristic: NPuzzleHeuristic) -> int:
+    return len(IDAStarNPuzzleSolver(NPuzzle(width, placements, list(solution)), heuristic).solve())
+
+
+def _write_shard(directory: str, index: int, manifest: dict, heuristic: Optional[NPuzzleHeuristic],
+                 cache_dir: Optional[str]) -> Tuple[int, Dict[int, int]]:
+    """Generate one shard and return its index and the number of records at each depth"""
+    width, solution, shard_size, depths = (manifest["width"], manifest["solution"], manifest["shard_size"],
+                                           manifest["depths"])
+    rng = random.Random(f"{manifest['seed']}-{index}")
+    counts: Dict[int, int] = {}
+    path = os.path.join(directory, shard_filename(index))
+    with open(path + ".partial", "wb") as f:
+        def write(placements: List[int], distance: int):
+            f.write(bytes(placements))
+            f.write(bytes((distance,)))
+            counts[distance] = counts.get(distance, 0) + 1
+
+        if manifest["source"] == "table":
+            labeler = _TableLabeler(width, solution, cache_dir)
+            if depths is None:
+                for _ in range(shard_size):
+                    write(*labeler.draw(rng))
+            else:
+                targets = [depth for depth, quota in _quotas(shard_size, depths).items() for _ in range(quota)]
+                rng.shuffle(targets)
+                for depth in targets:
+                    write(*labeler.draw(rng, depth))
+        elif depths is None:
+            for _ in range(shard_size):
+                placements = random_solvable_placements(width, width, solution, rng)
+                write(placements, _solve_length(width, placements, solution, heuristic))
+        else:
+            # random walks of a target's length rarely end that far away, so each target keeps a walk length
+            # that grows when walks fall short and shrinks when they overshoot, keeping its parity
+            remaining = _quotas(shard_size, depths)
+            walk_lengths = {depth: depth for depth in depths}
+            attempts = 0
+            while any(remaining.values()):
+                attempts += 1
+                if attempts > 100 * shard_size:
+                    missing = [depth for depth, quota in remaining.items() if quota]
+                    raise RuntimeError(f"could not reach depths {missing} by random walks")
+                target = rng.choice([depth for depth, quota in remaining.items() if quota])
+                placements = random_walk_placements(width, walk_lengths[target], width, solution, rng)
+                distance = _solve_length(width, placements, solution, heuristic)
+                if distance < target:
+                    walk_lengths[target] += 2
+                elif distance > target and walk_lengths[target] > target:
+                    walk_lengths[target] -= 2
+                if remaining.get(distance):
+                    remaining[distance] -= 1
+                    write(placements, distance)
+    os.replace(path + ".partial", path)
+    return index, counts
+
+
+def _shard_counts(path: str, width: int) -> Optional[Dict[int, int]]:
+    """Depth counts of a finished shard file, or None when it is missing or truncated"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    size = record_size(width)
+    if len(data) % size:
+        return None
+    counts: Dict[int, int] = {}
+    for distance in data[size - 1::size]:
+        counts[distance] = counts.get(distance, 0) + 1
+    return counts
+
+
+def _save_manifest(directory: str, manifest: dict):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".partial", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".partial", path)
+
+
+def generate_training_data(directory: str, width: int, shards: int, shard_size: int,
+                           source: Optional[str] = None, depths: Optional[Sequence[int]] = None,
+                           solution: Optional[Sequence[int]] = None, heuristic: Optional[NPuzzleHeuristic] = None,
+                           seed: int = 0, workers: Optional[int] = None,
+                           cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> TrainingDataset:
+    """
+    Write shards of shard_size records each to directory, or finish an interrupted run with the same
+    parameters; a run with more shards extends the dataset. source is "table" (widths up to 3, the default
+    there) or "solver", which labels boards with IDA* and heuristic, LinearConflictHeuristic by default; it
+    must be admissible for the labels to be optimal. With depths, every shard holds equal numbers of boards at
+    each of those distances, otherwise boards are uniform over the solvable ones. With workers=0 everything
+    runs in the calling process.
+    """
+    source = source or ("table" if width <= MAX_TABLE_WIDTH else "solver")
+    assert source in SOURCES, f"unknown source {source}, expected one of {', '.join(SOURCES)}"
+    assert source == "solver" or width <= MAX_TABLE_WIDTH, "distance tables only cover boards up to 3x3"
+    assert width * width <= 256, "tiles must fit in a byte"
+    assert shards > 0 and shard_size > 0, "shards and shard_size must be positive"
+    solution = list(solution) if solution is not None else list(range(width * width))
+    heuristic = heuristic or LinearConflictHeuristic()
+    assert source == "table" or heuristic.admissible, "labels are only optimal with an admissible heuristic"
+    manifest = {"version": FORMAT_VERSION, "width": width, "solution": solution, "source": source,
+                "shard_size": shard_size, "depths": sorted(set(depths)) if depths else None, "seed": seed,
+                "record_size": record_size(width), "shards": []}
+
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            existing = json.load(f)
+        changed = [key for key in _IDENTITY if existing.get(key) != manifest[key]]
+        if changed:
+            raise ValueError(f"{directory} holds a dataset with different {', '.join(changed)}")
+
+    finished = {}
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("shard-") and name.endswith(".partial"):
+            # left behind by an interrupted run
+            os.remove(os.path.join(directory, name))
+        elif name.startswith("shard-") and name.endswith(".bin"):
+            counts = _shard_counts(os.path.join(directory, name), width)
+            if counts is not None and sum(counts.values()) == shard_size:
+                finished[int(name[len("shard-"):-len(".bin")])] = counts
+
+    def record(index: Optional[int] = None, counts: Optional[Dict[int, int]] = None):
+        if index is not None:
+            finished[index] = counts
+        manifest["shards"] = [{"file": shard_filename(shard), "records": sum(finished[shard].values()),
+                               "depths": {str(depth): count for depth, count in sorted(finished[shard].items())}}
+                              for shard in sorted(finished)]
+        _save_manifest(directory, manifest)
+
+    record()
+    pending = [index for index in range(shards) if index not in finished]
+    if source == "table":
+        # build and cache the table once, so the workers only memory-map it
+        get_distance_table(width, solution.index(0), cache_dir)
+    workers = os.cpu_count() if workers is None else workers
+    if workers == 0:
+        for index in pending:
+            record(*_write_shard(directory, index, manifest, heuristic, cache_dir))
+    elif pending:
+        with ProcessPoolExecutor(min(workers, len(pending))) as pool:
+            futures = [pool.submit(_write_shard, directory, index, manifest, heuristic, cache_dir)
+                       for index in pending]
+            for future in as_completed(futures):
+                record(*future.result())
+    return TrainingDataset(directory)
+
+
+class TrainingDataset:
+    """Read access to a directory written by generate_training_data, through memory-mapped shards"""
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{directory} holds training data of an unsupported version")
+        self.width = self.manifest["width"]
+        self.solution = self.manifest["solution"]
+        self.record_size = self.manifest["record_size"]
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.manifest["shards"])
+
+    def __len__(self) -> int:
+        return sum(shard["records"] for shard in self.manifest["shards"])
+
+    @property
+    def depth_counts(self) -> Dict[int, int]:
+        """Number of records at each distance, over all shards"""
+        counts: Dict[int, int] = {}
+        for shard in self.manifest["shards"]:
+            for depth, count in shard["depths"].items():
+                counts[int(depth)] = counts.get(int(depth), 0) + count
+        return dict(sorted(counts.items()))
+
+    def shard(self, index: int) -> np.ndarray:
+        """The records of a shard as a read-only (records, cells + 1) uint8 memory map"""
+        if np is None:
+            raise ImportError("NumPy is required to read training data")
+        path = os.path.join(self.directory, self.manifest["shards"][index]["file"])
+        return np.memmap(path, dtype=np.uint8, mode="r").reshape(-1, self.record_size)
+
+    def iter_batches(self, batch_size: int = 4096) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(placements, distances) arrays of up to batch_size records, shard by shard"""
+        for index in range(self.num_shards):
+            records = self.shard(index)
+            for begin in range(0, len(records), batch_size):
+                batch = records[begin:begin + batch_size]
+                yield batch[:, :-1], batch[:, -1]
+
+    def load(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Every record in memory, as (placements, distances)"""
+        records = np.concatenate([self.shard(index) for index in range(self.num_shards)])
+        return records[:, :-1], records[:, -1]
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate sharded (placements, optimal distance) training data")
+    parser.add_argument("directory", help="where to write the shards and manifest")
+    parser.add_argument("--width", type=int, default=3)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--shard-size", type=int, default=100000, help="records per shard")
+    parser.add_argument("--source", choices=SOURCES, help="defaults to table up to 3x3 and solver beyond")
+    parser.add_argument("--depths", type=int, nargs="*", help="stratify evenly over these distances")
+    parser.add_argument("--pattern-databases", nargs="*", help="tables to label with instead of linear conflicts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the number of CPUs")
+    args = parser.parse_args(argv)
+
+    heuristic = None
+    if args.pattern_databases:
+        from .pattern_database import PatternDatabaseHeuristic
+        heuristic = PatternDatabaseHeuristic.load(args.pattern_databases)
+    dataset = generate_training_data(args.directory, args.width, args.shards, args.shard_size, args.source,
+                                     args.depths, heuristic=heuristic, seed=args.seed, workers=args.workers)
+    print(f"{len(dataset)} records in {dataset.num_shards} shards")
+    for depth, count in dataset.depth_counts.items():
+        print(f"depth {depth}: {count}")
+
+
+if __name__ == "__main__":
+    main()
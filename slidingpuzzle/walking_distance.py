@@ -0,0 +1,135 @@
+from __future__ import annotations
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+from .solver import NPuzzleHeuristic, PuzzleNode
+
+MAGIC = b"SPWD"
+DEFAULT_CACHE_DIR = os.environ.get("SLIDINGPUZZLE_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "slidingpuzzle"))
+
+_tables: Dict[Tuple[int, int], Dict[int, int]] = {}
+
+
+def _encode(counts: Sequence[int], width: int) -> int:
+    key = 0
+    for count in reversed(counts):
+        key = key * (width + 1) + count
+    return key
+
+
+def build_walking_distance_table(width: int, blank_line: int) -> Dict[int, int]:
+    """
+    Breadth-first search over walking-distance states. A state is a width x width matrix whose entry
+    [line][goal] counts the tiles in that line (row or column) that belong in line goal; the blank sits
+    in the only line with fewer than width tiles. A move slides one tile from a neighboring line into the blank's.
+    """
+    goal = [0] * (width * width)
+    for line in range(width):
+        goal[line * width + line] = width - 1 if line == blank_line else width
+    table = {_encode(goal, width): 0}
+    frontier = [(goal, blank_line)]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for counts, blank in frontier:
+            for line in (blank - 1, blank + 1):
+                if not 0 <= line < width:
+                    continue
+                for goal_line in range(width):
+                    if counts[line * width + goal_line] == 0:
+                        continue
+                    child = list(counts)
+                    child[line * width + goal_line] -= 1
+                    child[blank * width + goal_line] += 1
+                    key = _encode(child, width)
+                    if key not in table:
+                        table[key] = distance
+                        next_frontier.append((child, line))
+        frontier = next_frontier
+    return table
+
+
+def save_walking_distance_table(path: str, width: int, blank_line: int, table: Dict[int, int]):
+    """Write the table next to path and move it into place, so readers never see a partial file"""
+    keys = array("Q", table.keys())
+    partial = f"{path}.{os.getpid()}.partial"
+    with open(partial, "wb") as f:
+        f.write(struct.pack("<4sBBI", MAGIC, width, blank_line, len(keys)))
+        f.write(keys.tobytes())
+        f.write(bytes(table.values()))
+    os.replace(partial, path)
+
+
+def load_walking_distance_table(path: str) -> Dict[int, int]:
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = struct.calcsize("<4sBBI")
+    if len(data) < offset:
+        raise ValueError(f"{path} has a truncated table")
+    magic, _, _, count = struct.unpack_from("<4sBBI", data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a walking distance table")
+    if len(data) != offset + 9 * count:
+        raise ValueError(f"{path} has a truncated table")
+    keys = array("Q")
+    keys.frombytes(data[offset:offset + 8 * count])
+    return dict(zip(keys, data[offset + 8 * count:offset + 9 * count]))
+
+
+def get_walking_distance_table(width: int, blank_line: int, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+    """Table for the width and goal line of the blank, computed once per process and cached on disk"""
+    key = (width, blank_line)
+    if key not in _tables:
+        path = os.path.join(cache_dir, f"wd_{width}_{blank_line}.bin") if cache_dir else None
+        table = None
+        if path and os.path.exists(path):
+            try:
+                table = load_walking_distance_table(path)
+            except ValueError:
+                # a damaged cache file is rebuilt and replaced
+                table = None
+        if table is None:
+            table = build_walking_distance_table(width, blank_line)
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                save_walking_distance_table(path, width, blank_line, table)
+        _tables[key] = table
+    return _tables[key]
+
+
+class WalkingDistanceHeuristic(NPuzzleHeuristic):
+    """
+    Walking distance (Takahashi): vertical moves needed to sort tiles into their goal rows plus
+    horizontal moves needed to sort them into their goal columns, each read from a precomputed table.
+    """
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._goals: Dict[Tuple[int, ...], Tuple[List[int], List[int], Dict[int, int], Dict[int, int]]] = {}
+
+    def _goal_tables(self, width: int, solution: Sequence[int]):
+        key = tuple(solution)
+        if key not in self._goals:
+            goal_rows, goal_cols = [0] * len(solution), [0] * len(solution)
+            for index, tile in enumerate(solution):
+                goal_rows[tile], goal_cols[tile] = divmod(index, width)
+            blank_row, blank_col = divmod(key.index(0), width)
+            self._goals[key] = (goal_rows, goal_cols,
+                                get_walking_distance_table(width, blank_row, self.cache_dir),
+                                get_walking_distance_table(width, blank_col, self.cache_dir))
+        return self._goals[key]
+
+    def h(self, node: PuzzleNode) -> int:
+        puzzle = node.puzzle
+        width = puzzle.n_cols
+        goal_rows, goal_cols, row_table, col_table = self._goal_tables(width, puzzle.solution)
+        row_counts = [0] * (width * width)
+        col_counts = [0] * (width * width)
+        for index, tile in enumerate(puzzle.placements):
+            if tile:
+                row, col = divmod(index, width)
+                row_counts[row * width + goal_rows[tile]] += 1
+                col_counts[col * width + goal_cols[tile]] += 1
+        return row_table[_encode(row_counts, width)] + col_table[_encode(col_counts, width)]